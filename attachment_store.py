@@ -0,0 +1,334 @@
+import os
+import hashlib
+import threading
+import zipfile
+from pathlib import Path, PurePosixPath
+
+from flow_archive import (
+    ATTACHMENTS_PREFIX, COPY_CHUNK_SIZE, copy_raw_entry, entry_sha256, extract_entry, write_file_entries,
+)
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 첨부 파일 지연 추출
+# ============================================
+# .flow 파일을 열 때 첨부 파일을 모두 풀지 않고, 어떤 항목이 어느 아카이브에
+# 있는지만 기억해 둡니다. 파일 열기 등으로 실제 파일이 필요해지는 순간
+# 해당 항목 하나만 작업 폴더로 스트리밍 추출합니다.
+# 저장할 때 한 번도 추출되지 않은 항목, 그리고 추출/저장 이후 파일 크기와 수정 시각이
+# 바뀌지 않은 항목은 이전 아카이브에서 압축된 그대로 복사합니다 (증분 저장).
+# 새로 첨부하는 파일은 내용의 sha256을 폴더 이름으로 저장하므로('<sha256>/<파일 이름>')
+# 같은 파일을 여러 노드에 첨부해도 작업 폴더와 .flow에는 한 번만 들어갑니다.
+# 추출 캐시(extraction_cache.py)가 있으면 sha256을 아는 항목은 아카이브 대신 캐시에서 가져옵니다.
+# (Qt를 사용하지 않으므로 명령줄 도구에서도 사용할 수 있습니다.)
+
+_HEX_DIGITS = frozenset('0123456789abcdef')
+
+
+def file_signature(path):
+    """변경 감지용 (크기, 수정 시각 ns)"""
+    stat = Path(path).stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def is_partial_file(path):
+    """추출 중인 임시 파일 ('.<이름>.<pid>.part')"""
+    name = Path(path).name
+    return name.startswith('.') and name.endswith('.part')
+
+
+def attachment_key(arcname):
+    """'attachments/a/b.png' -> 'a/b.png' (작업 폴더 기준 상대 경로)"""
+    path = PurePosixPath(arcname.replace('\\', '/'))
+    parts = path.parts
+    if parts and parts[0] == ATTACHMENTS_PREFIX.rstrip('/'):
+        parts = parts[1:]
+    return PurePosixPath(*parts).as_posix() if parts else ''
+
+
+def referenced_keys(attached_files):
+    """노드의 attached_file 값들 -> 작업 폴더 기준 상대 경로 집합 (절대 경로 / 빈 값 제외)"""
+    keys = set()
+    for value in attached_files:
+        if value and not Path(value).is_absolute():
+            keys.add(attachment_key(value))
+    return keys
+
+
+def content_key(sha256, name):
+    """내용 주소 키: '<sha256>/<원래 파일 이름>'"""
+    return f"{sha256}/{name}"
+
+
+def content_hash_of_key(key):
+    """내용 주소 키이면 sha256, 아니면(이전 버전의 '이름_uuid.확장자' 등) None"""
+    head, sep, _name = key.partition('/')
+    if sep and len(head) == 64 and _HEX_DIGITS.issuperset(head):
+        return head
+    return None
+
+
+class AttachmentStore:
+    """
+    작업 폴더(work_dir) + 아직 추출하지 않은 아카이브 항목 목록
+    - archive_path: 지연 추출 대상 .flow 파일 (없으면 None)
+    - pending: 상대 경로 -> 아카이브 항목 이름 (아직 작업 폴더에 없는 첨부)
+    - clean: 상대 경로 -> 파일 서명 (archive_path의 같은 항목과 내용이 같은 작업 폴더 파일)
+    - hashes: 상대 경로 -> archive_path 항목 내용의 sha256 (manifest에서 읽었거나 저장하며 계산)
+    - written_entries: 마지막 write_to()가 기록한 arcname -> (크기, sha256) (manifest용)
+    - orphans: 마지막 write_to()가 참조하는 노드가 없어 제외한 arcname -> 크기
+    - _content: sha256 -> 그 내용을 담은 첫 번째 상대 경로 (중복 첨부 확인용)
+    - cache: ExtractionCache (주어지면 sha256을 아는 항목은 캐시에서 복사하고, 추출한 항목은 캐시에 보관)
+    """
+
+    def __init__(self, work_dir, cache=None):
+        self.work_dir = Path(work_dir)
+        self.cache = cache
+        self.archive_path = None
+        self.pending = {}
+        self.clean = {}
+        self.hashes = {}
+        self.written_entries = {}
+        self.orphans = {}
+        self._written = {}
+        self._written_hashes = {}
+        self._copied = set()
+        self._content = {}
+        self._lock = threading.Lock()
+
+    def attach_archive(self, archive_path, arcnames, hashes=None):
+        """
+        열린 .flow 파일의 첨부 항목을 추출하지 않고 등록, 등록한 개수 반환
+        hashes: arcname -> sha256 (manifest.json에 기록된 값, 다음 저장에서 다시 계산하지 않음)
+        """
+        with self._lock:
+            self.archive_path = Path(archive_path)
+            self.pending = {}
+            self.clean = {}
+            self.hashes = {}
+            for arcname in arcnames:
+                if arcname.endswith('/'):
+                    continue
+                key = attachment_key(arcname)
+                if key and self._is_inside(key):
+                    self.pending[key] = arcname
+                    if hashes and arcname in hashes:
+                        self.hashes[key] = hashes[arcname]
+            self._index_content()
+            return len(self.pending)
+
+    def detach_archive(self):
+        with self._lock:
+            self.archive_path = None
+            self.pending = {}
+            self.clean = {}
+            self.hashes = {}
+            self._content = {}
+
+    def _index_content(self):
+        # 내용 주소 키는 이름에서, 이전 버전 항목은 manifest의 sha256에서 (같은 내용이면 먼저 나온 키)
+        content = {}
+        for key in sorted(set(self.pending) | set(self.hashes)):
+            sha = content_hash_of_key(key) or self.hashes.get(key)
+            if sha:
+                content.setdefault(sha, key)
+        self._content = content
+
+    def _find_content(self, sha):
+        key = self._content.get(sha)
+        if key is not None and (key in self.pending or self.local_path(key).is_file()):
+            return key
+        self._content.pop(sha, None)
+        # 비정상 종료 복구 등으로 작업 폴더에만 있는 내용 주소 폴더
+        folder = self.work_dir / sha
+        if folder.is_dir():
+            for file_path in sorted(folder.iterdir()):
+                if file_path.is_file() and not is_partial_file(file_path):
+                    key = content_key(sha, file_path.name)
+                    self._content[sha] = key
+                    return key
+        return None
+
+    def canonical_key(self, key):
+        """같은 내용이 이미 다른 키로 있으면 그 키 (이전 버전 파일의 중복 첨부를 하나로 모음)"""
+        with self._lock:
+            sha = content_hash_of_key(key) or self.hashes.get(key)
+            if not sha:
+                return key
+            return self._find_content(sha) or key
+
+    def add_file(self, source_path):
+        """
+        외부 파일을 작업 폴더에 내용 주소('<sha256>/<파일 이름>')로 추가하고 상대 경로 키 반환
+        복사하면서 sha256을 계산하고, 같은 내용이 이미 있으면(작업 폴더 또는 아직 추출하지 않은 항목)
+        새로 저장하지 않고 기존 키를 돌려줍니다.
+        """
+        source_path = Path(source_path)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        part_path = self.work_dir / f".{source_path.name}.{os.getpid()}.{threading.get_ident()}.part"
+        digest = hashlib.sha256()
+        try:
+            with open(source_path, 'rb') as source, open(part_path, 'wb') as target:
+                while True:
+                    chunk = source.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    target.write(chunk)
+            sha = digest.hexdigest()
+            with self._lock:
+                key = self._find_content(sha)
+                if key is None:
+                    key = content_key(sha, source_path.name)
+                    dest_path = self.local_path(key)
+                    dest_path.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(part_path, dest_path)
+                    self._content[sha] = key
+            return key
+        finally:
+            if part_path.exists():
+                part_path.unlink()
+
+    def _is_inside(self, key):
+        # '../' 등으로 작업 폴더를 벗어나는 항목은 무시
+        root = self.work_dir.resolve()
+        target = (root / key).resolve()
+        return target == root or root in target.parents
+
+    def local_path(self, key):
+        return (self.work_dir / key).resolve()
+
+    def is_pending(self, key):
+        return key in self.pending
+
+    def materialize(self, key):
+        """상대 경로의 첨부 파일을 보장 (필요하면 그 항목만 추출), 실제 경로 반환"""
+        dest_path = self.local_path(key)
+        with self._lock:
+            arcname = self.pending.get(key)
+            if arcname is None or dest_path.exists():
+                self.pending.pop(key, None)
+                return dest_path
+            sha = self.hashes.get(key) or content_hash_of_key(key)
+            cached = self.cache is not None and sha is not None and self.cache.fetch(sha, dest_path)
+            if not cached:
+                extract_entry(self.archive_path, arcname, dest_path)
+                if self.cache is not None and sha is not None:
+                    self.cache.store(sha, dest_path)
+            del self.pending[key]
+            self.clean[key] = file_signature(dest_path)
+        print(f"  📎 첨부 파일 {'캐시에서 복사' if cached else '추출'}: {arcname} -> {dest_path}")
+        return dest_path
+
+    def discard(self, key):
+        """첨부 파일 삭제 (추출 여부와 관계없이 다음 저장에서 제외)"""
+        with self._lock:
+            self.pending.pop(key, None)
+            self.clean.pop(key, None)
+            self.hashes.pop(key, None)
+            for sha in [sha for sha, content in self._content.items() if content == key]:
+                del self._content[sha]
+            dest_path = self.local_path(key)
+            if dest_path.exists():
+                dest_path.unlink()
+            return dest_path
+
+    def write_to(self, dst_zip, policy=None, progress=None, referenced=None):
+        """
+        작업 폴더의 첨부 + 추출하지 않은 항목을 dst_zip에 기록, [(항목 이름, 방식)] 반환
+        - 'stored' / 'compressed': 새로 기록 (새 첨부이거나 내용이 바뀐 첨부)
+        - 'reused': 바뀌지 않은 첨부, 이전 아카이브의 압축 바이트 재사용
+        - 'copied': 한 번도 추출하지 않은 첨부, 원본 아카이브에서 그대로 복사
+        progress(done, total, arcname)가 주어지면 항목을 기록할 때마다 호출합니다.
+        기록한 항목의 크기와 sha256은 written_entries에 남깁니다 (새 항목은 압축하면서 계산,
+        재사용/복사 항목은 hashes 값을 쓰고 없을 때만 원본 아카이브에서 계산).
+        referenced: 노드가 참조하는 상대 경로 집합 - 주어지면 나머지 첨부는 기록하지 않고
+        orphans(arcname -> 크기)에 남깁니다. 실행 취소로 노드가 돌아올 수 있으므로 작업 폴더의 파일은
+        지우지 않고, 아직 추출하지 않은 항목은 원본 아카이브가 교체되기 전에 작업 폴더로 추출해 둡니다.
+        저장이 끝나면 commit_save()로 새 아카이브를 기준으로 삼습니다.
+        """
+        with self._lock:
+            infos = {}
+            if self.archive_path is not None and (self.pending or self.clean):
+                with zipfile.ZipFile(self.archive_path, 'r') as src_zip:
+                    infos = {info.filename: info for info in src_zip.infolist()}
+
+            fresh = []
+            reused = []
+            written = {}
+            orphans = {}
+            if self.work_dir.exists():
+                for file_path in self.work_dir.rglob('*'):
+                    if not file_path.is_file() or is_partial_file(file_path):
+                        continue
+                    key = file_path.relative_to(self.work_dir).as_posix()
+                    # 압축 전에 서명을 읽어 두어야 저장 도중 바뀐 파일을 다음 저장에서 다시 기록함
+                    signature = file_signature(file_path)
+                    if referenced is not None and key not in referenced:
+                        orphans[ATTACHMENTS_PREFIX + key] = signature[0]
+                        continue
+                    written[key] = signature
+                    info = infos.get(ATTACHMENTS_PREFIX + key)
+                    if info is not None and self.clean.get(key) == signature and info.file_size == signature[0]:
+                        reused.append((key, info))
+                    else:
+                        fresh.append((file_path, ATTACHMENTS_PREFIX + key))
+
+            copies = [(key, info, 'reused') for key, info in sorted(reused, key=lambda item: item[0])]
+            unreferenced = []
+            for key in sorted(self.pending):
+                info = infos.get(self.pending[key])
+                if info is None or key in written or ATTACHMENTS_PREFIX + key in orphans:
+                    continue
+                if referenced is not None and key not in referenced:
+                    orphans[ATTACHMENTS_PREFIX + key] = info.file_size
+                    unreferenced.append((key, info.filename))
+                else:
+                    copies.append((key, info, 'copied'))
+            total = len(fresh) + len(copies)
+            file_progress = None
+            if progress:
+                def file_progress(done, _total, arcname):
+                    progress(done, total, arcname)
+
+            results = []
+            copied = set()
+            fresh_hashes = {}
+            entries = {}
+            written_hashes = {}
+            for arcname, compress_type in write_file_entries(dst_zip, fresh, policy, progress=file_progress,
+                                                             hashes=fresh_hashes):
+                results.append((arcname, 'stored' if compress_type == zipfile.ZIP_STORED else 'compressed'))
+                key = arcname[len(ATTACHMENTS_PREFIX):]
+                entries[arcname] = (written[key][0], fresh_hashes[arcname])
+                written_hashes[key] = fresh_hashes[arcname]
+            for key, info, method in copies:
+                sha = self.hashes.get(key) or entry_sha256(self.archive_path, info)
+                copy_raw_entry(self.archive_path, info, dst_zip, ATTACHMENTS_PREFIX + key)
+                results.append((ATTACHMENTS_PREFIX + key, method))
+                entries[ATTACHMENTS_PREFIX + key] = (info.file_size, sha)
+                written_hashes[key] = sha
+                if method == 'copied':
+                    copied.add(key)
+                if progress:
+                    progress(len(results), total, ATTACHMENTS_PREFIX + key)
+            for key, arcname in unreferenced:
+                extract_entry(self.archive_path, arcname, self.local_path(key))
+            self._written = written
+            self._written_hashes = written_hashes
+            self._copied = copied
+            self.written_entries = entries
+            self.orphans = orphans
+            return results
+
+    def commit_save(self, archive_path):
+        """write_to()로 만든 아카이브가 완성된 뒤 호출: 이후 재사용/추출 기준을 새 파일로 변경"""
+        with self._lock:
+            self.archive_path = Path(archive_path)
+            self.pending = {key: ATTACHMENTS_PREFIX + key for key in self._copied}
+            self.clean = self._written
+            self.hashes = self._written_hashes
+            self._index_content()
+            self._written = {}
+            self._written_hashes = {}
+            self._copied = set()
@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+import shutil
+import zipfile
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flow_archive import CompressionPolicy, default_worker_count, write_file_entries  # noqa: E402
+
+
+# ============================================
+# 벤치마크 - 첨부 파일 병렬 압축 (.flow 저장)
+# ============================================
+# 첨부 파일 개수/크기별로 순차 압축(스레드 1개)과 스레드 풀 압축의 저장 시간을 비교합니다.
+#
+#   python benchmarks/bench_attachment_compression.py
+#   python benchmarks/bench_attachment_compression.py --counts 50 200 --sizes 256 2048 --workers 4
+
+
+def make_attachment(path, size_kb):
+    """압축이 되는(로그/텍스트 유사) 첨부 파일 생성"""
+    line = b"2025-01-01 12:00:00 OHT-0421 TRANSPORT_DELAY battery=17% zone=A3 " + os.urandom(8).hex().encode() + b"\n"
+    repeat = (size_kb * 1024) // len(line) + 1
+    path.write_bytes((line * repeat)[:size_kb * 1024])
+
+
+def time_save(entries, out_path, workers, policy):
+    started = time.perf_counter()
+    with zipfile.ZipFile(out_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        write_file_entries(zipf, entries, policy, max_workers=workers)
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='첨부 파일 병렬 압축 벤치마크')
+    parser.add_argument('--counts', type=int, nargs='+', default=[20, 100, 200])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[128, 1024, 4096], help='첨부 파일 크기 (KB)')
+    parser.add_argument('--workers', type=int, default=default_worker_count())
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    policy = CompressionPolicy()
+    work_dir = Path(tempfile.mkdtemp(prefix='sdc_bench_'))
+    print(f"작업 스레드: {args.workers}개 (CPU {os.cpu_count()}개)")
+    print(f"{'개수':>6} {'크기(KB)':>9} {'순차(s)':>9} {'병렬(s)':>9} {'속도 향상':>9}")
+    try:
+        for size_kb in args.sizes:
+            for count in args.counts:
+                src = work_dir / f"src_{size_kb}_{count}"
+                src.mkdir()
+                entries = []
+                for i in range(count):
+                    path = src / f"capture_{i:04d}.log"
+                    make_attachment(path, size_kb)
+                    entries.append((path, f"attachments/{path.name}"))
+
+                serial = min(time_save(entries, work_dir / 'serial.flow', 1, policy) for _ in range(args.repeat))
+                parallel = min(time_save(entries, work_dir / 'parallel.flow', args.workers, policy)
+                               for _ in range(args.repeat))
+                with zipfile.ZipFile(work_dir / 'serial.flow') as a, zipfile.ZipFile(work_dir / 'parallel.flow') as b:
+                    assert a.namelist() == b.namelist(), "항목 순서가 다릅니다"
+                    assert all(a.getinfo(n).CRC == b.getinfo(n).CRC for n in a.namelist())
+                print(f"{count:>6} {size_kb:>9} {serial:>9.3f} {parallel:>9.3f} {serial / parallel:>8.2f}x")
+                shutil.rmtree(src)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
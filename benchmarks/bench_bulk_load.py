@@ -0,0 +1,114 @@
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PySide2 import QtWidgets  # noqa: E402
+from NodeGraphQt import NodeGraph  # noqa: E402
+
+import main as app_main  # noqa: E402
+from nodes import (  # noqa: E402
+    TriggerSourceNode, TriggerNode, DataQueryNode, TableNode, ScreenNode,
+    SQLNode, LogNode, DecisionNode, LoopNode, ConclusionNode,
+)
+
+
+# ============================================
+# 벤치마크 - 대량 노드 불러오기 (time-to-interactive)
+# ============================================
+# 같은 워크플로우를 기존 방식(노드마다 Undo/시그널/화면 갱신)과
+# BulkConstruction 방식으로 불러와서, 이벤트 큐가 빌 때까지의 시간을 비교합니다.
+#
+#   python benchmarks/bench_bulk_load.py
+#   python benchmarks/bench_bulk_load.py --sizes 500 2000 10000 --repeat 3
+
+NODE_CLASSES = (
+    TriggerSourceNode, TriggerNode, DataQueryNode, TableNode, ScreenNode,
+    SQLNode, LogNode, DecisionNode, LoopNode, ConclusionNode,
+)
+
+# 체인으로 이어 붙일 step 패턴 (type, 속성)
+STEP_PATTERN = (
+    ('table', {'target_table': 'TB_OHT_STATUS', 'target_columns': 'OHT_ID, STATUS'}),
+    ('screen', {'screen_name': 'OHT 모니터링', 'screen_url': 'http://mes/oht'}),
+    ('log', {'log_source': 'OHT_CTRL', 'log_pattern': 'ERROR'}),
+    ('reasoning', {'condition': 'battery < 20', 'reasoning': '배터리 부족'}),
+    ('conclusion', {'conclusion': '충전 후 재투입', 'conclusion_type': '조치'}),
+)
+
+
+def make_workflow(step_count):
+    """step_count개 step을 가진 워크플로우 dict (노드를 격자로 배치하고 순서대로 연결)"""
+    steps = []
+    for i in range(step_count):
+        step_type, props = STEP_PATTERN[i % len(STEP_PATTERN)]
+        step = {
+            'id': i + 1,
+            'name': f"{step_type}_{i + 1}",
+            'type': step_type,
+            'position': [float((i % 50) * 260), float((i // 50) * 180)],
+            'connections': [],
+        }
+        step.update(props)
+        if step_type != 'conclusion' and i + 1 < step_count:
+            step['connections'].append({'from_port': 0, 'to_node_step_id': i + 2})
+        steps.append(step)
+    return {'workflow_name': 'bench', 'description': 'bulk load benchmark', 'steps': steps}
+
+
+def new_graph():
+    graph = NodeGraph()
+    for node_class in NODE_CLASSES:
+        graph.register_node(node_class)
+    graph.widget.resize(1200, 800)
+    graph.widget.show()
+    return graph
+
+
+def time_to_interactive(app, graph, path, bulk):
+    """불러오기 시작부터 대기 중인 이벤트(다시 그리기 포함)를 모두 처리할 때까지의 시간"""
+    with open(Path(tempfile.gettempdir()) / 'sdc_bench_load.log', 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log):
+        started = time.perf_counter()
+        app_main.load_from_json(graph, str(path), bulk=bulk)
+        app.processEvents()
+        app.processEvents()
+        elapsed = time.perf_counter() - started
+    return elapsed, len(graph.all_nodes())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='대량 노드 불러오기 벤치마크')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 2000, 10000])
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    work_dir = Path(tempfile.mkdtemp(prefix='sdc_bench_'))
+    print(f"{'노드':>7} {'기존(s)':>9} {'대량(s)':>9} {'속도 향상':>9}")
+    for size in args.sizes:
+        path = work_dir / f"bench_{size}.json"
+        path.write_text(json.dumps(make_workflow(size), ensure_ascii=False), encoding='utf-8')
+        results = {}
+        for bulk in (False, True):
+            best = None
+            for _ in range(args.repeat):
+                graph = new_graph()
+                elapsed, created = time_to_interactive(app, graph, path, bulk)
+                assert created == size, f"{created}개만 생성됨 (기대: {size})"
+                best = elapsed if best is None else min(best, elapsed)
+                graph.widget.close()
+                graph.deleteLater()
+                app.processEvents()
+            results[bulk] = best
+        print(f"{size:>7} {results[False]:>9.2f} {results[True]:>9.2f} {results[False] / results[True]:>8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flow_model import FlowDocument, open_flow, save_flow  # noqa: E402
+
+
+# ============================================
+# 벤치마크 - 파일 하나당 처리 시간: 명령줄 도구(flow_model) vs GUI 경로(main.py)
+# ============================================
+# 같은 .flow를 두 경로로 열기 -> 구조 검사 -> 다시 저장하고 단계별 시간을 비교합니다.
+# - CLI: open_flow / FlowDocument.validate / save_flow (Qt 불필요)
+# - GUI: load_from_json (노드 생성) / build_workflow_data + validate_graph / export_to_json
+# GUI 쪽은 PySide2·NodeGraphQt가 있을 때만 측정합니다 (--cli-only면 CLI만).
+#
+#   python benchmarks/bench_cli_vs_gui.py
+#   python benchmarks/bench_cli_vs_gui.py --sizes 100 1000 5000 --repeat 3
+
+# 요청 목표: 명령줄 도구가 파일 하나당 GUI 경로보다 이만큼 이상 빠를 것
+TARGET_SPEEDUP = 50
+
+# 체인으로 이어 붙일 step 패턴 (type, 속성)
+STEP_PATTERN = (
+    ('trigger', {'situation': 'OHT 정지 알람 발생', 'situation_type': '알람'}),
+    ('table', {'target_table': 'TB_OHT_STATUS', 'target_columns': 'OHT_ID, STATUS'}),
+    ('screen', {'screen_name': 'OHT 모니터링', 'screen_url': 'http://mes/oht'}),
+    ('log', {'log_source': 'OHT_CTRL', 'log_pattern': 'ERROR'}),
+    ('reasoning', {'condition': 'battery < 20', 'reasoning': '배터리 부족'}),
+    ('conclusion', {'conclusion': '충전 후 재투입', 'conclusion_type': '조치 사항'}),
+)
+
+
+def make_workflow(step_count):
+    """step_count개 step을 가진 워크플로우 dict (노드를 격자로 배치하고 순서대로 연결)"""
+    steps = []
+    for i in range(step_count):
+        step_type, props = STEP_PATTERN[i % len(STEP_PATTERN)]
+        step = {
+            'id': i + 1,
+            'name': f"{step_type}_{i + 1}",
+            'type': step_type,
+            'position': [float((i % 50) * 260), float((i // 50) * 180)],
+            'connections': [],
+        }
+        step.update(props)
+        if step_type != 'conclusion' and i + 1 < step_count:
+            step['connections'].append({'from_port': 0, 'to_node_step_id': i + 2})
+        steps.append(step)
+    return {'workflow_name': 'bench', 'description': 'CLI vs GUI benchmark', 'steps': steps}
+
+
+def best_of(repeat, fn):
+    """fn()이 반환한 단계별 시간 dict 중 합계가 가장 작은 것"""
+    best = None
+    for _ in range(repeat):
+        timings = fn()
+        if best is None or sum(timings.values()) < sum(best.values()):
+            best = timings
+    return best
+
+
+def time_cli(path, out_path):
+    timings = {}
+    started = time.perf_counter()
+    opened = open_flow(path)
+    timings['open'] = time.perf_counter() - started
+    # open_flow의 검사 결과는 캐시되므로, GUI의 validate_graph처럼 문서를 만들어 다시 검사
+    started = time.perf_counter()
+    doc = opened.document()
+    errors = doc.validate()
+    timings['validate'] = time.perf_counter() - started
+    assert not errors, errors[:3]
+    started = time.perf_counter()
+    save_flow(doc, out_path)
+    timings['save'] = time.perf_counter() - started
+    return timings
+
+
+class GuiRunner:
+    """QApplication + NodeGraph를 한 번만 만들고 파일마다 다시 사용 (앱 시작 시간은 제외)"""
+
+    def __init__(self):
+        from PySide2 import QtWidgets
+        from NodeGraphQt import NodeGraph
+        import main as app_main
+        from nodes import (
+            TriggerSourceNode, TriggerNode, DataQueryNode, TableNode, ScreenNode,
+            SQLNode, LogNode, DecisionNode, LoopNode, ConclusionNode,
+        )
+        self.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+        self.app_main = app_main
+        self.graph = NodeGraph()
+        for node_class in (TriggerSourceNode, TriggerNode, DataQueryNode, TableNode, ScreenNode,
+                           SQLNode, LogNode, DecisionNode, LoopNode, ConclusionNode):
+            self.graph.register_node(node_class)
+        self.graph.widget.resize(1200, 800)
+        self.graph.widget.show()
+
+    def time_file(self, path, out_path, step_count):
+        app_main = self.app_main
+        timings = {}
+        with open(Path(tempfile.gettempdir()) / 'sdc_bench_cli_vs_gui.log', 'w', encoding='utf-8') as log, \
+                contextlib.redirect_stdout(log):
+            started = time.perf_counter()
+            loaded = app_main.load_from_json(self.graph, str(path))
+            self.app.processEvents()
+            timings['open'] = time.perf_counter() - started
+            assert loaded is not None and len(self.graph.all_nodes()) == step_count, \
+                f"{len(self.graph.all_nodes())}개만 생성됨 (기대: {step_count})"
+            started = time.perf_counter()
+            problems = app_main.validate_graph(self.graph)
+            timings['validate'] = time.perf_counter() - started
+            assert not [p for p in problems if '연결되지 않은' not in p], problems[:3]
+            started = time.perf_counter()
+            app_main.export_to_json(self.graph, str(out_path))
+            timings['save'] = time.perf_counter() - started
+        return timings
+
+
+def format_ms(timings):
+    return ' '.join(f"{timings[key] * 1000:>9.1f}" for key in ('open', 'validate', 'save'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='명령줄 도구 vs GUI 경로 파일 하나당 처리 시간')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--cli-only', action='store_true', help='GUI 경로는 측정하지 않음')
+    args = parser.parse_args(argv)
+
+    gui = None
+    if not args.cli_only:
+        try:
+            gui = GuiRunner()
+        except ImportError as e:
+            print(f"⚠️ GUI 경로는 측정하지 않음 (PySide2/NodeGraphQt 없음: {e})")
+
+    work_dir = Path(tempfile.mkdtemp(prefix='sdc_bench_cli_'))
+    print(f"{'단계':>6} {'경로':>4} {'열기(ms)':>9} {'검사(ms)':>9} {'저장(ms)':>9} {'합계(ms)':>9} {'속도 향상':>9}")
+    below_target = []
+    for size in args.sizes:
+        path = work_dir / f"bench_{size}.flow"
+        save_flow(FlowDocument.from_dict(make_workflow(size)), path)
+        cli = best_of(args.repeat, lambda: time_cli(path, work_dir / f"cli_{size}.flow"))
+        print(f"{size:>6} {'CLI':>4} {format_ms(cli)} {sum(cli.values()) * 1000:>9.1f}")
+        if gui is None:
+            continue
+        gui_timings = best_of(args.repeat, lambda: gui.time_file(path, work_dir / f"gui_{size}.flow", size))
+        speedup = sum(gui_timings.values()) / sum(cli.values())
+        print(f"{size:>6} {'GUI':>4} {format_ms(gui_timings)} {sum(gui_timings.values()) * 1000:>9.1f} "
+              f"{speedup:>8.1f}x")
+        if speedup < TARGET_SPEEDUP:
+            below_target.append(size)
+    if gui is not None:
+        if below_target:
+            print(f"❌ 목표({TARGET_SPEEDUP}x) 미달: {below_target}단계")
+        else:
+            print(f"✅ 모든 크기에서 목표({TARGET_SPEEDUP}x) 이상")
+    return 1 if below_target else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dataset_export import DatasetExporter  # noqa: E402
+from flow_model import FlowDocument, save_flow  # noqa: E402
+
+
+# ============================================
+# 벤치마크 - 학습 데이터셋 일괄 내보내기 (작업 프로세스 수별 처리량)
+# ============================================
+# 같은 .flow 묶음을 작업 프로세스 수를 바꿔 가며 내보내고 초당 파일 수를 비교합니다.
+# (GUI 불필요)
+#
+#   python benchmarks/bench_dataset_export.py
+#   python benchmarks/bench_dataset_export.py --files 400 --steps 2000 --workers 1 2 4 8
+
+# 체인으로 이어 붙일 step 패턴 (type, 속성) - bench_bulk_load.py와 같은 구성
+STEP_PATTERN = (
+    ('table', {'target_table': 'TB_OHT_STATUS', 'target_columns': 'OHT_ID, STATUS'}),
+    ('screen', {'screen_name': 'OHT 모니터링', 'screen_url': 'http://mes/oht'}),
+    ('log', {'log_source': 'OHT_CTRL', 'log_pattern': 'ERROR'}),
+    ('reasoning', {'condition': 'battery < 20', 'reasoning': '배터리 부족'}),
+    ('conclusion', {'conclusion': '충전 후 재투입', 'conclusion_type': '조치'}),
+)
+
+
+def make_workflow(step_count):
+    steps = []
+    for i in range(step_count):
+        step_type, props = STEP_PATTERN[i % len(STEP_PATTERN)]
+        step = {'id': i + 1, 'name': f"{step_type}_{i + 1}", 'type': step_type,
+                'position': [float((i % 50) * 260), float((i // 50) * 180)], 'connections': []}
+        step.update(props)
+        if step_type != 'conclusion' and i + 1 < step_count:
+            step['connections'].append({'from_port': 0, 'to_node_step_id': i + 2})
+        steps.append(step)
+    return {'workflow_name': 'bench', 'description': 'dataset export benchmark', 'steps': steps}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='학습 데이터셋 내보내기 벤치마크')
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    work_dir = Path(tempfile.mkdtemp(prefix='sdc_bench_dataset_'))
+    try:
+        flows_dir = work_dir / 'flows'
+        flows_dir.mkdir()
+        doc = FlowDocument.from_dict(make_workflow(args.steps))
+        for i in range(args.files):
+            save_flow(doc, flows_dir / f"flow_{i:05d}.flow")
+
+        print(f"{'프로세스':>8} {'시간(s)':>9} {'파일/초':>9} {'배율':>7}")
+        base = None
+        for workers in args.workers:
+            output = work_dir / f"out_{workers}"
+            result = DatasetExporter(output, workers=workers).run([flows_dir])
+            assert result['exported'] == args.files, json.dumps(result)
+            rate = result['exported'] / result['seconds']
+            base = base or rate
+            print(f"{workers:>8} {result['seconds']:>9.2f} {rate:>9.1f} {rate / base:>6.2f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import sys
+import random
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flow_model import FlowDocument, save_flow  # noqa: E402
+from pattern_mining import PatternMiner  # noqa: E402
+
+
+# ============================================
+# 벤치마크 - 반복 패턴(빈발 부분 그래프) 찾기
+# ============================================
+# 몇 가지 조사 조각(테이블 -> 정보 수집 -> 판단 -> 결론 등)을 무작위로 이어 붙인 .flow를 만들고
+# 작업 프로세스 수를 바꿔 가며 전체 라이브러리의 패턴을 찾는 시간을 잽니다.
+# (GUI 불필요)
+#
+#   python benchmarks/bench_pattern_mining.py
+#   python benchmarks/bench_pattern_mining.py --files 5000 --fragments 12 --workers 1 4 8
+
+TABLES = ('TB_OHT_STATUS', 'TB_TRANSPORT_CMD', 'TB_PORT_STATE', 'TB_ALARM_HIST', 'TB_CARRIER')
+LOGS = ('OHT_CTRL', 'MCS', 'STK_CTRL')
+
+
+def make_fragment(rng, next_id):
+    """조사 조각 하나: (입력 노드) -> 정보 수집 -> 판단 -> 결론 2개, [step], 시작 step id"""
+    table = rng.choice(TABLES)
+    ids = list(range(next_id, next_id + 5))
+    source = ({'type': 'table', 'target_table': table} if rng.random() < 0.7
+              else {'type': 'log', 'log_source': rng.choice(LOGS)})
+    steps = [
+        dict(source, id=ids[0], connections=[{'from_port': 0, 'to_node_step_id': ids[1]}]),
+        {'id': ids[1], 'type': 'observation', 'table': table,
+         'connections': [{'from_port': 0, 'to_node_step_id': ids[2]}]},
+        {'id': ids[2], 'type': 'reasoning', 'condition': 'value < 20',
+         'connections': [{'from_port': 0, 'to_node_step_id': ids[3]}, {'from_port': 1, 'to_node_step_id': ids[4]}]},
+        {'id': ids[3], 'type': 'conclusion', 'conclusion': '조치 필요', 'connections': []},
+        {'id': ids[4], 'type': 'conclusion', 'conclusion': '정상', 'connections': []},
+    ]
+    return steps, ids[2]
+
+
+def make_workflow(rng, fragment_count):
+    steps = [{'id': 1, 'type': 'trigger', 'situation': '반송 지연', 'situation_type': '지연', 'connections': []}]
+    next_id = 2
+    for _ in range(fragment_count):
+        fragment, decision_id = make_fragment(rng, next_id)
+        next_id += len(fragment)
+        # 트리거에서 조각의 정보 수집 단계로 연결
+        steps[0]['connections'].append({'from_port': 0, 'to_node_step_id': fragment[1]['id']})
+        steps.extend(fragment)
+    for i, step in enumerate(steps):
+        step['name'] = f"{step['type']}_{step['id']}"
+        step['position'] = [float(i * 200), 0.0]
+    return {'workflow_name': 'bench', 'description': 'pattern mining benchmark', 'steps': steps}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='반복 패턴 찾기 벤치마크')
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--fragments', type=int, default=8, help='flow 하나의 조사 조각 수')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    work_dir = Path(tempfile.mkdtemp(prefix='sdc_bench_patterns_'))
+    try:
+        for i in range(args.files):
+            doc = FlowDocument.from_dict(make_workflow(rng, rng.randint(1, args.fragments)))
+            save_flow(doc, work_dir / f"flow_{i:05d}.flow")
+
+        print(f"{'프로세스':>8} {'시간(s)':>9} {'파일/초':>9} {'패턴':>7}")
+        for workers in args.workers:
+            result = PatternMiner(workers=workers).run([work_dir])
+            rate = result['files'] / result['seconds']
+            print(f"{workers:>8} {result['seconds']:>9.2f} {rate:>9.1f} {len(result['patterns']):>7}")
+        print("상위 패턴:")
+        for pattern in result['patterns'][:5]:
+            print(f"  [{pattern['support']}] {pattern['text']}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
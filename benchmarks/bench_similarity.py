@@ -0,0 +1,75 @@
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from similarity_index import SimilarityIndex  # noqa: E402
+
+
+# ============================================
+# 벤치마크 - 유사 단계 검색 (TF-IDF) 색인 생성 / 검색 지연 시간
+# ============================================
+# 판단 조건 / 결론처럼 생긴 문장을 무작위로 만들어 색인하고, 입력 중인 문장(앞부분)으로 검색합니다.
+# (GUI 불필요, .flow 파일 없이 문서 목록으로 바로 색인)
+#
+#   python benchmarks/bench_similarity.py
+#   python benchmarks/bench_similarity.py --steps 100000 --queries 500
+
+SUBJECTS = ('OHT', 'AGV', '스토커', '리프터', '컨베이어', '포트', '반송 명령', '배터리', '센서', '캐리어')
+METRICS = ('배터리 잔량', '대기 시간', '에러 코드', '통신 상태', '속도', '위치 편차', '온도', '재시도 횟수')
+COMPARES = ('이하인가', '이상인가', '발생했는가', '정상인가', '초과했는가', '반복되는가')
+CONCLUSIONS = ('충전 대기로 인한 지연', '통신 단절로 인한 정지', '센서 오염 의심', '경로 막힘으로 우회',
+               '재시작 후 정상화', '포트 점유로 인한 대기', '캐리어 ID 불일치')
+
+
+def make_docs(count, seed=0):
+    rng = random.Random(seed)
+    docs = []
+    for i in range(count):
+        if i % 3 == 2:
+            field = 'conclusion'
+            text = f"{rng.choice(SUBJECTS)} {rng.choice(CONCLUSIONS)}"
+        else:
+            field = 'condition'
+            text = (f"{rng.choice(SUBJECTS)}의 {rng.choice(METRICS)}이(가) "
+                    f"{rng.randint(1, 100)}% {rng.choice(COMPARES)}")
+        docs.append({"source": f"flow_{i // 20:05d}.flow", "step_id": i % 20 + 1,
+                     "type": 'conclusion' if field == 'conclusion' else 'reasoning',
+                     "name": f"step_{i}", "field": field, "text": text})
+    return docs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='유사 단계 검색 벤치마크')
+    parser.add_argument('--steps', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    docs = make_docs(args.steps)
+    started = time.perf_counter()
+    index = SimilarityIndex.from_docs(docs)
+    build_seconds = time.perf_counter() - started
+    print(f"색인: 단계 {len(index):,}개, 단어 {len(index.vocabulary):,}개, {build_seconds:.2f}초")
+
+    rng = random.Random(1)
+    latencies = []
+    for _ in range(args.queries):
+        text = rng.choice(docs)['text']
+        # 입력 중인 문장: 앞부분만
+        text = text[:rng.randint(3, len(text))]
+        started = time.perf_counter()
+        index.search(text, k=args.k, fields=('condition',))
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[int(len(latencies) * 0.95)]
+    print(f"검색 {args.queries}회 (top-{args.k}): p50 {p50:.2f}ms, p95 {p95:.2f}ms, 최대 {latencies[-1]:.2f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
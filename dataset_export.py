@@ -0,0 +1,482 @@
+import os
+import json
+import time
+import zlib
+import signal
+import hashlib
+import zipfile
+import functools
+import multiprocessing
+from pathlib import Path
+
+from flow_archive import FLOW_SUFFIXES
+from flow_model import open_flow
+from reasoning_paths import DEFAULT_MAX_PATHS, reasoning_traces
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 학습 데이터셋(JSONL) 일괄 내보내기
+# ============================================
+# 폴더 아래의 .flow 파일을 모두 찾아 학습 레코드로 변환하고, 샤드 단위 JSONL로 기록합니다.
+# - 파일 읽기/검증/직렬화는 multiprocessing 풀의 작업 프로세스에서 하고,
+#   부모 프로세스는 작업 프로세스가 만든 JSONL 바이트를 샤드 파일에 이어 쓰기만 합니다.
+# - 레코드 종류(record_mode)
+#   'flow':  flow 하나 = 레코드 하나 (위치 정보를 뺀 워크플로우)
+#   'paths': 트리거 -> 결론 추론 경로 하나 = 레코드 하나 (reasoning_paths.py, flow당 max_paths개까지 샘플링)
+# - 샤드는 'part-00000.jsonl.part'에 쓰다가 레코드 수가 차면 'part-00000.jsonl'로 이름을 바꿉니다.
+# - checkpoint.json에 끝난 파일 목록과 쓰고 있는 샤드의 바이트 위치를 주기적으로 기록하므로,
+#   중단된 실행을 같은 출력 폴더로 다시 실행하면 마지막 체크포인트 이후부터 이어서 내보냅니다.
+#   (체크포인트 이후에 쓴 샤드 내용은 잘라 내고 해당 파일을 다시 처리하므로 중복 레코드가 생기지 않습니다.)
+#   끝까지 완료된 출력 폴더로 다시 실행하면 현재 라이브러리 기준으로 처음부터 다시 만듭니다.
+# - 내보내기 캐시(ExportCache): flow마다 지문(fingerprint)을 만들어 내보낸 JSONL 바이트를 보관합니다.
+#   지문 = 내보내기 버전 + 레코드 종류/옵션 + source + 정규화한 workflow JSON + 첨부 파일(이름, 크기, CRC)
+#   파일 크기/수정 시각이 지난번과 같으면 파일을 열지 않고 캐시를 쓰고(index.json),
+#   바뀌었으면 작업 프로세스에서 지문을 다시 계산해 내용이 같으면(다시 저장만 한 파일) 역시 캐시를 씁니다.
+#   따라서 다시 만들 때는 바뀐 flow만 새로 변환합니다.
+# - 중복 제외(dedup_threshold): 거의 같은 flow(flow_dedup, WL 해시 + MinHash/LSH) 묶음마다 대표 하나만 내보냄
+# (Qt를 사용하지 않으므로 명령줄 도구에서 사용합니다.)
+
+DATASET_VERSION = 1
+CHECKPOINT_NAME = 'checkpoint.json'
+SHARD_NAME = 'part-{:05d}.jsonl'
+PARTIAL_SUFFIX = '.part'
+DEFAULT_SHARD_RECORDS = 10000
+RECORD_MODES = ('flow', 'paths')
+# 레코드 형식(flow_records / path_records / reasoning_paths trace)을 바꾸면 올려서 이전 캐시를 무효화
+EXPORTER_VERSION = 1
+CACHE_INDEX_NAME = 'index.json'
+# 체크포인트 기록 간격 (초)
+CHECKPOINT_INTERVAL = 5.0
+
+
+def discover_flows(roots):
+    """
+    파일/폴더 목록에서 .flow 파일을 찾아 [(체크포인트 키, 레코드 source)] 반환
+    키는 절대 경로, source는 지정한 폴더 기준 상대 경로 (파일을 직접 지정하면 파일 이름)
+    """
+    tasks = []
+    seen = set()
+    for raw in roots:
+        root = Path(raw).resolve()
+        if root.is_dir():
+            found = ((p, p.relative_to(root).as_posix()) for p in sorted(root.rglob('*'))
+                     if p.is_file() and p.suffix.lower() in FLOW_SUFFIXES)
+        else:
+            found = [(root, root.name)]
+        for path, source in found:
+            key = str(path)
+            if key not in seen:
+                seen.add(key)
+                tasks.append((key, source))
+    return tasks
+
+
+def flow_records(opened, source):
+    """
+    열린 .flow 하나 -> 학습 레코드 목록
+    레코드 하나 = 위치 정보를 뺀 워크플로우 (export_to_plain_json과 같은 step) + source + 사용 항목
+    """
+    doc = opened.document()
+    record = {"source": source}
+    record.update(doc.to_plain_dict())
+    record["used_items"] = {key: sorted(values) for key, values in opened.used_items.items()}
+    return [record]
+
+
+def path_records(data, source, max_paths=DEFAULT_MAX_PATHS):
+    """
+    워크플로우 dict -> 추론 경로 레코드 목록 (경로 하나 = 레코드 하나)
+    경로가 max_paths보다 많으면 source로 정한 seed로 고르게 샘플링하므로 다시 실행해도 같은 경로가 나옵니다.
+    """
+    path_count, traces = reasoning_traces(data, max_paths=max_paths, seed=zlib.crc32(source.encode('utf-8')))
+    head = {
+        "source": source,
+        "workflow_name": data.get('workflow_name', ''),
+        "description": data.get('description', ''),
+        "path_count": path_count,
+    }
+    return [dict(head, path_index=index, trace=trace) for index, trace in traces]
+
+
+def flow_fingerprint(opened, source, record_mode, max_paths):
+    """내보내기 결과를 결정하는 입력의 sha256 (정규화한 JSON이라 들여쓰기/키 순서와 무관)"""
+    digest = hashlib.sha256()
+    options = [EXPORTER_VERSION, record_mode, max_paths if record_mode == 'paths' else None, source]
+    digest.update(json.dumps(options, ensure_ascii=False).encode('utf-8'))
+    digest.update(json.dumps(opened.data, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    if opened.attachments:
+        with zipfile.ZipFile(opened.path, 'r') as zipf:
+            for info in sorted(zipf.infolist(), key=lambda i: i.filename):
+                if info.filename in opened.attachments:
+                    digest.update(f"\0{info.filename}\0{info.file_size}\0{info.CRC}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def file_stat(path):
+    """캐시 색인용 (크기, 수정 시각 ns)"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class ExportCache:
+    """
+    지문 -> 내보낸 JSONL 바이트 (root/outputs/<앞 2자리>/<지문>.jsonl)
+    + 색인(root/index.json): 레코드 종류/옵션 + 파일 경로 -> [크기, 수정 시각 ns, 지문]
+      (파일을 열지 않고 바뀌지 않았음을 확인)
+    항목은 임시 파일에 쓴 뒤 이름을 바꾸므로 작업 프로세스 여러 개가 동시에 써도 안전합니다.
+    """
+
+    def __init__(self, root, load_index=True):
+        self.root = Path(root)
+        self.index_path = self.root / CACHE_INDEX_NAME
+        self.entries = {}
+        if load_index and self.index_path.is_file():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                if index.get('version') == EXPORTER_VERSION:
+                    self.entries = index.get('entries') or {}
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def output_path(self, fingerprint):
+        return self.root / 'outputs' / fingerprint[:2] / f"{fingerprint}.jsonl"
+
+    def read(self, fingerprint):
+        try:
+            return self.output_path(fingerprint).read_bytes()
+        except OSError:
+            return None
+
+    def write(self, fingerprint, payload):
+        target = self.output_path(fingerprint)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{target.name}.{os.getpid()}{PARTIAL_SUFFIX}")
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, target)
+
+    @staticmethod
+    def _index_key(key, record_mode, max_paths):
+        if record_mode == 'paths':
+            return f"{record_mode}:{max_paths}:{key}"
+        return f"{record_mode}:{key}"
+
+    def fingerprint_for(self, key, stat, record_mode, max_paths):
+        """색인의 크기/수정 시각이 같으면 저장된 지문, 아니면 None"""
+        entry = self.entries.get(self._index_key(key, record_mode, max_paths))
+        if entry and entry[:2] == stat:
+            return entry[2]
+        return None
+
+    def remember(self, key, stat, fingerprint, record_mode, max_paths):
+        self.entries[self._index_key(key, record_mode, max_paths)] = stat + [fingerprint]
+
+    def signature_for(self, key, stat, params):
+        """중복 검사 서명 (flow_dedup): 크기/수정 시각이 같으면 (그래프 해시, 서명 bytes), 아니면 None"""
+        entry = self.entries.get(f"dedup:{params}:{key}")
+        if entry and entry[:2] == stat:
+            return entry[2], bytes.fromhex(entry[3])
+        return None
+
+    def remember_signature(self, key, stat, params, graph_hash, signature):
+        self.entries[f"dedup:{params}:{key}"] = stat + [graph_hash, signature.hex()]
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(CACHE_INDEX_NAME + PARTIAL_SUFFIX)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": EXPORTER_VERSION, "entries": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+
+def _init_worker():
+    # Ctrl+C는 부모 프로세스만 처리 (부모가 체크포인트를 남기고 풀을 종료)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def export_flow_file(task, record_mode='flow', max_paths=DEFAULT_MAX_PATHS, cache_root=None):
+    """
+    (작업 프로세스) .flow 하나를 JSONL 바이트로 변환
+    cache_root가 주어지면 지문이 같은 결과가 캐시에 있을 때 그대로 쓰고, 새로 만든 결과는 캐시에 저장합니다.
+    반환값: (키, JSONL 바이트, 레코드 수, 오류 메시지 또는 None, 지문 또는 None, 캐시 사용 여부)
+    """
+    key, source = task
+    try:
+        opened = open_flow(key)
+        cache = fingerprint = None
+        if cache_root is not None:
+            cache = ExportCache(cache_root, load_index=False)  # 색인은 부모 프로세스만 읽고 씀
+            fingerprint = flow_fingerprint(opened, source, record_mode, max_paths)
+            payload = cache.read(fingerprint)
+            if payload is not None:
+                return key, payload, payload.count(b'\n'), None, fingerprint, True
+        errors = opened.validate()
+        if errors:
+            return key, b'', 0, f"구조 오류 {len(errors)}건: {errors[0]}", None, False
+        if record_mode == 'paths':
+            records = path_records(opened.data, source, max_paths)
+        else:
+            records = flow_records(opened, source)
+        payload = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records).encode('utf-8')
+        if cache is not None:
+            cache.write(fingerprint, payload)
+        return key, payload, len(records), None, fingerprint, False
+    except Exception as e:
+        return key, b'', 0, f"{type(e).__name__}: {e}", None, False
+
+
+class DatasetExporter:
+    """
+    .flow 파일들 -> output_dir/part-NNNNN.jsonl (+ checkpoint.json)
+    - shard_records: 샤드 하나의 최대 레코드 수
+    - workers: 작업 프로세스 수 (기본: CPU 수, 1이면 풀 없이 현재 프로세스에서 처리)
+    - record_mode: 'flow' / 'paths' (같은 출력 폴더에서는 바꿀 수 없음), max_paths: 'paths'의 flow당 최대 경로 수
+    - progress(done, total, label): 파일 하나를 끝낼 때마다 호출
+    - cache_dir: 내보내기 캐시 폴더 (None이면 캐시 없이 매번 변환)
+    - dedup_threshold: 주면 이 유사도 이상인 flow 묶음에서 대표(먼저 나온 파일)만 내보냄
+    """
+
+    def __init__(self, output_dir, shard_records=DEFAULT_SHARD_RECORDS, workers=None, progress=None,
+                 record_mode='flow', max_paths=DEFAULT_MAX_PATHS, cache_dir=None, dedup_threshold=None):
+        if record_mode not in RECORD_MODES:
+            raise ValueError(f"알 수 없는 레코드 종류: {record_mode}")
+        self.output_dir = Path(output_dir)
+        self.record_mode = record_mode
+        self.max_paths = max_paths
+        self.shard_records = max(1, shard_records)
+        self.workers = workers or os.cpu_count() or 1
+        self.progress = progress
+        self.cache = ExportCache(cache_dir) if cache_dir is not None else None
+        self.dedup_threshold = dedup_threshold
+        self.checkpoint_path = self.output_dir / CHECKPOINT_NAME
+        self.state = None
+        self._shard = None
+        self._last_checkpoint = 0.0
+
+    # ---- 체크포인트 ----
+
+    def _load_state(self, check_mode=True):
+        if self.checkpoint_path.is_file():
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') != DATASET_VERSION:
+                raise ValueError(f"지원하지 않는 체크포인트 버전입니다: {state.get('version')}")
+            if check_mode and state.get('record_mode', 'flow') != self.record_mode:
+                raise ValueError(f"이 출력 폴더는 '{state.get('record_mode', 'flow')}' 레코드로 내보낸 폴더입니다: "
+                                 f"{self.output_dir}")
+            return state
+        return {
+            "version": DATASET_VERSION,
+            "record_mode": self.record_mode,
+            "shards": [],       # 완성된 샤드 [{name, records, bytes}]
+            "current": None,    # 쓰고 있는 샤드 {name, records, bytes}
+            "done": {},         # 키 -> [source, 레코드 수, 샤드 이름]
+            "failed": {},       # 키 -> 오류 메시지 (다음 실행에서 다시 시도)
+            "duplicates": {},   # 키 -> 대표 source (거의 같은 flow라 내보내지 않음)
+            "finished": False,
+        }
+
+    def _reset_output(self):
+        """이전 실행의 샤드와 체크포인트를 지우고 처음부터 (완료된 폴더를 다시 만들 때 / rebuild)"""
+        names = [shard['name'] for shard in self.state['shards']]
+        if self.state['current'] is not None:
+            names.append(self.state['current']['name'])
+        for name in names:
+            (self.output_dir / name).unlink(missing_ok=True)
+            (self.output_dir / (name + PARTIAL_SUFFIX)).unlink(missing_ok=True)
+        self.checkpoint_path.unlink(missing_ok=True)
+        self.state = self._load_state()
+
+    def _write_checkpoint(self):
+        if self._shard is not None:
+            self._shard.flush()
+            os.fsync(self._shard.fileno())
+        tmp_path = self.checkpoint_path.with_name(CHECKPOINT_NAME + PARTIAL_SUFFIX)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+        self._last_checkpoint = time.monotonic()
+
+    # ---- 샤드 ----
+
+    def _recover_shards(self):
+        """체크포인트와 디스크의 샤드를 맞춤 (이름 변경 전에 중단된 샤드 / 체크포인트 이후에 쓴 내용)"""
+        for shard in self.state['shards']:
+            final_path = self.output_dir / shard['name']
+            partial_path = final_path.with_name(shard['name'] + PARTIAL_SUFFIX)
+            if not final_path.exists() and partial_path.exists():
+                os.replace(partial_path, final_path)
+        current = self.state['current']
+        if current is None:
+            return
+        partial_path = self.output_dir / (current['name'] + PARTIAL_SUFFIX)
+        if not partial_path.exists():
+            if current['bytes']:
+                raise ValueError(f"체크포인트에 기록된 샤드가 없습니다: {partial_path}")
+            partial_path.touch()
+        with open(partial_path, 'r+b') as f:
+            f.truncate(current['bytes'])
+
+    def _open_shard(self):
+        current = self.state['current']
+        if current is None:
+            index = len(self.state['shards'])
+            current = self.state['current'] = {"name": SHARD_NAME.format(index), "records": 0, "bytes": 0}
+        self._shard = open(self.output_dir / (current['name'] + PARTIAL_SUFFIX), 'ab')
+
+    def _close_shard(self):
+        """쓰고 있는 샤드를 완성: 체크포인트에 먼저 기록한 뒤 이름 변경 (중단되면 _recover_shards가 마저 처리)"""
+        current = self.state['current']
+        self._shard.flush()
+        os.fsync(self._shard.fileno())
+        self._shard.close()
+        self._shard = None
+        self.state['current'] = None
+        if current['records']:
+            self.state['shards'].append(current)
+        self._write_checkpoint()
+        partial_path = self.output_dir / (current['name'] + PARTIAL_SUFFIX)
+        if current['records']:
+            os.replace(partial_path, self.output_dir / current['name'])
+        else:
+            partial_path.unlink(missing_ok=True)
+
+    def _append(self, key, source, payload, count):
+        current = self.state['current']
+        self._shard.write(payload)
+        current['records'] += count
+        current['bytes'] += len(payload)
+        self.state['done'][key] = [source, count, current['name']]
+        self.state['failed'].pop(key, None)
+        if current['records'] >= self.shard_records:
+            self._close_shard()
+            self._open_shard()
+
+    # ---- 실행 ----
+
+    def _iter_results(self, tasks):
+        cache_root = str(self.cache.root) if self.cache is not None else None
+        export = functools.partial(export_flow_file, record_mode=self.record_mode, max_paths=self.max_paths,
+                                   cache_root=cache_root)
+        if self.workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                yield export(task)
+            return
+        workers = min(self.workers, len(tasks))
+        # 작업 프로세스마다 여러 묶음을 받도록 (부모와 주고받는 횟수를 줄이면서 끝부분 부하도 고르게)
+        chunksize = max(1, min(32, len(tasks) // (workers * 8)))
+        with multiprocessing.get_context().Pool(workers, initializer=_init_worker) as pool:
+            yield from pool.imap_unordered(export, tasks, chunksize)
+
+    def _find_duplicates(self, sources):
+        """거의 같은 flow 묶음에서 대표가 아닌 파일 키 -> 대표 source"""
+        # flow_dedup이 이 모듈을 import하므로 여기서 불러옴
+        from flow_dedup import FlowDeduplicator, duplicate_keys
+
+        dedup = FlowDeduplicator(self.dedup_threshold, workers=self.workers, cache=self.cache)
+        signatures, _errors = dedup.signatures(list(sources.items()))
+        duplicates = duplicate_keys(dedup.cluster(list(sources), signatures))
+        return {key: sources[representative] for key, representative in duplicates.items()}
+
+    def _cached_payload(self, key, stat):
+        """(부모 프로세스) 크기/수정 시각이 지난번과 같은 파일의 캐시된 결과, 없으면 None"""
+        if self.cache is None or stat is None:
+            return None
+        fingerprint = self.cache.fingerprint_for(key, stat, self.record_mode, self.max_paths)
+        return self.cache.read(fingerprint) if fingerprint else None
+
+    def run(self, roots, rebuild=False):
+        """
+        roots 아래의 .flow를 내보냄 (이미 끝난 파일은 건너뜀), 요약 dict 반환
+        중단되어도(Ctrl+C 포함) 그때까지 쓴 내용은 체크포인트에 남아 다음 실행에서 이어집니다.
+        이전 실행이 끝까지 완료됐거나 rebuild=True면 샤드를 지우고 현재 파일들로 다시 만듭니다
+        (내보내기 캐시가 있으면 바뀐 flow만 새로 변환).
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        # rebuild면 다른 레코드 종류로 내보낸 폴더도 지우고 다시 만듦
+        self.state = self._load_state(check_mode=not rebuild)
+        if rebuild or self.state['finished']:
+            self._reset_output()
+        self._recover_shards()
+        done = self.state['done']
+        sources = dict(discover_flows(roots))
+        duplicates = self._find_duplicates(sources) if self.dedup_threshold else {}
+        self.state['duplicates'] = duplicates
+        pending = [(key, source) for key, source in sources.items() if key not in done and key not in duplicates]
+        skipped = sum(1 for key in sources if key in done)
+        self.state['finished'] = False
+        self._open_shard()
+        self._write_checkpoint()
+
+        started = time.monotonic()
+        exported = 0
+        cached = 0
+        records = 0
+        failed = 0
+        index = 0
+        try:
+            stats = {}
+            tasks = []
+            for key, source in pending:
+                try:
+                    stats[key] = file_stat(key)
+                except OSError:
+                    stats[key] = None
+                payload = self._cached_payload(key, stats[key])
+                if payload is None:
+                    tasks.append((key, source))
+                    continue
+                # 바뀌지 않은 파일: 파일을 열지 않고 캐시된 결과를 그대로 씀
+                count = payload.count(b'\n')
+                self._append(key, source, payload, count)
+                exported += 1
+                cached += 1
+                records += count
+                index += 1
+                if self.progress:
+                    self.progress(index, len(pending), source)
+
+            for key, payload, count, error, fingerprint, hit in self._iter_results(tasks):
+                index += 1
+                if error:
+                    failed += 1
+                    self.state['failed'][key] = error
+                    print(f"  ❌ {sources[key]}: {error}")
+                else:
+                    self._append(key, sources[key], payload, count)
+                    exported += 1
+                    cached += hit
+                    records += count
+                    if self.cache is not None and fingerprint and stats[key] is not None:
+                        self.cache.remember(key, stats[key], fingerprint, self.record_mode, self.max_paths)
+                if self.progress:
+                    self.progress(index, len(pending), sources[key])
+                if time.monotonic() - self._last_checkpoint >= CHECKPOINT_INTERVAL:
+                    self._write_checkpoint()
+            self._close_shard()
+            self.state['finished'] = not self.state['failed']
+            self._write_checkpoint()
+        finally:
+            if self._shard is not None:
+                # 중단: 지금까지 쓴 내용을 체크포인트에 남김
+                self._write_checkpoint()
+                self._shard.close()
+                self._shard = None
+            if self.cache is not None:
+                self.cache.save()
+        elapsed = time.monotonic() - started
+        return {
+            "files": len(sources),
+            "skipped": skipped,
+            "exported": exported,
+            "cached": cached,
+            "duplicates": len(duplicates),
+            "failed": failed,
+            "records": records,
+            "shards": len(self.state['shards']),
+            "total_records": sum(s['records'] for s in self.state['shards']),
+            "seconds": elapsed,
+        }
@@ -0,0 +1,88 @@
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 변경 추적 (증분 저장용)
+# ============================================
+# 그래프 시그널(노드 생성/삭제, 속성 변경, 포트 연결, Undo 스택)을 받아
+# 마지막 저장 이후 무엇이 바뀌었는지 기록합니다.
+# 바뀐 것이 없으면 저장 시 workflow.json을 다시 압축하지 않고
+# 이전 .flow 파일의 압축된 항목을 그대로 재사용합니다.
+# (시그널 이름만 사용하므로 Qt를 직접 import하지 않습니다.)
+
+# (시그널 이름, 변경 종류) - NodeGraphQt 버전에 없는 시그널은 건너뜀
+GRAPH_SIGNALS = (
+    ('property_changed', 'property'),
+    ('node_created', 'structure'),
+    ('nodes_deleted', 'structure'),
+    ('port_connected', 'structure'),
+    ('port_disconnected', 'structure'),
+)
+
+
+class DirtyTracker:
+    """
+    마지막 저장 이후 변경 내역
+    - revision: 변경될 때마다 1씩 증가 (저장 도중 바뀌었는지 확인용)
+    - dirty_nodes: 속성이 바뀐 노드 id
+    - structure_dirty: 노드 추가/삭제, 연결 변경, 이동 등
+    - saved_digest / saved_options: 마지막으로 기록한 workflow.json의 해시와 저장 옵션
+    """
+
+    def __init__(self):
+        self.revision = 0
+        self.dirty_nodes = set()
+        self.structure_dirty = True
+        self.saved_digest = None
+        self.saved_options = None
+
+    @property
+    def is_dirty(self):
+        return self.structure_dirty or bool(self.dirty_nodes)
+
+    def connect_graph(self, graph):
+        """그래프 시그널 연결, 연결된 시그널 이름 목록 반환"""
+        connected = []
+        for signal_name, kind in GRAPH_SIGNALS:
+            signal = getattr(graph, signal_name, None)
+            if signal is None:
+                continue
+            if kind == 'property':
+                signal.connect(self._on_property_changed)
+            else:
+                signal.connect(self._on_structure_changed)
+            connected.append(signal_name)
+        # 노드 이동처럼 별도 시그널이 없는 변경은 Undo 스택으로 감지
+        try:
+            graph.undo_stack().indexChanged.connect(self._on_structure_changed)
+            connected.append('undo_stack.indexChanged')
+        except Exception:
+            pass
+        return connected
+
+    def _on_property_changed(self, node, *args):
+        self.mark_node(getattr(node, 'id', node))
+
+    def _on_structure_changed(self, *args):
+        self.mark_structure()
+
+    def mark_node(self, node_id):
+        self.revision += 1
+        self.dirty_nodes.add(node_id)
+
+    def mark_structure(self):
+        self.revision += 1
+        self.structure_dirty = True
+
+    def mark_saved(self, digest, options, revision=None):
+        """저장 완료 기록 (저장 도중 다른 변경이 있었다면 dirty 상태 유지)"""
+        self.saved_digest = digest
+        self.saved_options = options
+        if revision is None or revision == self.revision:
+            self.dirty_nodes.clear()
+            self.structure_dirty = False
+
+    def mark_loaded(self):
+        """파일을 새로 연 직후: 변경 없음, 다만 재사용할 workflow.json 해시는 없음"""
+        self.mark_saved(None, None)
+
+    def can_reuse_json(self, options):
+        """변경이 없고 같은 옵션으로 저장한 적이 있으면 True (최종 판단은 해시 비교)"""
+        return not self.is_dirty and self.saved_digest is not None and self.saved_options == options
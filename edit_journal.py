@@ -0,0 +1,415 @@
+import os
+import json
+import time
+import uuid
+import queue
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from graph_snapshot import node_display_name, read_node_position, read_node_properties
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 편집 저널 (비정상 종료 복구)
+# ============================================
+# 그래프 편집(노드 생성/삭제, 연결, 속성 변경, 첨부 변경, 이동)을 한 줄에 하나씩
+# JSONL로 덧붙여 기록합니다. 기록은 백그라운드 스레드에서 하므로 편집이 느려지지 않습니다.
+# 주기적으로 현재 그래프 상태(snapshot) 한 줄로 압축(compaction)하여 파일이 커지지 않게 하고,
+# 프로그램이 비정상 종료되면 다음 실행 때 마지막 snapshot + 이후 기록을 재생하여 복구합니다.
+# 정상 종료 시 저널 파일은 삭제됩니다.
+# 실행 중인 세션은 session-<id>.lock에 OS 파일 잠금을 잡고 있으므로, 잠금이 풀린
+# (프로세스가 끝난) 세션의 저널만 복구 대상입니다 (다시 바로 실행해도 복구 가능).
+# (Qt를 직접 import하지 않으며, NodeGraphQt 시그널/노드 API만 사용합니다.)
+
+JOURNAL_VERSION = 1
+JOURNAL_SUFFIX = '.journal.jsonl'
+LOCK_SUFFIX = '.lock'
+
+# 이 간격마다 쌓인 기록을 snapshot 한 줄로 압축
+COMPACTION_INTERVAL = 60
+
+
+def _try_lock(f):
+    """열린 파일에 배타적 잠금 시도 (다른 프로세스/핸들이 잡고 있으면 False, 프로세스가 끝나면 OS가 풀어줌)"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def lock_path_for(journal_path):
+    """저널 파일 -> 세션 잠금 파일 경로"""
+    journal_path = Path(journal_path)
+    return journal_path.with_name(journal_path.name[:-len(JOURNAL_SUFFIX)] + LOCK_SUFFIX)
+
+
+def is_session_alive(journal_path):
+    """저널을 쓴 세션이 아직 실행 중인지 (잠금 파일이 없거나 잠글 수 있으면 끝난 세션)"""
+    try:
+        with open(lock_path_for(journal_path), 'a') as f:
+            if not _try_lock(f):
+                return True
+    except OSError:
+        pass
+    return False
+
+
+def remove_journal(journal_path):
+    """복구했거나 버린 저널과 그 잠금 파일 삭제"""
+    Path(journal_path).unlink(missing_ok=True)
+    lock_path_for(journal_path).unlink(missing_ok=True)
+
+
+def state_from_snapshot(snapshot, work_dir=None, archive=None):
+    """GraphSnapshot -> 저널 snapshot 상태 (JSON 직렬화 가능한 dict)"""
+    nodes = {}
+    for idx, node_id in enumerate(snapshot.ids):
+        nodes[node_id] = {
+            'type': snapshot.types[idx],
+            'name': snapshot.names[idx],
+            'pos': snapshot.positions[idx],
+            'props': dict(snapshot.properties[idx]),
+        }
+    edges = []
+    for src, port_idx, dst, dst_port in snapshot.iter_edges():
+        out_names = snapshot.output_names[src]
+        in_names = snapshot.input_names[dst]
+        edges.append([
+            snapshot.ids[src], out_names[port_idx] if port_idx < len(out_names) else '',
+            snapshot.ids[dst], in_names[dst_port] if dst_port < len(in_names) else '',
+        ])
+    return {
+        'nodes': nodes,
+        'edges': edges,
+        'work_dir': str(work_dir) if work_dir else None,
+        'archive': str(archive) if archive else None,
+    }
+
+
+def _port_ref(port):
+    node = port.node()
+    return (node.id if node else None), port.name()
+
+
+class EditJournal:
+    """
+    세션 하나의 편집 저널
+    - path: <directory>/session-<id>.journal.jsonl (실행 중에는 session-<id>.lock을 잠가 둠)
+    - record(op, **fields): GUI 스레드에서 호출, 실제 기록은 작업 스레드에서
+    - compact(state): 현재 상태 한 줄로 파일을 교체 (이전 기록은 버림)
+    """
+
+    def __init__(self, directory, session_id=None):
+        self.directory = Path(directory)
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self.path = self.directory / f"session-{self.session_id}{JOURNAL_SUFFIX}"
+        self.lock_path = lock_path_for(self.path)
+        self._lock_file = None
+        self.ops_since_compaction = 0
+        self.suspended = False
+        self._graph = None
+        # 노드 id -> 마지막으로 기록한 위치 (Undo 스택 변경 시 바뀐 위치만 기록)
+        self._positions = {}
+        self._undo_stack = None
+        self._undo_index = 0
+        self._queue = queue.Queue()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, state=None):
+        """작업 스레드 시작 (state가 있으면 그 상태로 저널 시작)"""
+        if self.is_running:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # 저널을 만들기 전에 잠금부터 (잠금 없이 저널만 있는 순간에 다른 인스턴스가 복구하지 않도록)
+        try:
+            self._lock_file = open(self.lock_path, 'a')
+            if not _try_lock(self._lock_file):
+                print(f"⚠️ 편집 저널 잠금 실패: {self.lock_path}")
+        except OSError as e:
+            print(f"⚠️ 편집 저널 잠금 실패: {e}")
+        self._thread = threading.Thread(target=self._run, name='edit-journal', daemon=True)
+        self._thread.start()
+        self.compact(state or {'nodes': {}, 'edges': []})
+
+    def close(self, discard=True):
+        """작업 스레드 종료 (discard=True면 정상 종료로 보고 저널 파일 삭제)"""
+        if not self.is_running:
+            return
+        self._queue.put(('close', discard))
+        self._thread.join()
+        self._thread = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+            if discard:
+                self.lock_path.unlink(missing_ok=True)
+
+    def record(self, op, **fields):
+        if self.suspended or not self.is_running:
+            return
+        fields['op'] = op
+        fields['t'] = round(time.time(), 3)
+        self._queue.put(('op', fields))
+        self.ops_since_compaction += 1
+
+    def compact(self, state):
+        self._positions = {node_id: node.get('pos') for node_id, node in (state.get('nodes') or {}).items()}
+        self._queue.put(('compact', state))
+        self.ops_since_compaction = 0
+
+    # ---- 그래프 시그널 연결 ----
+
+    def connect_graph(self, graph):
+        """그래프 시그널을 저널 기록에 연결, 연결된 시그널 이름 목록 반환"""
+        self._graph = graph
+        handlers = (
+            ('node_created', self._on_node_created),
+            ('nodes_deleted', self._on_nodes_deleted),
+            ('port_connected', self._on_port_connected),
+            ('port_disconnected', self._on_port_disconnected),
+            ('property_changed', self._on_property_changed),
+        )
+        connected = []
+        for signal_name, handler in handlers:
+            signal = getattr(graph, signal_name, None)
+            if signal is None:
+                continue
+            signal.connect(handler)
+            connected.append(signal_name)
+        # 노드 드래그 이동(과 그 Undo/Redo)은 시그널 없이 Undo 스택에만 남으므로
+        # Undo 인덱스가 바뀔 때 실행/취소된 명령이 건드린 노드의 위치를 마지막 기록과 비교해 기록
+        try:
+            self._undo_stack = graph.undo_stack()
+            self._undo_index = self._undo_stack.index()
+            self._undo_stack.indexChanged.connect(self._on_undo_index_changed)
+            connected.append('undo_stack.indexChanged')
+        except Exception:
+            pass
+        return connected
+
+    def _on_node_created(self, node):
+        if self.suspended:
+            return
+        pos = read_node_position(self._graph, node)
+        self._positions[node.id] = pos
+        self.record(
+            'create', node_id=node.id, type=getattr(node, 'type_', 'unknown'),
+            name=node_display_name(node), pos=pos, props=read_node_properties(node),
+        )
+
+    def _on_nodes_deleted(self, node_ids):
+        for node_id in node_ids:
+            self._positions.pop(node_id, None)
+        self.record('delete', node_ids=list(node_ids))
+
+    def _on_port_connected(self, in_port, out_port):
+        src, src_port = _port_ref(out_port)
+        dst, dst_port = _port_ref(in_port)
+        self.record('connect', edge=[src, src_port, dst, dst_port])
+
+    def _on_port_disconnected(self, in_port, out_port):
+        src, src_port = _port_ref(out_port)
+        dst, dst_port = _port_ref(in_port)
+        self.record('disconnect', edge=[src, src_port, dst, dst_port])
+
+    def _on_property_changed(self, node, prop_name, value):
+        if prop_name == 'attached_file':
+            self.record('attachment', node_id=node.id, path=value or '')
+        else:
+            if prop_name == 'pos':
+                self._positions[node.id] = read_node_position(self._graph, node)
+            self.record('property', node_id=node.id, name=prop_name, value=value)
+
+    def _on_undo_index_changed(self, index):
+        previous, self._undo_index = self._undo_index, index
+        if self.suspended or self._graph is None:
+            return
+        nodes = self._touched_nodes(previous, index)
+        if nodes is None:
+            nodes = self._graph.all_nodes()
+        positions = {}
+        for node in nodes:
+            # 저널에 없는 노드(삭제된 노드 등)는 재생해도 반영되지 않으므로 건너뜀
+            if node.id not in self._positions:
+                continue
+            pos = read_node_position(self._graph, node)
+            if pos is not None and pos != self._positions[node.id]:
+                positions[node.id] = pos
+        if positions:
+            self._positions.update(positions)
+            self.record('move', positions=positions)
+
+    def _touched_nodes(self, previous, index):
+        """
+        Undo 인덱스 previous -> index 사이에 실행/취소된 명령이 가리키는 노드 목록
+        (NodeGraphQt 명령의 node / nodes 속성, 매크로는 하위 명령까지)
+        명령을 알 수 없으면(스택이 비워졌거나 속성을 볼 수 없는 명령) None -> 전체 노드와 비교
+        """
+        nodes = {}
+        for i in range(min(previous, index), max(previous, index)):
+            command = self._undo_stack.command(i)
+            if command is None:
+                return None
+            pending = [command]
+            while pending:
+                command = pending.pop()
+                children = [command.child(c) for c in range(command.childCount())]
+                touched = getattr(command, 'nodes', None) or []
+                node = getattr(command, 'node', None)
+                if node is not None:
+                    touched = [node]
+                elif not children and not touched and type(command).__name__ == 'QUndoCommand':
+                    return None
+                for node in touched:
+                    nodes[node.id] = node
+                pending.extend(c for c in children if c is not None)
+        return list(nodes.values())
+
+    # ---- 작업 스레드 ----
+
+    def _run(self):
+        f = open(self.path, 'a', encoding='utf-8')
+        try:
+            while True:
+                kind, payload = self._queue.get()
+                batch = [(kind, payload)]
+                # 쌓인 기록은 한 번에 쓰고 flush
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for kind, payload in batch:
+                    if kind == 'op':
+                        f.write(json.dumps(payload, ensure_ascii=False, default=str) + '\n')
+                    elif kind == 'compact':
+                        f.close()
+                        self._write_snapshot(payload)
+                        f = open(self.path, 'a', encoding='utf-8')
+                    elif kind == 'close':
+                        f.close()
+                        if payload:
+                            self.path.unlink(missing_ok=True)
+                        return
+                f.flush()
+        except Exception as e:
+            print(f"⚠️ 편집 저널 기록 실패: {e}")
+        finally:
+            if not f.closed:
+                f.close()
+
+    def _write_snapshot(self, state):
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        line = {'op': 'snapshot', 'version': JOURNAL_VERSION, 't': round(time.time(), 3), 'state': state}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(line, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def replay_journal(path):
+    """
+    저널 파일을 재생하여 마지막 상태 반환 (snapshot 상태와 같은 형식, 읽을 수 없으면 None)
+    비정상 종료로 마지막 줄이 잘린 경우 그 줄은 무시합니다.
+    """
+    state = None
+    nodes = {}
+    edges = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        op = entry.get('op')
+        if op == 'snapshot':
+            state = dict(entry.get('state') or {})
+            nodes = {node_id: dict(node) for node_id, node in (state.get('nodes') or {}).items()}
+            edges = [list(edge) for edge in state.get('edges') or []]
+            continue
+        if state is None:
+            continue
+        if op == 'create':
+            nodes[entry['node_id']] = {
+                'type': entry.get('type'), 'name': entry.get('name'),
+                'pos': entry.get('pos'), 'props': dict(entry.get('props') or {}),
+            }
+        elif op == 'delete':
+            removed = set(entry.get('node_ids') or [])
+            for node_id in removed:
+                nodes.pop(node_id, None)
+            edges = [e for e in edges if e[0] not in removed and e[2] not in removed]
+        elif op == 'connect':
+            if entry['edge'] not in edges:
+                edges.append(entry['edge'])
+        elif op == 'disconnect':
+            edges = [e for e in edges if e != entry['edge']]
+        elif op in ('property', 'attachment', 'move'):
+            _apply_node_change(nodes, op, entry)
+        elif op == 'archive':
+            state['archive'] = entry.get('path')
+
+    if state is None:
+        return None
+    state['nodes'] = nodes
+    state['edges'] = edges
+    return state
+
+
+def _apply_node_change(nodes, op, entry):
+    if op == 'move':
+        for node_id, pos in (entry.get('positions') or {}).items():
+            if node_id in nodes:
+                nodes[node_id]['pos'] = pos
+        return
+    node = nodes.get(entry.get('node_id'))
+    if node is None:
+        return
+    if op == 'attachment':
+        node['props']['attached_file'] = entry.get('path') or ''
+    elif entry.get('name') == 'name':
+        node['name'] = entry.get('value')
+    elif entry.get('name') == 'pos':
+        node['pos'] = entry.get('value')
+    else:
+        node['props'][entry.get('name')] = entry.get('value')
+
+
+def find_orphan_journals(directory, exclude=None):
+    """실행 중인 세션의 것이 아닌 (잠금이 풀린) 저널 목록, 최신순"""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    found = []
+    for path in directory.glob(f"session-*{JOURNAL_SUFFIX}"):
+        if exclude is not None and path == Path(exclude):
+            continue
+        if is_session_alive(path):
+            continue
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            continue
+        found.append((mtime, path))
+    return [path for _mtime, path in sorted(found, reverse=True)]
@@ -0,0 +1,200 @@
+import os
+import time
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+
+from flow_archive import COPY_CHUNK_SIZE
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 첨부 파일 추출 캐시
+# ============================================
+# .flow에서 추출한 첨부 파일을 내용의 sha256을 이름으로 디스크에 보관합니다.
+# 같은 파일(또는 같은 첨부를 가진 다른 파일)을 다시 열면 아카이브를 풀지 않고 캐시에서 복사합니다.
+# - objects/<sha256 앞 2자리>/<sha256>: 캐시 항목 (수정 시각 = 마지막 사용 시각)
+# - 전체 크기가 max_bytes를 넘으면 오래 쓰지 않은 항목부터 지움 (LRU)
+# 여러 프로그램 인스턴스가 같은 폴더를 함께 써도 안전하도록
+# 항목은 임시 파일에 쓴 뒤 이름을 바꾸고(원자적 교체), 정리는 잠금 파일을 얻은 인스턴스 하나만 합니다.
+# 저장할 때 sha256을 다시 계산해서 이름과 내용이 다른 항목은 캐시에 넣지 않습니다.
+# (Qt를 사용하지 않으므로 명령줄 도구에서도 사용할 수 있습니다.)
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+# 크기 상한을 넘으면 이 비율까지 줄임 (정리가 너무 자주 일어나지 않도록)
+EVICT_TARGET_RATIO = 0.9
+# 정리 잠금 파일이 이보다 오래되면 중단된 인스턴스가 남긴 것으로 보고 무시 (초)
+EVICT_LOCK_TIMEOUT = 60
+CACHE_LIMIT_ENV = 'SDC_LOGICCANVAS_CACHE_MB'
+
+
+def cache_limit_from_env(default=DEFAULT_MAX_BYTES):
+    """환경 변수(SDC_LOGICCANVAS_CACHE_MB)의 캐시 크기 상한(bytes), 없거나 잘못된 값이면 default"""
+    value = os.environ.get(CACHE_LIMIT_ENV, '').strip()
+    try:
+        return max(0, int(value)) * 1024 * 1024 if value else default
+    except ValueError:
+        print(f"⚠️ {CACHE_LIMIT_ENV} 값이 올바르지 않습니다: {value!r} (기본값 사용)")
+        return default
+
+
+class ExtractionCache:
+    """
+    sha256 -> 파일 내용 디스크 캐시
+    - fetch(sha, dest): 캐시에 있으면 dest로 복사하고 True
+    - store(sha, src): src 내용을 캐시에 추가 (내용의 sha256이 다르면 추가하지 않고 False)
+    - evict(): 크기 상한을 넘으면 오래 쓰지 않은 항목부터 삭제
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.max_bytes = max_bytes
+        self._approx_bytes = None  # 이 인스턴스가 추정한 전체 크기 (정리 시점 판단용)
+        self._lock = threading.Lock()
+
+    def object_path(self, sha):
+        return self.objects_dir / sha[:2] / sha
+
+    def _temp_path(self, target):
+        return target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.part")
+
+    def fetch(self, sha, dest_path):
+        """캐시 항목을 dest_path로 복사 (임시 파일에 쓴 뒤 이름 변경), 없으면 False"""
+        source = self.object_path(sha)
+        dest_path = Path(dest_path)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._temp_path(dest_path)
+        try:
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, dest_path)
+        except FileNotFoundError:
+            # 없거나 다른 인스턴스가 방금 정리함
+            return False
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        try:
+            os.utime(source)  # 마지막 사용 시각 갱신 (LRU)
+        except OSError:
+            pass
+        return True
+
+    def store(self, sha, src_path):
+        """src_path 내용을 캐시에 추가 (이미 있으면 사용 시각만 갱신)"""
+        target = self.object_path(sha)
+        if target.exists():
+            try:
+                os.utime(target)
+            except OSError:
+                pass
+            return True
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._temp_path(target)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(src_path, 'rb') as source, open(tmp_path, 'wb') as dest:
+                while True:
+                    chunk = source.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    dest.write(chunk)
+                    size += len(chunk)
+            if digest.hexdigest() != sha:
+                print(f"  ⚠️ 캐시에 넣지 않음 (sha256 불일치): {Path(src_path).name}")
+                return False
+            os.replace(tmp_path, target)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = self.usage()[1]
+            else:
+                self._approx_bytes += size
+            over = self._approx_bytes > self.max_bytes
+        if over:
+            self.evict()
+        return True
+
+    def _iter_objects(self):
+        if not self.objects_dir.is_dir():
+            return
+        for folder in self.objects_dir.iterdir():
+            if not folder.is_dir():
+                continue
+            for path in folder.iterdir():
+                if path.name.startswith('.'):
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def usage(self):
+        """(항목 수, 전체 크기 bytes)"""
+        count = 0
+        total = 0
+        for _path, size, _mtime in self._iter_objects():
+            count += 1
+            total += size
+        return count, total
+
+    def evict(self, max_bytes=None):
+        """
+        전체 크기가 max_bytes(기본: self.max_bytes)를 넘으면 오래 쓰지 않은 항목부터 삭제
+        반환값: (삭제한 항목 수, 삭제한 bytes) - 다른 인스턴스가 정리 중이면 (0, 0)
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        lock_path = self.root / 'evict.lock'
+        if not self._acquire(lock_path):
+            return 0, 0
+        removed = 0
+        removed_bytes = 0
+        try:
+            entries = sorted(self._iter_objects(), key=lambda entry: entry[2])
+            total = sum(size for _path, size, _mtime in entries)
+            if total > limit:
+                target = int(limit * EVICT_TARGET_RATIO)
+                for path, size, _mtime in entries:
+                    if total <= target:
+                        break
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+                    except OSError:
+                        # 다른 인스턴스가 복사 중이면(Windows) 건너뜀
+                        continue
+                    total -= size
+                    removed += 1
+                    removed_bytes += size
+            with self._lock:
+                self._approx_bytes = total
+        finally:
+            lock_path.unlink(missing_ok=True)
+        if removed:
+            print(f"  🧹 추출 캐시 정리: {removed}개 ({removed_bytes:,} bytes)")
+        return removed, removed_bytes
+
+    def _acquire(self, lock_path):
+        self.root.mkdir(parents=True, exist_ok=True)
+        for _ in range(2):
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - lock_path.stat().st_mtime < EVICT_LOCK_TIMEOUT:
+                        return False
+                    lock_path.unlink()
+                except FileNotFoundError:
+                    pass
+        return False
+
+    def clear(self):
+        """캐시 항목 모두 삭제, 삭제한 bytes 반환"""
+        return self.evict(max_bytes=0)[1]
@@ -0,0 +1,527 @@
+import os
+import json
+import hashlib
+import shutil
+import struct
+import tempfile
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - .flow 아카이브 입출력
+# ============================================
+# .flow 파일은 workflow.json + attachments/ 폴더를 묶은 ZIP입니다.
+# 이 모듈은 Qt 없이 아카이브를 읽고 쓰는 저수준 함수들을 모아둡니다.
+
+WORKFLOW_JSON_NAME = 'workflow.json'
+ATTACHMENTS_PREFIX = 'attachments/'
+FLOW_SUFFIXES = ('.flow', '.zip')
+
+# 스트리밍 저장 시 ZIP 항목에 한 번에 쓰는 최소 크기
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# 이미 압축된 형식 (다시 압축해도 줄지 않으므로 그대로 저장)
+STORED_SUFFIXES = frozenset({
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.heic',
+    '.pdf', '.zip', '.flow', '.7z', '.gz', '.bz2', '.xz', '.rar',
+    '.docx', '.xlsx', '.pptx', '.hwpx',
+    '.mp3', '.mp4', '.m4a', '.avi', '.mov', '.mkv', '.webm',
+})
+
+# 병렬 압축 시 작업 스레드가 압축 결과를 메모리에 두는 최대 크기 (넘으면 임시 파일로)
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# 압축 방식 이름 -> zipfile 상수
+CODECS = {
+    'stored': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
+
+def is_flow_archive(filename):
+    return str(filename).lower().endswith(FLOW_SUFFIXES)
+
+
+def read_workflow_json(zipf):
+    """열린 ZIP에서 workflow.json(없으면 첫 번째 .json)을 읽어 dict로 반환"""
+    names = zipf.namelist()
+    if WORKFLOW_JSON_NAME in names:
+        json_name = WORKFLOW_JSON_NAME
+    else:
+        # 하위 호환성: workflow.json이 없으면 첫 번째 JSON 파일 찾기
+        json_files = [f for f in names if f.endswith('.json')]
+        if not json_files:
+            raise ValueError("ZIP 파일에 JSON 파일이 없습니다.")
+        json_name = json_files[0]
+    with zipf.open(json_name) as f:
+        return json.load(f)
+
+
+class CompressionPolicy:
+    """
+    .flow 항목별 압축 방식 결정
+    - workflow.json: json_codec('deflate' 또는 'lzma') + json_level
+    - 첨부 파일: 이미 압축된 확장자는 저장만(STORED), 그 외에는 앞부분 샘플을
+      빠르게 압축해 보고 절감률이 min_saving 미만이면 STORED, 아니면 DEFLATE
+    어떤 조합으로 저장해도 zipfile이 그대로 읽으므로 불러오기 쪽은 변경이 없습니다.
+    """
+
+    def __init__(self, json_codec='deflate', json_level=6, attachment_level=6,
+                 sample_size=64 * 1024, min_saving=0.05, min_size=512):
+        if json_codec not in CODECS:
+            raise ValueError(f"지원하지 않는 압축 방식: {json_codec}")
+        self.json_codec = json_codec
+        self.json_level = json_level
+        self.attachment_level = attachment_level
+        self.sample_size = sample_size
+        self.min_saving = min_saving
+        self.min_size = min_size
+
+    def for_json(self):
+        """workflow.json용 (compress_type, compresslevel)"""
+        compress_type = CODECS[self.json_codec]
+        return compress_type, (self.json_level if compress_type == zipfile.ZIP_DEFLATED else None)
+
+    def for_attachment(self, file_path):
+        """디스크 파일용 (compress_type, compresslevel)"""
+        file_path = Path(file_path)
+        if file_path.suffix.lower() in STORED_SUFFIXES:
+            return zipfile.ZIP_STORED, None
+        with open(file_path, 'rb') as f:
+            sample = f.read(self.sample_size)
+        return self.for_sample(file_path.name, sample)
+
+    def for_sample(self, name, sample):
+        """파일 앞부분 샘플로 압축 여부 결정"""
+        if Path(name).suffix.lower() in STORED_SUFFIXES or len(sample) < self.min_size:
+            return zipfile.ZIP_STORED, None
+        compressed = len(zlib.compress(sample, 1))
+        if 1.0 - compressed / len(sample) < self.min_saving:
+            return zipfile.ZIP_STORED, None
+        return zipfile.ZIP_DEFLATED, self.attachment_level
+
+
+DEFAULT_COMPRESSION_POLICY = CompressionPolicy()
+
+
+def new_zip_info(arcname, compress_type, compresslevel=None):
+    """zipf.open(zinfo, 'w')용 ZipInfo (항목별 압축 방식 지정)"""
+    zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime(time.time())[:6])
+    zinfo.compress_type = compress_type
+    zinfo._compresslevel = compresslevel
+    zinfo.external_attr = 0o600 << 16
+    return zinfo
+
+
+def write_file_entry(zipf, file_path, arcname, policy=None):
+    """디스크 파일을 정책에 맞는 압축 방식으로 ZIP에 추가하고 (compress_type) 반환"""
+    policy = policy or DEFAULT_COMPRESSION_POLICY
+    compress_type, level = policy.for_attachment(file_path)
+    zipf.write(file_path, arcname, compress_type=compress_type, compresslevel=level)
+    return compress_type
+
+
+def copy_entry(src_zip, info, dst_zip, arcname=None, policy=None, digest=None):
+    """
+    다른 아카이브의 항목을 (필요하면 압축 방식을 바꿔) 스트리밍 복사
+    digest: hashlib 객체를 주면 복사한 (압축 해제된) 내용으로 갱신
+    """
+    policy = policy or DEFAULT_COMPRESSION_POLICY
+    with src_zip.open(info) as f_in:
+        sample = f_in.read(policy.sample_size)
+        compress_type, level = policy.for_sample(info.filename, sample)
+        zinfo = new_zip_info(arcname or info.filename, compress_type, level)
+        zinfo.date_time = info.date_time
+        # 원본 크기를 알려 주면 zipfile이 2GiB를 넘는 항목에 ZIP64 헤더를 씀
+        zinfo.file_size = info.file_size
+        with dst_zip.open(zinfo, 'w') as f_out:
+            chunk = sample
+            while chunk:
+                if digest is not None:
+                    digest.update(chunk)
+                f_out.write(chunk)
+                chunk = f_in.read(COPY_CHUNK_SIZE)
+    return compress_type
+
+
+def file_sha256(file_path):
+    """디스크 파일의 sha256 (hex)"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def entry_sha256(archive_path, info):
+    """아카이브 항목 내용의 sha256 (hex, 스트리밍으로 압축 해제)"""
+    digest = hashlib.sha256()
+    with zipfile.ZipFile(archive_path, 'r') as zipf:
+        with zipf.open(info) as f:
+            while True:
+                chunk = f.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compressed_sizes(archive_path, arcnames):
+    """아카이브 항목 arcname -> 압축된 크기 (항목을 빼면 실제로 줄어드는 용량, 아카이브에 없는 이름은 제외)"""
+    arcnames = set(arcnames)
+    if not arcnames:
+        return {}
+    with zipfile.ZipFile(archive_path, 'r') as zipf:
+        return {info.filename: info.compress_size for info in zipf.infolist() if info.filename in arcnames}
+
+
+def write_raw_entry(zipf, zinfo, payload):
+    """
+    이미 압축된 데이터를 ZIP 항목으로 기록
+    zinfo에는 compress_type, CRC, file_size, compress_size가 채워져 있어야 합니다.
+    (zipfile에는 압축된 바이트를 그대로 넣는 공개 API가 없어 ZipFile 내부 절차를 그대로 따릅니다)
+    """
+    with zipf._lock:
+        if zipf._writing:
+            raise ValueError("다른 ZIP 항목을 쓰는 중에는 기록할 수 없습니다.")
+        zinfo.flag_bits = 0x00
+        if zinfo.compress_type == zipfile.ZIP_LZMA:
+            zinfo.flag_bits |= 0x02  # LZMA EOS 마커 포함
+        if not zinfo.external_attr:
+            zinfo.external_attr = 0o600 << 16
+        if zipf._seekable:
+            zipf.fp.seek(zipf.start_dir)
+        zinfo.header_offset = zipf.fp.tell()
+        zipf._writecheck(zinfo)
+        zipf._didModify = True
+        zipf.fp.write(zinfo.FileHeader(None))
+        if isinstance(payload, (bytes, bytearray, memoryview)):
+            zipf.fp.write(payload)
+        else:
+            shutil.copyfileobj(payload, zipf.fp, COPY_CHUNK_SIZE)
+        zipf.start_dir = zipf.fp.tell()
+        zipf.filelist.append(zinfo)
+        zipf.NameToInfo[zinfo.filename] = zinfo
+
+
+class _RawEntryReader:
+    """ZIP 항목의 압축된 바이트를 그대로 읽는 파일 객체 (압축 해제 없음)"""
+
+    def __init__(self, archive_path, info):
+        self._fp = open(archive_path, 'rb')
+        try:
+            self._fp.seek(info.header_offset)
+            header = self._fp.read(30)
+            if len(header) != 30 or header[:4] != b'PK\x03\x04':
+                raise zipfile.BadZipFile(f"잘못된 로컬 헤더: {info.filename}")
+            name_len, extra_len = struct.unpack('<HH', header[26:30])
+            self._fp.seek(info.header_offset + 30 + name_len + extra_len)
+        except Exception:
+            self._fp.close()
+            raise
+        self._remaining = info.compress_size
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._fp.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def copy_raw_entry(archive_path, info, dst_zip, arcname=None):
+    """다른 .flow 파일의 항목을 압축된 바이트 그대로 복사 (재압축 없음)"""
+    zinfo = zipfile.ZipInfo(arcname or info.filename, date_time=info.date_time)
+    zinfo.compress_type = info.compress_type
+    zinfo.external_attr = info.external_attr
+    zinfo.CRC = info.CRC
+    zinfo.file_size = info.file_size
+    zinfo.compress_size = info.compress_size
+    with _RawEntryReader(archive_path, info) as reader:
+        write_raw_entry(dst_zip, zinfo, reader)
+    return zinfo
+
+
+def extract_entry(archive_path, arcname, dest_path):
+    """아카이브에서 항목 하나만 스트리밍으로 추출 (임시 파일에 쓴 뒤 이름 변경)"""
+    dest_path = Path(dest_path)
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest_path.with_name(f".{dest_path.name}.{os.getpid()}.part")
+    try:
+        with zipfile.ZipFile(archive_path, 'r') as zipf:
+            with zipf.open(arcname) as source, open(tmp_path, 'wb') as target:
+                shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+        os.replace(tmp_path, dest_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return dest_path
+
+
+def compress_file(file_path, arcname, policy=None, digest=None):
+    """
+    (작업 스레드용) 파일을 정책에 맞게 raw deflate로 압축
+    반환: (zinfo, payload) - STORED로 결정되면 payload는 None (호출 쪽에서 디스크에서 바로 기록)
+    zlib 압축/CRC 계산/해시는 GIL을 놓기 때문에 여러 스레드에서 동시에 진행됩니다.
+    digest: hashlib 객체를 주면 파일 내용으로 갱신 (STORED여도 이 스레드에서 읽어서 계산)
+    """
+    policy = policy or DEFAULT_COMPRESSION_POLICY
+    compress_type, level = policy.for_attachment(file_path)
+    zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+    zinfo.compress_type = compress_type
+    if compress_type == zipfile.ZIP_STORED:
+        if digest is not None:
+            with open(file_path, 'rb') as f:
+                while True:
+                    chunk = f.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+        return zinfo, None
+
+    compressor = zlib.compressobj(level if level is not None else 6, zlib.DEFLATED, -15)
+    payload = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    crc = 0
+    size = 0
+    try:
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+                payload.write(compressor.compress(chunk))
+        payload.write(compressor.flush())
+    except Exception:
+        payload.close()
+        raise
+    zinfo.CRC = crc
+    zinfo.file_size = size
+    zinfo.compress_size = payload.tell()
+    payload.seek(0)
+    return zinfo, payload
+
+
+def default_worker_count():
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+def write_file_entries(zipf, entries, policy=None, max_workers=None, progress=None, hashes=None):
+    """
+    (파일 경로, arcname) 목록을 ZIP에 추가
+    압축은 스레드 풀에서 병렬로 진행하고, 기록은 arcname 정렬 순서대로 하므로
+    결과 아카이브는 작업 스레드 수와 관계없이 항상 같은 순서가 됩니다.
+    동시에 진행 중인 작업은 max_workers * 2개로 제한하여 메모리 사용량을 묶어둡니다.
+    progress(done, total, arcname)가 주어지면 항목을 기록할 때마다 호출합니다.
+    hashes: dict를 주면 arcname -> 내용 sha256(hex)을 채움 (압축하면서 같은 스레드에서 계산)
+    반환: [(arcname, compress_type), ...]
+    """
+    policy = policy or DEFAULT_COMPRESSION_POLICY
+    entries = sorted(entries, key=lambda e: e[1])
+    total = len(entries)
+    results = []
+    max_workers = max_workers or default_worker_count()
+
+    if max_workers <= 1 or total < 2:
+        for done, (file_path, arcname) in enumerate(entries, 1):
+            if hashes is not None:
+                hashes[arcname] = file_sha256(file_path)
+            results.append((arcname, write_file_entry(zipf, file_path, arcname, policy)))
+            if progress:
+                progress(done, total, arcname)
+        return results
+
+    def compress(file_path, arcname):
+        digest = hashlib.sha256() if hashes is not None else None
+        zinfo, payload = compress_file(file_path, arcname, policy, digest=digest)
+        if digest is not None:
+            hashes[arcname] = digest.hexdigest()
+        return zinfo, payload
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='flow-compress') as pool:
+        pending = deque()
+        remaining = iter(entries)
+
+        def submit_next():
+            for file_path, arcname in remaining:
+                pending.append((pool.submit(compress, file_path, arcname), file_path, arcname))
+                return
+
+        for _ in range(max_workers * 2):
+            submit_next()
+        try:
+            while pending:
+                future, file_path, arcname = pending.popleft()
+                zinfo, payload = future.result()
+                if payload is None:
+                    zipf.write(file_path, arcname, compress_type=zipfile.ZIP_STORED)
+                else:
+                    try:
+                        write_raw_entry(zipf, zinfo, payload)
+                    finally:
+                        payload.close()
+                results.append((arcname, zinfo.compress_type))
+                if progress:
+                    progress(len(results), total, arcname)
+                submit_next()
+        finally:
+            for future, _path, _name in pending:
+                future.cancel()
+            for future, _path, _name in pending:
+                if not future.cancelled():
+                    try:
+                        _zinfo, payload = future.result()
+                        if payload is not None:
+                            payload.close()
+                    except Exception:
+                        pass
+    return results
+
+
+def iter_workflow_json(head, steps, tail=None, indent=2):
+    """
+    워크플로우 JSON을 문자열 조각으로 생성
+    - head: "steps" 앞에 올 최상위 키들 (workflow_name, description ...)
+    - steps: step dict를 하나씩 만들어 내는 iterable (리스트 전체를 들고 있지 않아도 됨)
+    - tail: "steps" 뒤에 올 최상위 키들
+    indent=2면 json.dumps(data, indent=2)와 같은 결과, indent=None이면 공백 없는 compact 형식
+    """
+    compact = indent is None
+    if compact:
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        key_sep, item_sep = ':', ','
+        open_obj, close_obj = '{', '}'
+        open_steps, close_steps, step_sep = '[', ']', ','
+        nest = top_nest = None
+    else:
+        encoder = json.JSONEncoder(ensure_ascii=False, indent=indent)
+        pad = ' ' * indent
+        key_sep, item_sep = ': ', ',\n' + pad
+        open_obj, close_obj = '{\n' + pad, '\n}'
+        open_steps, close_steps, step_sep = '[\n' + pad * 2, '\n' + pad + ']', ',\n' + pad * 2
+        # 깊이에 맞춰 내부 줄 들여쓰기 (JSON 문자열에는 날것의 줄바꿈이 없음)
+        top_nest = '\n' + pad
+        nest = '\n' + pad * 2
+
+    yield open_obj
+    for key, value in (head or {}).items():
+        yield encoder.encode(key) + key_sep + _indent_block(encoder.encode(value), top_nest) + item_sep
+
+    yield encoder.encode('steps') + key_sep
+    first = True
+    for step in steps:
+        if first:
+            yield open_steps
+            first = False
+        else:
+            yield step_sep
+        yield _indent_block(encoder.encode(step), nest)
+    yield '[]' if first else close_steps
+
+    for key, value in (tail or {}).items():
+        yield item_sep + encoder.encode(key) + key_sep + _indent_block(encoder.encode(value), top_nest)
+    yield close_obj
+
+
+def _indent_block(text, nest):
+    if nest is None or '\n' not in text:
+        return text
+    return text.replace('\n', nest)
+
+
+def write_workflow_json(fileobj, head, steps, tail=None, indent=2, digest=None):
+    """
+    바이너리 파일 객체에 워크플로우 JSON을 스트리밍으로 기록하고 step 개수 반환
+    digest: hashlib 객체를 주면 기록한 바이트로 갱신 (fileobj=None이면 해시만 계산)
+    """
+    counter = _CountingIter(steps)
+    buffer = []
+    buffered = 0
+    for chunk in iter_workflow_json(head, counter, tail=tail, indent=indent):
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= WRITE_BUFFER_SIZE:
+            _write_chunk(fileobj, ''.join(buffer).encode('utf-8'), digest)
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        _write_chunk(fileobj, ''.join(buffer).encode('utf-8'), digest)
+    return counter.count
+
+
+def _write_chunk(fileobj, data, digest):
+    if digest is not None:
+        digest.update(data)
+    if fileobj is not None:
+        fileobj.write(data)
+
+
+def workflow_json_digest(head, steps, tail=None, indent=2):
+    """압축 없이 워크플로우 JSON의 sha256만 계산 (변경 여부 확인용)"""
+    digest = hashlib.sha256()
+    write_workflow_json(None, head, steps, tail=tail, indent=indent, digest=digest)
+    return digest.hexdigest()
+
+
+def write_workflow_entry(zipf, head, steps, tail=None, indent=2, arcname=WORKFLOW_JSON_NAME, policy=None,
+                         digest=None):
+    """
+    ZIP 항목(workflow.json)에 step을 생성되는 대로 바로 압축하여 기록
+    (크기를 미리 알 수 없으므로 항상 ZIP64 헤더로 기록 - 2GiB를 넘어도 저장 가능)
+    """
+    compress_type, level = (policy or DEFAULT_COMPRESSION_POLICY).for_json()
+    with zipf.open(new_zip_info(arcname, compress_type, level), 'w', force_zip64=True) as entry:
+        return write_workflow_json(entry, head, steps, tail=tail, indent=indent, digest=digest)
+
+
+def iter_with_progress(iterable, total, progress=None, label='', every=256):
+    """every개마다 progress(done, total, label)를 호출하며 순회 (취소는 progress에서 예외로)"""
+    if progress is None:
+        yield from iterable
+        return
+    done = 0
+    for item in iterable:
+        yield item
+        done += 1
+        if done % every == 0 or done == total:
+            progress(done, total, label)
+
+
+class _CountingIter:
+    """iterable을 감싸서 꺼낸 항목 수를 셈"""
+
+    def __init__(self, iterable):
+        self._it = iter(iterable)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self._it)
+        self.count += 1
+        return item
@@ -0,0 +1,325 @@
+import os
+import time
+import hashlib
+import functools
+import multiprocessing
+from collections import Counter
+
+import numpy as np
+
+from dataset_export import _init_worker, discover_flows, file_stat
+from flow_model import open_flow
+from node_schema import CODECS_BY_STEP_TYPE, codec_for_step
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 거의 같은 flow 찾기 (WL 해시 + MinHash/LSH)
+# ============================================
+# 조금만 고친 복사본 flow가 학습 데이터에 여러 번 들어가지 않도록 비슷한 flow끼리 묶습니다.
+# - 노드 라벨: step 타입 + 스키마에 선언된 속성 값 (이름/위치는 제외, 공백/대소문자 정규화)
+# - Weisfeiler-Lehman: 라벨을 (자기 라벨, 나가는 연결(포트별) 라벨, 들어오는 연결 라벨)로 iterations번 갱신하고
+#   모든 단계의 라벨 다중집합을 특징(feature)으로 사용 -> 특징 전체의 해시 = 그래프 정규 해시 (같으면 완전 중복)
+# - MinHash(num_perm개)로 특징 집합의 Jaccard 유사도를 근사하고, LSH 밴딩(bands개)으로
+#   같은 버킷에 들어온 후보끼리만 비교하므로 모든 쌍을 비교하지 않습니다.
+# - 유사도가 threshold 이상인 flow를 묶고(Union-Find), 묶음마다 처음 나온 파일을 대표로 남깁니다.
+# (Qt를 사용하지 않으므로 명령줄 도구 / 데이터셋 내보내기에서도 사용할 수 있습니다.)
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16
+DEFAULT_WL_ITERATIONS = 2
+# 버킷 하나가 이보다 크면 모든 쌍 대신 버킷의 첫 flow와만 비교 (한 버킷에 몰려도 제곱 시간이 되지 않도록)
+MAX_BUCKET_PAIRWISE = 64
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# step 타입 -> 라벨에 넣을 필드 (스키마에서 JSON에 저장하는 속성)
+CONTENT_KEYS = {
+    step_type: tuple(p.key for p in codec.schema.props if p.stored)
+    for step_type, codec in CODECS_BY_STEP_TYPE.items()
+}
+
+
+def _short_hash(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _normalize(value):
+    return ' '.join(str(value).split()).lower()
+
+
+def step_content_label(step):
+    """step -> 타입 + 속성 값 문자열 (이름/위치/연결 제외)"""
+    codec = codec_for_step(step.get('type', ''))
+    step_type = codec.step_type if codec is not None else str(step.get('type', ''))
+    values = [_normalize(step.get(key) or '') for key in CONTENT_KEYS.get(step_type, ())]
+    return '\x1f'.join([step_type] + values)
+
+
+def wl_features(workflow_data, iterations=DEFAULT_WL_ITERATIONS):
+    """
+    워크플로우 dict -> (WL 특징 목록, 그래프 정규 해시)
+    특징은 'iteration:label:n' (같은 라벨이 n번째로 나옴) 형태라 다중집합의 Jaccard가 됩니다.
+    """
+    steps = [s for s in workflow_data.get('steps') or [] if isinstance(s, dict)]
+    index_of = {}
+    for step in steps:
+        try:
+            index_of.setdefault(step.get('id'), len(index_of))
+        except TypeError:
+            continue
+    labels = [None] * len(index_of)
+    outgoing = [[] for _ in index_of]
+    incoming = [[] for _ in index_of]
+    for step in steps:
+        try:
+            source = index_of.get(step.get('id'))
+        except TypeError:
+            continue
+        if source is None or labels[source] is not None:
+            continue
+        labels[source] = _short_hash(step_content_label(step))
+        for conn in step.get('connections') or []:
+            if not isinstance(conn, dict):
+                continue
+            try:
+                target = index_of.get(conn.get('to_node_step_id'))
+            except TypeError:
+                continue
+            if target is not None:
+                port = conn.get('from_port')
+                outgoing[source].append((port if type(port) is int else 0, target))
+                incoming[target].append(source)
+
+    features = []
+    for iteration in range(iterations + 1):
+        for label, count in Counter(labels).items():
+            features.extend(f"{iteration}:{label}:{n}" for n in range(count))
+        if iteration == iterations:
+            break
+        labels = [
+            _short_hash('|'.join((
+                labels[node],
+                ','.join(sorted(f"{port}>{labels[target]}" for port, target in outgoing[node])),
+                ','.join(sorted(labels[source] for source in incoming[node])),
+            )))
+            for node in range(len(labels))
+        ]
+    graph_hash = hashlib.sha256('\n'.join(sorted(features)).encode('utf-8')).hexdigest()
+    return features, graph_hash
+
+
+class MinHasher:
+    """특징 목록 -> MinHash 서명 (uint32 num_perm개), seed가 같으면 항상 같은 서명"""
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        # a * h가 uint64를 넘지 않도록 a < 2^31, h < 2^32
+        self.a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def signature(self, features):
+        if not features:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(f.encode('utf-8'), digest_size=4).digest(), 'little') for f in features),
+            dtype=np.uint64, count=len(features))
+        permuted = ((hashes[:, None] * self.a + self.b) % _MERSENNE_PRIME) & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+def estimate_similarity(sig_a, sig_b):
+    """두 MinHash 서명의 Jaccard 유사도 추정값 (0~1)"""
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+_hashers = {}
+
+
+def signature_flow_file(task, num_perm=DEFAULT_NUM_PERM, iterations=DEFAULT_WL_ITERATIONS):
+    """(작업 프로세스) .flow 하나 -> (키, 그래프 정규 해시, 서명 bytes, 오류 메시지 또는 None)"""
+    key, _source = task
+    hasher = _hashers.get(num_perm)
+    if hasher is None:
+        hasher = _hashers[num_perm] = MinHasher(num_perm)
+    try:
+        features, graph_hash = wl_features(open_flow(key).data, iterations)
+        return key, graph_hash, hasher.signature(features).tobytes(), None
+    except Exception as e:
+        return key, None, None, f"{type(e).__name__}: {e}"
+
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        # 번호가 작은(먼저 나온) 쪽이 대표
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+class FlowDeduplicator:
+    """
+    .flow 파일들 -> 거의 같은 flow 묶음
+    - threshold: 같은 묶음으로 볼 최소 유사도 (MinHash Jaccard 추정값)
+    - num_perm / bands: 서명 길이 / LSH 밴드 수 (num_perm이 bands로 나누어떨어져야 함)
+    - workers: 서명을 계산할 작업 프로세스 수 (기본: CPU 수)
+    - cache: dataset_export.ExportCache - 크기/수정 시각이 같은 파일은 저장된 서명 사용
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS,
+                 iterations=DEFAULT_WL_ITERATIONS, workers=None, progress=None, cache=None):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"유사도 기준은 0보다 크고 1 이하여야 합니다: {threshold}")
+        if num_perm % bands:
+            raise ValueError(f"서명 길이({num_perm})가 밴드 수({bands})로 나누어떨어지지 않습니다")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.iterations = iterations
+        self.workers = workers or os.cpu_count() or 1
+        self.progress = progress
+        self.cache = cache
+
+    @property
+    def cache_params(self):
+        return f"{self.num_perm}:{self.iterations}"
+
+    def _iter_results(self, tasks):
+        compute = functools.partial(signature_flow_file, num_perm=self.num_perm, iterations=self.iterations)
+        if self.workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                yield compute(task)
+            return
+        workers = min(self.workers, len(tasks))
+        chunksize = max(1, min(64, len(tasks) // (workers * 8)))
+        with multiprocessing.get_context().Pool(workers, initializer=_init_worker) as pool:
+            yield from pool.imap_unordered(compute, tasks, chunksize)
+
+    def signatures(self, tasks):
+        """[(키, source)] -> ({키: (그래프 해시, 서명)}, {키: 오류 메시지})"""
+        sources = dict(tasks)
+        results = {}
+        errors = {}
+        stats = {}
+        pending = []
+        for key, source in tasks:
+            stat = None
+            if self.cache is not None:
+                try:
+                    stat = file_stat(key)
+                except OSError:
+                    pass
+                cached = self.cache.signature_for(key, stat, self.cache_params) if stat else None
+                if cached:
+                    results[key] = (cached[0], np.frombuffer(cached[1], dtype=np.uint32))
+                    continue
+            stats[key] = stat
+            pending.append((key, source))
+        done = len(results)
+        for key, graph_hash, signature, error in self._iter_results(pending):
+            done += 1
+            if error:
+                errors[key] = error
+            else:
+                results[key] = (graph_hash, np.frombuffer(signature, dtype=np.uint32))
+                if self.cache is not None and stats.get(key):
+                    self.cache.remember_signature(key, stats[key], self.cache_params, graph_hash, signature)
+            if self.progress:
+                self.progress(done, len(tasks), sources[key])
+        return results, errors
+
+    def cluster(self, keys, signatures):
+        """
+        keys 순서(먼저 나온 파일이 대표)로 묶음 만들기
+        반환값: [[(키, 대표와의 유사도, 완전 중복 여부)...]] - 두 개 이상인 묶음만, 첫 항목이 대표
+        """
+        keys = [key for key in keys if key in signatures]
+        union = _UnionFind(len(keys))
+        # 1) 그래프 해시가 같으면 완전 중복
+        first_of_hash = {}
+        unique = []
+        for i, key in enumerate(keys):
+            graph_hash = signatures[key][0]
+            if graph_hash in first_of_hash:
+                union.union(first_of_hash[graph_hash], i)
+            else:
+                first_of_hash[graph_hash] = i
+                unique.append(i)
+        # 2) 나머지는 LSH 버킷에 함께 들어온 후보만 비교
+        rows = self.num_perm // self.bands
+        for band in range(self.bands):
+            buckets = {}
+            for i in unique:
+                chunk = signatures[keys[i]][1][band * rows:(band + 1) * rows].tobytes()
+                buckets.setdefault(chunk, []).append(i)
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                if len(members) <= MAX_BUCKET_PAIRWISE:
+                    pairs = ((a, b) for n, a in enumerate(members) for b in members[n + 1:])
+                else:
+                    pairs = ((members[0], b) for b in members[1:])
+                for a, b in pairs:
+                    if union.find(a) == union.find(b):
+                        continue
+                    if estimate_similarity(signatures[keys[a]][1], signatures[keys[b]][1]) >= self.threshold:
+                        union.union(a, b)
+
+        groups = {}
+        for i in range(len(keys)):
+            groups.setdefault(union.find(i), []).append(i)
+        clusters = []
+        for root, members in sorted(groups.items()):
+            if len(members) < 2:
+                continue
+            root_hash, root_signature = signatures[keys[root]]
+            clusters.append([
+                (keys[i], estimate_similarity(root_signature, signatures[keys[i]][1]),
+                 signatures[keys[i]][0] == root_hash)
+                for i in members
+            ])
+        return clusters
+
+    def run(self, roots):
+        """
+        roots 아래 .flow의 중복 보고서
+        반환값: {files, failed, duplicates, seconds, clusters: [{representative, members: [{source, similarity, exact}]}]}
+        """
+        started = time.monotonic()
+        tasks = discover_flows(roots)
+        sources = dict(tasks)
+        signatures, errors = self.signatures(tasks)
+        for key, error in errors.items():
+            print(f"  ❌ {sources[key]}: {error}")
+        clusters = self.cluster([key for key, _source in tasks], signatures)
+        return {
+            "files": len(tasks),
+            "failed": len(errors),
+            "duplicates": sum(len(members) - 1 for members in clusters),
+            "seconds": time.monotonic() - started,
+            "clusters": [
+                {
+                    "representative": sources[members[0][0]],
+                    "members": [{"source": sources[key], "similarity": round(similarity, 3), "exact": exact}
+                                for key, similarity, exact in members[1:]],
+                }
+                for members in clusters
+            ],
+        }
+
+
+def duplicate_keys(clusters):
+    """cluster() 결과 -> 대표가 아닌 파일 키 -> 대표 파일 키"""
+    return {key: members[0][0] for members in clusters for key, _similarity, _exact in members[1:]}
@@ -0,0 +1,245 @@
+import json
+import struct
+import zipfile
+import zlib
+from datetime import datetime
+
+from flow_archive import is_flow_archive, new_zip_info
+from node_schema import CODECS_BY_STEP_TYPE, new_used_items
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - .flow 요약(manifest.json)과 썸네일(thumbnail.png)
+# ============================================
+# .flow 안에 작은 요약 항목 두 개를 함께 저장합니다.
+# - manifest.json: 형식 버전, 노드 타입별 개수, 사용 항목(테이블/화면/로그/상황 유형),
+#                  첨부 파일 크기와 sha256, workflow.json의 sha256
+# - thumbnail.png: 노드 배치를 타입 색상 상자와 연결선으로 그린 미리보기
+# 파일 목록/라이브러리/CLI는 workflow.json을 풀지 않고 이 두 항목만 읽으면 됩니다.
+# 요약은 workflow.json을 기록하면서 흘러가는 step에서 함께 모으므로 step을 다시 순회하지 않습니다.
+# (Qt를 사용하지 않으므로 저장 작업 스레드와 명령줄 도구에서 모두 사용할 수 있습니다.)
+
+MANIFEST_NAME = 'manifest.json'
+THUMBNAIL_NAME = 'thumbnail.png'
+MANIFEST_FORMAT = 'sdc-logiccanvas-flow'
+MANIFEST_VERSION = 1
+
+# 썸네일 크기(px)와 캔버스 좌표 기준 노드 상자 크기
+THUMBNAIL_SIZE = (320, 200)
+THUMBNAIL_PADDING = 8
+NODE_BOX_SIZE = (240, 120)
+THUMBNAIL_BACKGROUND = (43, 43, 43)
+THUMBNAIL_EDGE_COLOR = (110, 110, 110)
+THUMBNAIL_DEFAULT_COLOR = (80, 80, 80)
+# 이보다 연결이 많으면 앞쪽 연결만 그림 (썸네일 생성 시간 상한)
+THUMBNAIL_EDGE_LIMIT = 20000
+
+
+class ManifestBuilder:
+    """
+    저장 중에 흘러가는 step에서 manifest 정보를 모음
+    - observe(steps): step을 그대로 내보내며 기록 (순회할 때마다 처음부터 다시 모음)
+    - build(...): manifest dict / render_thumbnail(): PNG 바이트
+    """
+
+    def __init__(self, header):
+        self.header = dict(header)
+        self.reset()
+
+    def reset(self):
+        self.step_count = 0
+        self.connection_count = 0
+        self.node_counts = {}
+        self.used_items = new_used_items()
+        self._boxes = []       # (x, y, color)
+        self._box_index = {}   # step id -> _boxes 인덱스
+        self._links = []       # (출발 _boxes 인덱스, 대상 step id)
+
+    def observe(self, steps):
+        self.reset()
+        for step in steps:
+            self._add(step)
+            yield step
+
+    def _add(self, step):
+        self.step_count += 1
+        step_type = step.get('type', '')
+        self.node_counts[step_type] = self.node_counts.get(step_type, 0) + 1
+        codec = CODECS_BY_STEP_TYPE.get(step_type)
+        if codec is not None:
+            codec.collect(step, self.used_items)
+        connections = step.get('connections') or []
+        self.connection_count += len(connections)
+
+        pos = step.get('position')
+        if not pos:
+            return
+        box = len(self._boxes)
+        color = codec.schema.color if codec is not None else THUMBNAIL_DEFAULT_COLOR
+        self._boxes.append((float(pos[0]), float(pos[1]), color))
+        self._box_index[step.get('id')] = box
+        for conn in connections:
+            self._links.append((box, conn.get('to_node_step_id')))
+
+    def build(self, workflow_sha256=None, attachments=None, thumbnail=None):
+        """
+        manifest dict 생성
+        attachments: arcname -> (크기, sha256) / thumbnail: 썸네일 항목 이름 (없으면 None)
+        """
+        attachments = attachments or {}
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            "format_version": MANIFEST_VERSION,
+            "saved_at": datetime.now().isoformat(timespec='seconds'),
+        }
+        manifest.update(self.header)
+        manifest.update({
+            "step_count": self.step_count,
+            "connection_count": self.connection_count,
+            "node_counts": dict(sorted(self.node_counts.items())),
+            "used_items": {key: sorted(values) for key, values in self.used_items.items()},
+            "workflow_sha256": workflow_sha256,
+            "attachment_count": len(attachments),
+            "attachment_bytes": sum(size for size, _sha in attachments.values()),
+            "attachments": {
+                arcname: {"size": size, "sha256": sha}
+                for arcname, (size, sha) in sorted(attachments.items())
+            },
+            "thumbnail": thumbnail,
+        })
+        return manifest
+
+    def render_thumbnail(self, size=THUMBNAIL_SIZE):
+        """노드 배치 미리보기 PNG 바이트 (위치 정보가 없으면 None)"""
+        if not self._boxes:
+            return None
+        edges = []
+        for src, to_step_id in self._links[:THUMBNAIL_EDGE_LIMIT]:
+            dst = self._box_index.get(to_step_id)
+            if dst is not None:
+                edges.append((src, dst))
+        return render_thumbnail(self._boxes, edges, size)
+
+
+def render_thumbnail(boxes, edges, size=THUMBNAIL_SIZE):
+    """(x, y, color) 상자 목록과 (출발, 대상) 인덱스 쌍으로 RGB PNG 생성"""
+    width, height = size
+    node_w, node_h = NODE_BOX_SIZE
+    min_x = min(b[0] for b in boxes)
+    min_y = min(b[1] for b in boxes)
+    span_x = max(b[0] for b in boxes) + node_w - min_x
+    span_y = max(b[1] for b in boxes) + node_h - min_y
+    pad = THUMBNAIL_PADDING
+    scale = min((width - 2 * pad) / span_x, (height - 2 * pad) / span_y)
+    # 가운데 정렬
+    off_x = pad + ((width - 2 * pad) - span_x * scale) / 2 - min_x * scale
+    off_y = pad + ((height - 2 * pad) - span_y * scale) / 2 - min_y * scale
+    box_w = max(2, int(node_w * scale))
+    box_h = max(2, int(node_h * scale))
+
+    pixels = bytearray(bytes(THUMBNAIL_BACKGROUND) * (width * height))
+    rects = []
+    for x, y, color in boxes:
+        x0 = min(max(int(x * scale + off_x), 0), width - 1)
+        y0 = min(max(int(y * scale + off_y), 0), height - 1)
+        rects.append((x0, y0, color))
+
+    # 연결선: 출발 노드 오른쪽 가운데 -> 대상 노드 왼쪽 가운데
+    edge_px = bytes(THUMBNAIL_EDGE_COLOR)
+    for src, dst in edges:
+        sx = min(rects[src][0] + box_w, width - 1)
+        sy = min(rects[src][1] + box_h // 2, height - 1)
+        tx = rects[dst][0]
+        ty = min(rects[dst][1] + box_h // 2, height - 1)
+        steps = max(abs(tx - sx), abs(ty - sy))
+        if steps == 0:
+            continue
+        for i in range(steps + 1):
+            offset = ((sy + (ty - sy) * i // steps) * width + sx + (tx - sx) * i // steps) * 3
+            pixels[offset:offset + 3] = edge_px
+
+    for x0, y0, color in rects:
+        x1 = min(x0 + box_w, width)
+        row = bytes(color) * (x1 - x0)
+        for y in range(y0, min(y0 + box_h, height)):
+            start = (y * width + x0) * 3
+            pixels[start:start + len(row)] = row
+    return encode_png(width, height, pixels)
+
+
+def encode_png(width, height, pixels):
+    """RGB 바이트 배열 -> PNG (필터 없음, zlib 압축)"""
+    stride = width * 3
+    raw = b''.join(b'\x00' + bytes(pixels[y * stride:(y + 1) * stride]) for y in range(height))
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(raw, 9)),
+        chunk(b'IEND', b''),
+    ))
+
+
+def write_manifest_entries(zipf, builder, workflow_sha256=None, attachments=None):
+    """thumbnail.png(있으면)와 manifest.json을 ZIP에 기록하고 manifest dict 반환"""
+    thumbnail = builder.render_thumbnail()
+    if thumbnail is not None:
+        # PNG는 이미 압축되어 있으므로 저장만
+        zipf.writestr(new_zip_info(THUMBNAIL_NAME, zipfile.ZIP_STORED), thumbnail)
+    manifest = builder.build(workflow_sha256, attachments, THUMBNAIL_NAME if thumbnail is not None else None)
+    payload = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+    zipf.writestr(new_zip_info(MANIFEST_NAME, zipfile.ZIP_DEFLATED, 6), payload)
+    return manifest
+
+
+def read_manifest(source):
+    """
+    .flow 파일(경로 또는 열린 ZipFile)의 manifest.json만 읽어 dict 반환
+    manifest가 없거나(이전 버전 파일) 읽을 수 없으면 None
+    """
+    if isinstance(source, zipfile.ZipFile):
+        return _read_manifest_entry(source)
+    if not is_flow_archive(source):
+        return None
+    try:
+        with zipfile.ZipFile(source, 'r') as zipf:
+            return _read_manifest_entry(zipf)
+    except (OSError, zipfile.BadZipFile):
+        return None
+
+
+def _read_manifest_entry(zipf):
+    try:
+        with zipf.open(MANIFEST_NAME) as f:
+            manifest = json.load(f)
+    except (KeyError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get('format') != MANIFEST_FORMAT:
+        return None
+    return manifest
+
+
+def read_thumbnail(path):
+    """.flow 파일의 thumbnail.png 바이트 (없으면 None)"""
+    try:
+        with zipfile.ZipFile(path, 'r') as zipf:
+            return zipf.read(THUMBNAIL_NAME)
+    except (KeyError, OSError, zipfile.BadZipFile):
+        return None
+
+
+def manifest_attachment_hashes(manifest, attachments):
+    """manifest의 첨부 sha256 중 아카이브의 실제 크기와 맞는 것만 arcname -> sha256으로 반환"""
+    hashes = {}
+    if not manifest:
+        return hashes
+    for arcname, entry in (manifest.get('attachments') or {}).items():
+        if not isinstance(entry, dict):
+            continue
+        sha = entry.get('sha256')
+        if sha and attachments.get(arcname) == entry.get('size'):
+            hashes[arcname] = sha
+    return hashes
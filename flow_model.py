@@ -0,0 +1,556 @@
+import os
+import json
+import hashlib
+import zipfile
+from pathlib import Path
+
+from attachment_store import attachment_key, referenced_keys
+
+from flow_archive import (
+    ATTACHMENTS_PREFIX,
+    FLOW_SUFFIXES,
+    WORKFLOW_JSON_NAME,
+    compressed_sizes,
+    copy_entry,
+    is_flow_archive,
+    read_workflow_json,
+    write_workflow_entry,
+    write_workflow_json,
+)
+from flow_manifest import ManifestBuilder, read_manifest, write_manifest_entries
+from node_schema import CODECS_BY_STEP_TYPE, NODE_SCHEMAS, codec_for_step, new_used_items
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - Qt 없는 워크플로우 모델
+# ============================================
+# PySide2 / NodeGraphQt 없이 .flow / JSON 파일을 읽고, 검증하고, 다시 저장하기 위한
+# 순수 파이썬 그래프 모델입니다. (CLI, 배치 변환, 분석 도구에서 사용)
+
+DEFAULT_WORKFLOW_NAME = "물류_반송_분석_가이드"
+DEFAULT_DESCRIPTION = "전문가 노하우를 구조화한 AI 학습용 워크플로우"
+
+# step type -> NodeGraphQt 노드 타입 / 출력·입력 포트 이름 (node_schema.py 선언에서 생성)
+NODE_TYPE_MAP = {schema.step_type: schema.node_type for schema in NODE_SCHEMAS}
+STEP_OUTPUT_PORTS = {schema.step_type: list(schema.outputs) for schema in NODE_SCHEMAS}
+STEP_INPUT_PORTS = {schema.step_type: list(schema.inputs) for schema in NODE_SCHEMAS}
+
+# step 공통 키 (나머지 키는 노드 타입별 속성으로 취급)
+STEP_CORE_KEYS = ('id', 'name', 'type', 'position', 'node_id', 'connections', 'attached_file')
+# 위치 제외 JSON(Export)에서 빠지는 키
+LAYOUT_KEYS = ('position', 'node_id')
+
+
+def resolve_step_type(type_str):
+    """저장된 type 문자열(짧은 이름 또는 전체 노드 타입)을 짧은 step type으로 변환"""
+    codec = codec_for_step(type_str)
+    return codec.step_type if codec else None
+
+
+def collect_used_items(steps, skip=()):
+    """
+    워크플로우 step 목록에서 사용된 테이블/화면/로그/상황 유형 추출
+    skip: 건너뛸 step 순번 (구조 검사에서 오류가 난 step)
+    """
+    used_items = new_used_items()
+    for idx, step in enumerate(steps):
+        if idx in skip or not isinstance(step, dict):
+            continue
+        step_type = step.get('type', '')
+        codec = CODECS_BY_STEP_TYPE.get(step_type) if type(step_type) is str else None
+        if codec is not None:
+            codec.collect(step, used_items)
+    return used_items
+
+
+# ---- 불러오기 전 구조 검사 ----
+
+# 검사에 쓰는 step type별 규칙: (출력 포트 수, 출력 포트 이름 집합, 문자열이어야 하는 필드)
+# 짧은 type과 전체 노드 타입 모두 키로 등록해 두어 step마다 dict 조회 한 번으로 끝냄
+# (스키마에 저장되는 속성은 모두 문자열 - 사용 항목 필드가 숫자/목록이면 목록 수집에서 오류가 남)
+_STEP_RULES = {}
+for _schema in NODE_SCHEMAS:
+    _STEP_RULES[_schema.step_type] = _STEP_RULES[_schema.node_type] = (
+        len(_schema.outputs), frozenset(_schema.outputs),
+        tuple(dict.fromkeys(key for p in _schema.props if p.stored for key in (p.key,) + p.aliases)),
+    )
+del _schema
+
+# 오류 메시지에 보여줄 최대 개수 (나머지는 개수만)
+VALIDATION_MESSAGE_LIMIT = 20
+
+
+class WorkflowValidationError(ValueError):
+    """workflow.json 구조 오류 (errors: 오류 메시지 전체 목록)"""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        lines = [f"워크플로우 구조 오류 {len(self.errors)}개"]
+        lines.extend(f"- {message}" for message in self.errors[:VALIDATION_MESSAGE_LIMIT])
+        if len(self.errors) > VALIDATION_MESSAGE_LIMIT:
+            lines.append(f"... 외 {len(self.errors) - VALIDATION_MESSAGE_LIMIT}개")
+        super().__init__("\n".join(lines))
+
+
+_MISSING = object()
+
+
+def validate_steps(steps, invalid=None):
+    """
+    step dict 목록의 구조 오류를 모두 찾아 반환 (노드를 만들기 전에 한 번에 검사)
+    - 알 수 없는 type, 중복/누락된 id, 잘못된 위치 정보, 잘못된 필드 형식(문자열 속성 포함)
+    - 존재하지 않는 대상 노드(to_node_step_id / to_node_id), 잘못된 출력 포트
+    메시지는 "step <id>: ..." 형식이며 id가 없으면 "#<순번>"을 씁니다.
+    invalid(set)가 주어지면 오류가 난 step의 순번(0부터)을 추가합니다.
+    (5,000 step 기준 수 ms - 정상 step에서는 dict 조회와 type 비교만 하도록 작성)
+    """
+    if not isinstance(steps, list):
+        return [f"steps가 목록이 아님 ({type(steps).__name__})"]
+    errors = []
+    rules = _STEP_RULES
+    missing = _MISSING
+    step_ids = set()
+    node_ids = set()
+    labels = []
+    # 1단계: id 수집 (앞쪽 step이 뒤쪽 step을 가리킬 수 있으므로 먼저 모음)
+    # bool은 int의 하위 클래스이므로 isinstance 대신 type()으로 비교
+    for idx, step in enumerate(steps):
+        if type(step) is not dict:
+            labels.append(None)
+            errors.append(f"step #{idx + 1}: step이 객체가 아님 ({type(step).__name__})")
+            if invalid is not None:
+                invalid.add(idx)
+            continue
+        step_id = step.get('id')
+        id_type = type(step_id)
+        if id_type is int or id_type is str:
+            labels.append(step_id)
+            if step_id in step_ids:
+                errors.append(f"step {step_id}: 중복된 id")
+                if invalid is not None:
+                    invalid.add(idx)
+            step_ids.add(step_id)
+        else:
+            labels.append(f"#{idx + 1}")
+            errors.append(f"step #{idx + 1}: id 없음" if step_id is None else f"step #{idx + 1}: 잘못된 id {step_id!r}")
+            if invalid is not None:
+                invalid.add(idx)
+        node_id = step.get('node_id')
+        if node_id and type(node_id) is str:
+            node_ids.add(node_id)
+
+    # 2단계: step별 검사
+    # (invalid: 이전 step을 검사하는 동안 오류 개수가 늘었으면 그 step의 순번을 기록)
+    error_count = len(errors)
+    for idx, (step, label) in enumerate(zip(steps, labels)):
+        if len(errors) != error_count:
+            error_count = len(errors)
+            if invalid is not None:
+                invalid.add(idx - 1)
+        if label is None:
+            continue
+        get = step.get
+        step_type = get('type')
+        rule = rules.get(step_type) if type(step_type) is str else None
+        if rule is None:
+            errors.append(f"step {label}: 알 수 없는 노드 타입 {step_type!r}")
+        else:
+            for key in rule[2]:
+                value = get(key)
+                if type(value) is not str and value is not None:
+                    errors.append(f"step {label}: 잘못된 {key} 값 {value!r} (문자열이어야 함)")
+        value = get('name', missing)
+        if value is not missing and type(value) is not str:
+            errors.append(f"step {label}: 잘못된 이름 {value!r}")
+        value = get('position', missing)
+        if value is not missing:
+            if type(value) is not list or len(value) < 2 \
+                    or (type(value[0]) is not float and type(value[0]) is not int) \
+                    or (type(value[1]) is not float and type(value[1]) is not int):
+                errors.append(f"step {label}: 잘못된 위치 정보 {value!r}")
+        value = get('attached_file', missing)
+        if value is not missing and type(value) is not str:
+            errors.append(f"step {label}: 잘못된 첨부 파일 경로 {value!r}")
+
+        connections = get('connections')
+        if not connections:
+            if connections is not None and type(connections) is not list:
+                errors.append(f"step {label}: connections가 목록이 아님 ({type(connections).__name__})")
+            continue
+        if type(connections) is not list:
+            errors.append(f"step {label}: connections가 목록이 아님 ({type(connections).__name__})")
+            continue
+        output_count, output_names = rule[:2] if rule else (0, ())
+        for conn in connections:
+            if type(conn) is not dict:
+                errors.append(f"step {label}: 잘못된 연결 {conn!r}")
+                continue
+            to_step_id = conn.get('to_node_step_id')
+            try:
+                found = to_step_id in step_ids and type(to_step_id) is not bool
+            except TypeError:  # 목록/객체 등 해시할 수 없는 값
+                found = False
+            if not found:
+                to_node_id = conn.get('to_node_id')
+                if type(to_node_id) is not str or to_node_id not in node_ids:
+                    errors.append(f"step {label}: 존재하지 않는 대상 노드 (to_node_step_id={to_step_id!r})")
+            if rule is None:
+                continue
+            from_port = conn.get('from_port', 0)
+            if type(from_port) is int and 0 <= from_port < output_count:
+                continue
+            port_name = conn.get('from_port_name')
+            if type(port_name) is str and port_name in output_names:
+                continue
+            if output_count:
+                errors.append(f"step {label}: 잘못된 출력 포트 {from_port!r}")
+            else:
+                errors.append(f"step {label}: 출력 포트가 없는 노드의 연결")
+    if invalid is not None and len(errors) != error_count:
+        invalid.add(len(labels) - 1)
+    return errors
+
+
+def validate_workflow_data(data, attachments=None, invalid=None):
+    """
+    workflow.json dict 전체 검사, 오류 메시지 목록 반환 (빈 리스트면 정상)
+    attachments(아카이브 첨부 목록)가 있으면 step이 가리키는 첨부 파일이 있는지도 확인합니다.
+    invalid: validate_steps()와 같음 (구조 오류가 난 step 순번)
+    """
+    if not isinstance(data, dict):
+        return ["워크플로우 JSON의 최상위 값이 객체가 아님"]
+    steps = data.get('steps', [])
+    errors = validate_steps(steps, invalid)
+    if attachments and isinstance(steps, list):
+        missing = {
+            step.get('attached_file') for step in steps
+            if isinstance(step, dict) and type(step.get('attached_file')) is str
+        }
+        for name in sorted(missing):
+            if name and name not in attachments:
+                errors.append(f"첨부 파일이 아카이브에 없음: {name}")
+    return errors
+
+
+class Connection:
+    """출력 포트 -> 대상 노드 입력 포트 연결"""
+
+    __slots__ = ('from_port', 'from_port_name', 'to_node_id', 'to_step_id')
+
+    def __init__(self, from_port=0, from_port_name='', to_node_id=None, to_step_id=None):
+        self.from_port = from_port
+        self.from_port_name = from_port_name
+        self.to_node_id = to_node_id
+        self.to_step_id = to_step_id
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            from_port=data.get('from_port', 0),
+            from_port_name=data.get('from_port_name', ''),
+            to_node_id=data.get('to_node_id'),
+            to_step_id=data.get('to_node_step_id'),
+        )
+
+    def to_dict(self):
+        return {
+            "from_port": self.from_port,
+            "from_port_name": self.from_port_name,
+            "to_node_id": self.to_node_id,
+            "to_node_step_id": self.to_step_id
+        }
+
+
+class Step:
+    """워크플로우의 단계(노드) 하나"""
+
+    def __init__(self, step_id, step_type, name='', node_id=None, position=None,
+                 fields=None, connections=None, attached_file=''):
+        self.id = step_id
+        self.type = step_type
+        self.name = name
+        self.node_id = node_id
+        self.position = position
+        self.fields = fields if fields is not None else {}
+        self.connections = connections if connections is not None else []
+        self.attached_file = attached_file
+
+    @classmethod
+    def from_dict(cls, data):
+        position = data.get('position')
+        connections = data.get('connections') or []
+        return cls(
+            step_id=data.get('id'),
+            step_type=data.get('type', ''),
+            name=data.get('name', ''),
+            node_id=data.get('node_id'),
+            position=list(position) if isinstance(position, (list, tuple)) else position,
+            fields={k: v for k, v in data.items() if k not in STEP_CORE_KEYS},
+            connections=[Connection.from_dict(c) for c in connections if isinstance(c, dict)],
+            attached_file=data.get('attached_file') or '',
+        )
+
+    def to_dict(self, include_layout=True):
+        """build_workflow_data()가 만드는 step dict와 같은 키 순서로 변환"""
+        step = {"id": self.id, "name": self.name, "type": self.type}
+        if include_layout:
+            step["position"] = self.position if self.position is not None else [0.0, 0.0]
+            step["node_id"] = self.node_id
+        step["connections"] = [c.to_dict() for c in self.connections]
+        if self.attached_file:
+            step['attached_file'] = self.attached_file
+        step.update(self.fields)
+        return step
+
+    @property
+    def output_ports(self):
+        return STEP_OUTPUT_PORTS.get(self.type, [])
+
+    @property
+    def input_ports(self):
+        return STEP_INPUT_PORTS.get(self.type, [])
+
+
+class FlowDocument:
+    """steps + connections + attachments로 구성된 워크플로우 문서"""
+
+    def __init__(self, workflow_name=DEFAULT_WORKFLOW_NAME, description=DEFAULT_DESCRIPTION,
+                 steps=None, attachments=None, extra=None, source_path=None):
+        self.workflow_name = workflow_name
+        self.description = description
+        self.steps = steps if steps is not None else []
+        # 아카이브 내 첨부 파일: 'attachments/...' 경로 -> 크기(bytes)
+        self.attachments = attachments if attachments is not None else {}
+        # 알 수 없는 최상위 키는 그대로 보존 (라운드트립용)
+        self.extra = extra if extra is not None else {}
+        self.source_path = source_path
+
+    @classmethod
+    def from_dict(cls, data, attachments=None, source_path=None):
+        if not isinstance(data, dict):
+            raise ValueError("워크플로우 JSON의 최상위 값은 객체여야 합니다.")
+        steps = data.get('steps') or []
+        return cls(
+            workflow_name=data.get('workflow_name', DEFAULT_WORKFLOW_NAME),
+            description=data.get('description', DEFAULT_DESCRIPTION),
+            steps=[Step.from_dict(s) for s in steps if isinstance(s, dict)],
+            attachments=attachments,
+            extra={k: v for k, v in data.items()
+                   if k not in ('workflow_name', 'description', 'steps', 'used_items')},
+            source_path=source_path,
+        )
+
+    def to_dict(self, include_layout=True):
+        data = self.header()
+        data["steps"] = [s.to_dict(include_layout=include_layout) for s in self.steps]
+        data.update(self.extra)
+        return data
+
+    def header(self):
+        """"steps" 앞에 오는 최상위 키"""
+        return {"workflow_name": self.workflow_name, "description": self.description}
+
+    def iter_step_dicts(self, include_layout=True):
+        """step dict를 하나씩 생성 (스트리밍 저장용)"""
+        for step in self.steps:
+            yield step.to_dict(include_layout=include_layout)
+
+    def to_plain_dict(self):
+        """위치 정보(position, node_id)를 제외한 dict (export_to_plain_json과 동일)"""
+        return self.to_dict(include_layout=False)
+
+    def step_by_id(self):
+        return {s.id: s for s in self.steps}
+
+    def iter_edges(self):
+        """(from_step, connection) 쌍을 순회"""
+        for step in self.steps:
+            for conn in step.connections:
+                yield step, conn
+
+    def used_items(self):
+        return collect_used_items(s.to_dict(include_layout=False) for s in self.steps)
+
+    def referenced_attachments(self):
+        return sorted({s.attached_file for s in self.steps if s.attached_file})
+
+    def unreferenced_attachments(self):
+        """어떤 step도 참조하지 않는 첨부 항목 -> 크기 (교체/삭제된 노드가 남긴 파일)"""
+        referenced = referenced_keys(s.attached_file for s in self.steps)
+        return {
+            arcname: size for arcname, size in self.attachments.items()
+            if attachment_key(arcname) not in referenced
+        }
+
+    def validate(self):
+        """구조 오류 목록 반환 (빈 리스트면 정상)"""
+        return validate_workflow_data(self.to_dict(), self.attachments)
+
+    def summary(self):
+        """노드/연결/첨부 통계 dict"""
+        type_counts = {}
+        for step in self.steps:
+            type_counts[step.type] = type_counts.get(step.type, 0) + 1
+        used = self.used_items()
+        return {
+            "workflow_name": self.workflow_name,
+            "steps": len(self.steps),
+            "connections": sum(len(s.connections) for s in self.steps),
+            "types": dict(sorted(type_counts.items())),
+            "attachments": len(self.attachments),
+            "attachment_bytes": sum(self.attachments.values()),
+            "used_items": {k: sorted(v) for k, v in used.items()},
+        }
+
+
+class OpenedFlow:
+    """
+    파일을 한 번 읽고 파싱한 결과 (열기 파이프라인 공용)
+    - data: workflow.json 원본 dict
+    - used_items: 사용된 테이블/화면/로그/상황 유형 (collect_used_items, 구조 오류가 난 step은 제외)
+    - attachments: 첨부 항목 이름 -> 크기 (ZIP 중앙 디렉터리에서 읽음, 압축 해제 없음)
+    - manifest: manifest.json dict (이전 버전 파일이거나 JSON 파일이면 None)
+    """
+
+    __slots__ = ('path', 'data', 'used_items', 'attachments', 'manifest', '_errors')
+
+    def __init__(self, path, data, used_items, attachments, manifest=None, errors=None):
+        self.path = path
+        self.data = data
+        self.used_items = used_items
+        self.attachments = attachments
+        self.manifest = manifest
+        self._errors = errors
+
+    def validate(self):
+        """구조 오류 목록 (validate_workflow_data, 한 번만 검사하고 결과 보관)"""
+        if self._errors is None:
+            self._errors = validate_workflow_data(self.data, self.attachments)
+        return self._errors
+
+    def check(self):
+        """구조 오류가 있으면 WorkflowValidationError 발생"""
+        errors = self.validate()
+        if errors:
+            raise WorkflowValidationError(errors)
+
+    @property
+    def steps(self):
+        return self.data.get('steps', [])
+
+    def document(self):
+        return FlowDocument.from_dict(self.data, attachments=self.attachments, source_path=self.path)
+
+
+def open_flow(filename, progress=None, validate=False):
+    """
+    .flow/.zip/.json 파일을 한 번만 읽어 OpenedFlow 반환 (Qt 불필요, 작업 스레드에서 실행 가능)
+    progress(done, total, label)가 주어지면 읽기 전후로 호출합니다.
+    validate=True면 구조 오류가 있을 때 WorkflowValidationError를 발생시킵니다.
+    """
+    filename = str(filename)
+    if progress:
+        progress(0, 0, f"{Path(filename).name} 읽는 중")
+    attachments = {}
+    manifest = None
+    if is_flow_archive(filename):
+        with zipfile.ZipFile(filename, 'r') as zipf:
+            data = read_workflow_json(zipf)
+            attachments = {
+                info.filename: info.file_size
+                for info in zipf.infolist()
+                if info.filename.startswith(ATTACHMENTS_PREFIX) and not info.filename.endswith('/')
+            }
+            manifest = read_manifest(zipf)
+    else:
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    steps = data.get('steps') if isinstance(data, dict) else None
+    # 사용 항목을 모으기 전에 구조부터 검사 (형식이 잘못된 step은 사용 항목에서 제외하고 오류로만 보고)
+    invalid = set()
+    errors = validate_workflow_data(data, attachments, invalid=invalid)
+    used_items = collect_used_items(steps if isinstance(steps, list) else [], skip=invalid)
+    opened = OpenedFlow(filename, data, used_items, attachments, manifest, errors=errors)
+    if validate:
+        opened.check()
+    if progress:
+        progress(1, 1, f"{len(opened.steps)}개 단계 읽음")
+    return opened
+
+
+def load_flow(filename):
+    """.flow/.zip/.json 파일을 FlowDocument로 읽기 (Qt 불필요)"""
+    return open_flow(filename).document()
+
+
+def save_flow(doc, filename, plain=False, indent=2, policy=None, keep_unreferenced=False):
+    """
+    FlowDocument 저장
+    - .flow/.zip: workflow.json + 원본 아카이브의 attachments/ 항목 (policy: 항목별 압축 방식)
+                  + manifest.json / thumbnail.png
+                  (keep_unreferenced=False면 어떤 step도 참조하지 않는 첨부는 제외)
+    - 그 외: JSON 단독 (plain=True면 위치 정보 제외)
+    """
+    filename = str(filename)
+    steps = doc.iter_step_dicts(include_layout=not plain)
+    if not is_flow_archive(filename):
+        with open(filename, 'wb') as f:
+            write_workflow_json(f, doc.header(), steps, tail=doc.extra, indent=indent)
+        return filename
+
+    source = doc.source_path if doc.source_path and is_flow_archive(doc.source_path) else None
+    if source and Path(source).resolve() == Path(filename).resolve():
+        raise ValueError("원본 .flow 파일에 덮어쓸 수 없습니다. 다른 파일명을 지정하세요.")
+    manifest = ManifestBuilder(doc.header())
+    with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        digest = hashlib.sha256()
+        write_workflow_entry(zipf, doc.header(), manifest.observe(steps), tail=doc.extra, indent=indent,
+                             policy=policy, digest=digest)
+        attachments = {}
+        if source:
+            dropped = {} if keep_unreferenced else doc.unreferenced_attachments()
+            with zipfile.ZipFile(source, 'r') as src:
+                for info in src.infolist():
+                    if info.filename in doc.attachments and info.filename not in dropped:
+                        content_digest = hashlib.sha256()
+                        copy_entry(src, info, zipf, policy=policy, digest=content_digest)
+                        attachments[info.filename] = (info.file_size, content_digest.hexdigest())
+        write_manifest_entries(zipf, manifest, digest.hexdigest(), attachments)
+    return filename
+
+
+def compact_flow(filename, target=None, policy=None):
+    """
+    참조하지 않는 첨부 파일을 뺀 .flow로 다시 저장 (target이 없으면 같은 파일을 교체)
+    다시 저장하면 manifest.json / thumbnail.png가 더해지므로, 같은 파일을 교체할 때
+    결과가 원본보다 작지 않으면 교체하지 않습니다.
+    반환값: {'removed': arcname -> 크기, 'reclaimed': 뺀 첨부의 압축된 크기 합,
+             'before': 원본 크기, 'after': 결과 크기, 'size_change': after - before, 'replaced': 파일을 썼는지}
+    """
+    source = Path(filename)
+    if not is_flow_archive(source):
+        raise ValueError(f"첨부 파일 정리는 .flow/.zip 파일만 가능합니다: {source}")
+    doc = load_flow(source)
+    removed = doc.unreferenced_attachments()
+    before = source.stat().st_size
+    result = {'removed': removed, 'reclaimed': 0, 'before': before, 'after': before, 'size_change': 0,
+              'replaced': False}
+    if not removed and not target:
+        # 제거할 항목이 없으면 파일을 다시 쓰지 않음
+        return result
+    # 교체하기 전에 원본에서 뺄 첨부의 압축된 크기를 읽어 둠
+    reclaimed = sum(compressed_sizes(source, removed).values())
+    output = Path(target) if target else source.with_name(f"{source.stem}.compacting{source.suffix}")
+    try:
+        save_flow(doc, output, policy=policy)
+        after = output.stat().st_size
+        if not target:
+            if after >= before:
+                return result
+            os.replace(output, source)
+            output = source
+    finally:
+        if not target and output != source and output.exists():
+            output.unlink()
+    result.update(reclaimed=reclaimed, after=after, size_change=after - before, replaced=True)
+    return result
@@ -0,0 +1,173 @@
+import threading
+import traceback
+
+from PySide2 import QtCore, QtWidgets
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 백그라운드 작업 (저장/불러오기)
+# ============================================
+# ZIP 압축/해제, JSON 직렬화/파싱처럼 오래 걸리는 단계를 QThreadPool에서 실행하고
+# 진행률 대화상자와 취소 버튼을 제공합니다.
+# 작업 함수는 task 하나를 인자로 받으며, 진행 상황은 task.report(done, total, label)로 알립니다.
+# 취소되면 다음 report() 호출에서 TaskCanceled가 발생하여 작업이 중단됩니다.
+# (그래프/위젯은 작업 스레드에서 건드리지 말고, 완료 콜백에서만 다룹니다.)
+
+
+class TaskCanceled(Exception):
+    """사용자가 진행률 대화상자에서 취소함"""
+
+
+class FlowTaskSignals(QtCore.QObject):
+    progress = QtCore.Signal(int, int, str)
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+    canceled = QtCore.Signal()
+
+
+class FlowTask(QtCore.QRunnable):
+    """fn(task)를 작업 스레드에서 실행하고 결과를 시그널로 GUI 스레드에 전달"""
+
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+        self.signals = FlowTaskSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def is_canceled(self):
+        return self._cancel_event.is_set()
+
+    def check_canceled(self):
+        if self._cancel_event.is_set():
+            raise TaskCanceled()
+
+    def report(self, done, total, label=''):
+        """진행 상황 전달 (취소되었으면 TaskCanceled 발생)"""
+        self.check_canceled()
+        self.signals.progress.emit(int(done), int(total), str(label))
+
+    def run(self):
+        try:
+            result = self.fn(self)
+        except TaskCanceled:
+            self.signals.canceled.emit()
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+
+# 실행 중인 작업 (끝나기 전에 가비지 컬렉션되지 않도록 보관)
+_active_tasks = set()
+# 진행률 대화상자를 띄운 작업 (저장/열기/색인은 한 번에 하나만)
+_flow_tasks = set()
+
+# 작업이 이보다 오래 걸릴 때만 진행률 대화상자를 띄움
+PROGRESS_MIN_DURATION_MS = 300
+
+
+def is_flow_task_running():
+    return bool(_flow_tasks)
+
+
+def run_flow_task(parent, title, fn, on_finished, on_failed=None, on_canceled=None):
+    """
+    fn(task)를 백그라운드에서 실행하며 모달 진행률 대화상자 표시
+    - on_finished(result) / on_failed(message) / on_canceled()는 GUI 스레드에서 호출됨
+    - 대화상자는 PROGRESS_MIN_DURATION_MS가 지나야 뜨므로 그 전까지는 입력이 막히지 않습니다.
+      대신 run_flow_task 작업이 실행 중이면 새 작업은 시작하지 않고 안내만 합니다 (반환값 None).
+      (같은 파일을 두 번 저장하거나, 저장 중에 다른 파일을 여는 것을 막음)
+    """
+    if _flow_tasks:
+        print(f"⚠️ 다른 작업이 진행 중이라 시작하지 않음: {title}")
+        QtWidgets.QMessageBox.information(
+            parent, title, "다른 작업(저장/불러오기/색인)이 진행 중입니다.\n끝난 뒤에 다시 시도하세요."
+        )
+        return None
+
+    dialog = QtWidgets.QProgressDialog(title, '취소', 0, 0, parent)
+    dialog.setWindowTitle(title)
+    dialog.setWindowModality(QtCore.Qt.WindowModal)
+    dialog.setMinimumDuration(PROGRESS_MIN_DURATION_MS)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+    dialog.setValue(0)
+
+    task = FlowTask(fn)
+    task.setAutoDelete(False)
+    _active_tasks.add(task)
+    _flow_tasks.add(task)
+
+    def on_progress(done, total, label):
+        if total > 0:
+            dialog.setMaximum(total)
+            dialog.setValue(min(done, total))
+        else:
+            dialog.setMaximum(0)
+        if label:
+            dialog.setLabelText(f"{title}\n{label}")
+
+    def finish():
+        _active_tasks.discard(task)
+        _flow_tasks.discard(task)
+        dialog.close()
+        dialog.deleteLater()
+
+    def handle_finished(result):
+        finish()
+        on_finished(result)
+
+    def handle_failed(message):
+        finish()
+        if on_failed:
+            on_failed(message)
+        else:
+            QtWidgets.QMessageBox.critical(parent, f"{title} 오류 ❌", message)
+
+    def handle_canceled():
+        finish()
+        print(f"⏹️ {title} 취소됨")
+        if on_canceled:
+            on_canceled()
+
+    dialog.canceled.connect(task.cancel)
+    task.signals.progress.connect(on_progress)
+    task.signals.finished.connect(handle_finished)
+    task.signals.failed.connect(handle_failed)
+    task.signals.canceled.connect(handle_canceled)
+
+    QtCore.QThreadPool.globalInstance().start(task)
+    return task
+
+
+def run_background_task(fn, on_finished, on_failed=None):
+    """
+    fn(task)를 진행률 대화상자 없이 백그라운드에서 실행 (폴더 감시 색인처럼 편집을 막지 않아야 하는 작업)
+    - on_finished(result) / on_failed(message)는 GUI 스레드에서 호출됨, 취소하려면 반환된 task.cancel()
+    """
+    task = FlowTask(fn)
+    task.setAutoDelete(False)
+    _active_tasks.add(task)
+
+    def handle_finished(result):
+        _active_tasks.discard(task)
+        on_finished(result)
+
+    def handle_failed(message):
+        _active_tasks.discard(task)
+        if on_failed:
+            on_failed(message)
+        else:
+            print(f"❌ 백그라운드 작업 오류: {message}")
+
+    task.signals.finished.connect(handle_finished)
+    task.signals.failed.connect(handle_failed)
+    task.signals.canceled.connect(lambda: _active_tasks.discard(task))
+
+    QtCore.QThreadPool.globalInstance().start(task)
+    return task
@@ -0,0 +1,159 @@
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 대량 노드 생성 (불러오기 / 붙여넣기)
+# ============================================
+# 노드를 하나씩 create_node / set_property / connect_to 하면 호출마다
+# Undo 명령 추가, 시그널 발생, 화면 갱신이 일어납니다.
+# BulkConstruction 안에서는 뷰포트 갱신, 씬 인덱스, 그래프 시그널, Undo 기록을 잠시 멈추고
+# 블록이 끝날 때 한 번만 다시 그립니다.
+#
+#   with BulkConstruction(graph) as bulk:          # 불러오기: Undo 기록 없음 (끝나면 Undo 스택 비움)
+#       node = bulk.create_node(node_type, name, pos)
+#       bulk.set_property(node, 'condition', '...')
+#       bulk.connect(out_port, in_port)
+#
+#   with BulkConstruction(graph, undo_label='붙여넣기') as bulk:   # 붙여넣기: Undo 한 번으로 묶음
+#
+# 그래프 시그널이 막혀 있으므로 변경 추적/편집 저널은 블록이 끝난 뒤 호출 쪽에서 갱신해야 합니다.
+# (Qt를 직접 import하지 않으며, NodeGraphQt 그래프/노드 API만 사용합니다.)
+
+
+class BulkConstruction:
+    """
+    그래프 대량 생성 컨텍스트
+    - enabled=False면 기존과 같이 호출마다 Undo/시그널/갱신 (벤치마크 비교용)
+    - undo_label이 있으면 Undo 한 단계(매크로)로 묶고, 없으면 Undo를 기록하지 않음
+    """
+
+    def __init__(self, graph, undo_label=None, enabled=True):
+        self.graph = graph
+        self.enabled = enabled
+        self.undo_label = undo_label
+        self.push_undo = (not enabled) or undo_label is not None
+        self._viewer = None
+        self._scene = None
+        self._index_method = None
+        self._signals_blocked = False
+        self._undo_open = False
+        self._plain_calls = set()  # push_undo 등 키워드를 지원하지 않는 API (구버전)
+
+    # ---- 컨텍스트 ----
+
+    def __enter__(self):
+        if not self.enabled:
+            return self
+        try:
+            self._viewer = self.graph.viewer()
+            self._viewer.setUpdatesEnabled(False)
+        except Exception:
+            self._viewer = None
+        try:
+            self._scene = self._viewer.scene() if self._viewer is not None else None
+            no_index = getattr(self._scene, 'NoIndex', None)
+            if no_index is not None:
+                # 아이템을 대량으로 추가하는 동안 BSP 인덱스 재구성 생략
+                self._index_method = self._scene.itemIndexMethod()
+                self._scene.setItemIndexMethod(no_index)
+        except Exception:
+            self._index_method = None
+        try:
+            self._signals_blocked = self.graph.blockSignals(True)
+        except Exception:
+            self._signals_blocked = None
+        if self.undo_label is not None:
+            try:
+                self.graph.begin_undo(self.undo_label)
+                self._undo_open = True
+            except Exception:
+                self._undo_open = False
+        return self
+
+    def __exit__(self, *exc):
+        if not self.enabled:
+            return False
+        if self._undo_open:
+            try:
+                self.graph.end_undo()
+            except Exception:
+                pass
+        elif self.undo_label is None:
+            # Undo를 기록하지 않았으므로 이전 명령은 더 이상 현재 노드와 맞지 않음
+            try:
+                self.graph.clear_undo_stack()
+            except Exception:
+                try:
+                    self.graph.undo_stack().clear()
+                except Exception:
+                    pass
+        if self._signals_blocked is not None:
+            try:
+                self.graph.blockSignals(self._signals_blocked)
+            except Exception:
+                pass
+        if self._index_method is not None:
+            try:
+                self._scene.setItemIndexMethod(self._index_method)
+            except Exception:
+                pass
+        if self._viewer is not None:
+            try:
+                self._viewer.setUpdatesEnabled(True)
+                if self._scene is not None:
+                    self._scene.update()
+                self._viewer.viewport().update()
+            except Exception:
+                pass
+        return False
+
+    # ---- 그래프 조작 ----
+
+    def _call(self, key, fn, *args, **options):
+        """키워드 옵션(push_undo 등)을 지원하지 않는 버전이면 옵션 없이 다시 호출"""
+        if options and key not in self._plain_calls:
+            try:
+                return fn(*args, **options)
+            except TypeError:
+                self._plain_calls.add(key)
+        return fn(*args)
+
+    def clear(self):
+        """기존 노드 모두 삭제"""
+        if self.enabled and self.undo_label is None:
+            try:
+                self.graph.clear_session()
+                return
+            except Exception:
+                pass
+        for node in self.graph.all_nodes():
+            self._call('delete_node', self.graph.delete_node, node, push_undo=self.push_undo)
+
+    def create_node(self, node_type, name, pos):
+        if not self.enabled:
+            return self.graph.create_node(node_type, name=name, pos=pos)
+        key = 'create_node'
+        if key not in self._plain_calls:
+            try:
+                return self.graph.create_node(
+                    node_type, name=name, pos=pos, selected=False, push_undo=self.push_undo
+                )
+            except TypeError:
+                self._plain_calls.add(key)
+        return self.graph.create_node(node_type, name=name, pos=pos)
+
+    def set_property(self, node, prop_name, value):
+        if not self.enabled:
+            return node.set_property(prop_name, value)
+        return self._call('set_property', node.set_property, prop_name, value, push_undo=self.push_undo)
+
+    def set_position(self, node, x, y):
+        if not self.enabled:
+            try:
+                return self.graph.set_node_pos(node, x, y)
+            except Exception:
+                return node.set_pos(x, y)
+        return self.set_property(node, 'pos', [float(x), float(y)])
+
+    def connect(self, out_port, in_port):
+        if not self.enabled:
+            return out_port.connect_to(in_port)
+        return self._call('connect_to', out_port.connect_to, in_port,
+                          push_undo=self.push_undo, emit_signal=False)
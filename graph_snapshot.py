@@ -0,0 +1,219 @@
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 그래프 스냅샷 (인덱스)
+# ============================================
+# graph.all_nodes()를 한 번만 순회하여 노드 배열, id -> 인덱스 맵,
+# 포트별 인접 리스트, 타입 인덱스를 만들어 둡니다.
+# 내보내기 / 복사 / Fit to View / 검사는 모두 이 스냅샷을 사용하므로
+# 연결 해석이 O(N·E)가 아닌 O(N + E)로 끝납니다.
+# (Qt를 직접 import하지 않으며, NodeGraphQt 노드 API만 사용합니다.)
+
+
+def node_display_name(node):
+    """node.name이 속성/메서드인 경우 모두 처리"""
+    name = node.name
+    if isinstance(name, str):
+        return name
+    return name() if callable(name) else str(name)
+
+
+def read_node_position(graph, node):
+    """노드 위치 [x, y] 반환 (버전별 API 차이를 순서대로 시도, 실패 시 None)"""
+    # 방법 1: 그래프에서 직접 위치 가져오기
+    try:
+        pos = graph.get_node_pos(node)
+        if pos and len(pos) >= 2:
+            return [float(pos[0]), float(pos[1])]
+    except Exception:
+        pass
+    # 방법 2: 노드의 pos 속성/메서드
+    try:
+        pos = node.pos
+        if callable(pos):
+            pos = pos()
+        if isinstance(pos, (list, tuple)) and len(pos) >= 2:
+            return [float(pos[0]), float(pos[1])]
+    except Exception:
+        pass
+    # 방법 3: x_pos, y_pos 속성/메서드
+    try:
+        if callable(node.x_pos):
+            return [float(node.x_pos()), float(node.y_pos())]
+        return [float(node.x_pos), float(node.y_pos)]
+    except Exception:
+        pass
+    # 방법 4: 그래픽 아이템 직접 접근
+    try:
+        item = node.graphics_item()
+        if item:
+            pos = item.pos()
+            return [float(pos.x()), float(pos.y())]
+    except Exception:
+        pass
+    return None
+
+
+def read_node_properties(node, extra_names=()):
+    """노드의 사용자 정의 속성 dict (위젯 값 포함)"""
+    props = {}
+    model = getattr(node, 'model', None)
+    custom = getattr(model, 'custom_properties', None)
+    if isinstance(custom, dict):
+        props.update(custom)
+    else:
+        try:
+            for prop_name, prop_value in getattr(node, '_properties', {}).items():
+                if hasattr(prop_value, 'value'):
+                    props[prop_name] = prop_value.value
+                elif hasattr(prop_value, 'get_value'):
+                    props[prop_name] = prop_value.get_value()
+                else:
+                    props[prop_name] = prop_value
+        except Exception:
+            pass
+    for prop_name in extra_names:
+        if prop_name in props:
+            continue
+        try:
+            value = node.get_property(prop_name)
+            if value is not None:
+                props[prop_name] = value
+        except Exception:
+            pass
+    return props
+
+
+class GraphSnapshot:
+    """
+    그래프의 불변 스냅샷
+    - nodes / ids / names / types / positions / properties / selected: 인덱스 정렬 배열
+    - index: node.id -> 인덱스
+    - outputs[i][p]: i번 노드 p번 출력 포트에 연결된 (대상 인덱스, 대상 입력 포트 인덱스) 목록
+    - inputs[i][p]: i번 노드 p번 입력 포트에 연결된 (출발 인덱스, 출발 출력 포트 인덱스) 목록
+    - by_type: 노드 타입 -> 인덱스 목록
+    """
+
+    __slots__ = ('nodes', 'ids', 'names', 'types', 'positions', 'properties', 'attachments',
+                 'selected', 'output_names', 'input_names', 'outputs', 'inputs', 'index', 'by_type')
+
+    def __init__(self):
+        self.nodes = []
+        self.ids = []
+        self.names = []
+        self.types = []
+        self.positions = []
+        self.properties = []
+        self.attachments = []
+        self.selected = []
+        self.output_names = []
+        self.input_names = []
+        self.outputs = []
+        self.inputs = []
+        self.index = {}
+        self.by_type = {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def edge_count(self):
+        return sum(len(targets) for ports in self.outputs for targets in ports)
+
+    def iter_edges(self):
+        """(출발 인덱스, 출력 포트, 대상 인덱스, 입력 포트) 순회"""
+        for src, ports in enumerate(self.outputs):
+            for port_idx, targets in enumerate(ports):
+                for dst, dst_port in targets:
+                    yield src, port_idx, dst, dst_port
+
+    def indices_of_type(self, type_suffix):
+        """'DecisionNode' 처럼 클래스 이름으로 인덱스 목록 조회"""
+        result = []
+        for node_type, indices in self.by_type.items():
+            if node_type.rsplit('.', 1)[-1] == type_suffix:
+                result.extend(indices)
+        return sorted(result)
+
+    def selected_indices(self):
+        return [i for i, flag in enumerate(self.selected) if flag]
+
+    def bounds(self, node_width=200, node_height=150):
+        """모든 노드를 감싸는 (min_x, min_y, max_x, max_y), 위치를 모르면 None"""
+        known = [p for p in self.positions if p is not None]
+        if not known:
+            return None
+        half_w = node_width / 2
+        half_h = node_height / 2
+        return (
+            min(p[0] for p in known) - half_w,
+            min(p[1] for p in known) - half_h,
+            max(p[0] for p in known) + half_w,
+            max(p[1] for p in known) + half_h,
+        )
+
+    def isolated_indices(self):
+        """입력/출력 연결이 하나도 없는 노드"""
+        return [
+            i for i in range(len(self.nodes))
+            if not any(self.outputs[i]) and not any(self.inputs[i])
+        ]
+
+
+def build_snapshot(graph, attachment_getter=None, extra_properties=()):
+    """graph.all_nodes()를 한 번 순회하여 GraphSnapshot 생성"""
+    snap = GraphSnapshot()
+    input_port_index = []  # 노드별 입력 포트 이름 -> 인덱스
+    out_ports_per_node = []
+
+    for idx, node in enumerate(graph.all_nodes()):
+        node_id = node.id
+        node_type = getattr(node, 'type_', 'unknown')
+        snap.nodes.append(node)
+        snap.ids.append(node_id)
+        snap.names.append(node_display_name(node))
+        snap.types.append(node_type)
+        snap.positions.append(read_node_position(graph, node))
+        snap.properties.append(read_node_properties(node, extra_properties))
+        snap.attachments.append((attachment_getter(node) if attachment_getter else '') or '')
+        try:
+            snap.selected.append(bool(node.selected()))
+        except Exception:
+            snap.selected.append(False)
+        snap.index[node_id] = idx
+        snap.by_type.setdefault(node_type, []).append(idx)
+
+        try:
+            out_ports = list(node.output_ports())
+        except Exception:
+            out_ports = []
+        try:
+            in_ports = list(node.input_ports())
+        except Exception:
+            in_ports = []
+        out_ports_per_node.append(out_ports)
+        snap.output_names.append([p.name() for p in out_ports])
+        snap.input_names.append([p.name() for p in in_ports])
+        input_port_index.append({name: i for i, name in enumerate(snap.input_names[-1])})
+        snap.outputs.append([[] for _ in out_ports])
+        snap.inputs.append([[] for _ in in_ports])
+
+    # 연결 해석: 노드 id 해시 조회만 사용 (전체 노드 재탐색 없음)
+    for src, out_ports in enumerate(out_ports_per_node):
+        for port_idx, port in enumerate(out_ports):
+            try:
+                connected_ports = port.connected_ports()
+            except Exception as e:
+                print(f"⚠️ 연결 정보 수집 오류 ({snap.names[src]}): {e}")
+                continue
+            for connected_port in connected_ports:
+                connected_node = connected_port.node()
+                if not connected_node:
+                    continue
+                dst = snap.index.get(connected_node.id)
+                if dst is None:
+                    continue
+                dst_port = input_port_index[dst].get(connected_port.name(), 0)
+                snap.outputs[src][port_idx].append((dst, dst_port))
+                if dst_port < len(snap.inputs[dst]):
+                    snap.inputs[dst][dst_port].append((src, port_idx))
+
+    return snap
@@ -0,0 +1,412 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from pathlib import Path
+
+from dataset_export import discover_flows, file_stat
+from flow_archive import COPY_CHUNK_SIZE, FLOW_SUFFIXES
+from flow_model import open_flow
+from node_schema import CODECS_BY_STEP_TYPE, codec_for_step
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - flow 라이브러리 색인 (SQLite + FTS5)
+# ============================================
+# 폴더 안 모든 .flow의 노드 / 연결 / 속성 / 사용 항목(테이블·화면·로그·상황 유형) 참조를 SQLite에 저장해서
+# "TB_EQP_ALARM을 보는 flow" / "배터리를 언급하는 flow"를 파일을 열지 않고 바로 찾습니다.
+# - files / nodes / edges / props / refs 테이블 + nodes의 이름·문장을 FTS5(trigram)로 색인
+#   (trigram이라 한글 조사가 붙어도 부분 문자열로 찾음, 3글자 미만 검색어는 LIKE로 확인)
+# - 다시 색인할 때 크기/수정 시각이 같은 파일은 건너뛰고, 바뀌었으면 sha256을 비교해
+#   내용이 같으면(다시 저장만 한 파일) 시각만 갱신, 다르면 그 파일의 행만 지우고 다시 넣습니다.
+# - 폴더에서 사라진 파일의 행은 지웁니다.
+# - sync_directory(폴더): 폴더 감시에서 바뀐 폴더 하나만 맞춤 (scan_directories는 폴링 감시용 폴더 상태)
+# WAL 모드라 색인하는 동안에도 다른 연결(GUI 검색)에서 읽을 수 있습니다.
+# (Qt를 사용하지 않으므로 명령줄 도구에서도 사용할 수 있습니다.)
+
+SCHEMA_VERSION = 1
+SEARCH_LIMIT = 50
+# 이 개수마다 커밋 (중단되어도 그때까지 색인한 파일은 남음)
+COMMIT_EVERY = 200
+# FTS5 trigram은 3글자 이상만 색인으로 찾을 수 있음
+MIN_MATCH_CHARS = 3
+SNIPPET_CHARS = 40
+# 다른 연결이 쓰는 중일 때 기다리는 최대 시간(초)
+BUSY_TIMEOUT = 30
+# props에 넣지 않는 step 키 (나머지 필드는 문자열로 저장)
+SKIP_PROP_KEYS = frozenset(('id', 'name', 'type', 'position', 'node_id', 'connections'))
+
+# step 타입 -> (사용 항목 분류, 필드 키)
+CATALOG_KEYS = {
+    step_type: tuple((p.catalog, p.key) for p in codec.schema.props if p.stored and p.catalog)
+    for step_type, codec in CODECS_BY_STEP_TYPE.items()
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    workflow_name TEXT,
+    description TEXT,
+    step_count INTEGER,
+    indexed_at REAL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    step_id TEXT NOT NULL,
+    type TEXT,
+    name TEXT,
+    body TEXT
+);
+CREATE INDEX IF NOT EXISTS nodes_file ON nodes(file_id);
+CREATE TABLE IF NOT EXISTS edges (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    from_step TEXT NOT NULL,
+    to_step TEXT NOT NULL,
+    port INTEGER
+);
+CREATE INDEX IF NOT EXISTS edges_file ON edges(file_id);
+CREATE TABLE IF NOT EXISTS props (
+    node_id INTEGER NOT NULL REFERENCES nodes(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS props_node ON props(node_id);
+CREATE TABLE IF NOT EXISTS refs (
+    node_id INTEGER NOT NULL REFERENCES nodes(id) ON DELETE CASCADE,
+    catalog TEXT NOT NULL,
+    value TEXT NOT NULL COLLATE NOCASE
+);
+CREATE INDEX IF NOT EXISTS refs_node ON refs(node_id);
+CREATE INDEX IF NOT EXISTS refs_value ON refs(value, catalog);
+CREATE VIRTUAL TABLE IF NOT EXISTS nodes_fts USING fts5(
+    name, body, content='nodes', content_rowid='id', tokenize='trigram'
+);
+"""
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_directories(roots):
+    """
+    폴링 감시용 폴더 상태: {폴더 절대 경로: (하위 폴더 이름, (.flow 이름, 크기, 수정 시각)...)}
+    파일 내용은 읽지 않고 목록/stat만 확인합니다.
+    """
+    state = {}
+    pending = [str(Path(root).resolve()) for root in roots]
+    while pending:
+        directory = pending.pop()
+        if directory in state:
+            continue
+        try:
+            with os.scandir(directory) as entries:
+                entries = list(entries)
+        except OSError:
+            continue
+        subdirs = []
+        files = []
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    subdirs.append(entry.name)
+                    pending.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in FLOW_SUFFIXES:
+                    stat = entry.stat()
+                    files.append((entry.name, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                continue
+        state[directory] = (tuple(sorted(subdirs)), tuple(sorted(files)))
+    return state
+
+
+def changed_directories(before, after):
+    """scan_directories() 두 결과에서 생기거나 / 없어지거나 / 내용이 바뀐 폴더"""
+    return {directory for directory in before.keys() | after.keys() if before.get(directory) != after.get(directory)}
+
+
+def _step_rows(step):
+    """step -> (타입, 이름, 검색용 문장, [(속성 키, 값)], [(분류, 값)])"""
+    codec = codec_for_step(step.get('type', ''))
+    step_type = codec.step_type if codec is not None else str(step.get('type', ''))
+    props = []
+    for key, value in step.items():
+        if key in SKIP_PROP_KEYS or value is None or isinstance(value, (dict, list)):
+            continue
+        props.append((key, str(value)))
+    refs = []
+    for catalog, key in CATALOG_KEYS.get(step_type, ()):
+        value = step.get(key)
+        if isinstance(value, str) and value.strip():
+            refs.append((catalog, value.strip()))
+    body = '\n'.join(value for _key, value in props if value.strip())
+    return step_type, str(step.get('name', '')), body, props, refs
+
+
+def _like_pattern(term):
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+def _snippet(body, terms):
+    """본문에서 첫 검색어 주변만 잘라 한 줄로"""
+    text = ' '.join(body.split())
+    lowered = text.lower()
+    positions = [lowered.find(term.lower()) for term in terms]
+    positions = [pos for pos in positions if pos >= 0]
+    if not positions:
+        return text[:SNIPPET_CHARS * 2]
+    start = max(0, min(positions) - SNIPPET_CHARS)
+    end = min(len(text), min(positions) + SNIPPET_CHARS)
+    return ('…' if start else '') + text[start:end] + ('…' if end < len(text) else '')
+
+
+class LibraryIndex:
+    """
+    flow 라이브러리 SQLite 색인
+    - update(roots): 바뀐 파일만 다시 색인, 요약 dict 반환
+    - search(text): 노드 이름/문장 전체 검색 (모든 검색어 포함, 관련도 순)
+    - references(value, catalog): 테이블/화면/로그/상황 유형을 참조하는 flow
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 폴더 감시 색인과 직접 색인이 겹치면 한쪽이 커밋할 때까지 기다림
+        self.conn = sqlite3.connect(str(self.db_path), timeout=BUSY_TIMEOUT)
+        # WAL은 파일에 남으므로 처음 만들 때만 바꿈 (바꾸는 동안은 다른 연결이 기다리지 않고 실패함)
+        if self.conn.execute("PRAGMA journal_mode").fetchone()[0] != 'wal':
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self.conn.close()
+            raise ValueError(f"지원하지 않는 색인 버전입니다: {version} ({self.db_path})")
+        self.conn.executescript(_SCHEMA)
+        self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- 색인 ----
+
+    @property
+    def roots(self):
+        """색인한 적 있는 파일/폴더 (절대 경로)"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'roots'").fetchone()
+        return json.loads(row[0]) if row else []
+
+    def stats(self):
+        """(파일 수, 노드 수)"""
+        files = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        nodes = self.conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+        return files, nodes
+
+    def _delete_file(self, file_id):
+        # 외부 콘텐츠 FTS는 원래 값으로 지워야 함
+        self.conn.execute(
+            "INSERT INTO nodes_fts(nodes_fts, rowid, name, body) "
+            "SELECT 'delete', id, name, body FROM nodes WHERE file_id = ?", (file_id,))
+        self.conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _insert_file(self, path, stat, sha, data):
+        steps = [s for s in data.get('steps') or [] if isinstance(s, dict)]
+        cursor = self.conn.execute(
+            "INSERT INTO files (path, size, mtime_ns, sha256, workflow_name, description, step_count, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, stat[0], stat[1], sha, str(data.get('workflow_name', '')), str(data.get('description', '')),
+             len(steps), time.time()))
+        file_id = cursor.lastrowid
+        edges = []
+        for step in steps:
+            step_id = json.dumps(step.get('id'), ensure_ascii=False)
+            step_type, name, body, props, refs = _step_rows(step)
+            node_id = self.conn.execute(
+                "INSERT INTO nodes (file_id, step_id, type, name, body) VALUES (?, ?, ?, ?, ?)",
+                (file_id, step_id, step_type, name, body)).lastrowid
+            self.conn.execute("INSERT INTO nodes_fts(rowid, name, body) VALUES (?, ?, ?)", (node_id, name, body))
+            self.conn.executemany("INSERT INTO props (node_id, key, value) VALUES (?, ?, ?)",
+                                  [(node_id, key, value) for key, value in props])
+            self.conn.executemany("INSERT INTO refs (node_id, catalog, value) VALUES (?, ?, ?)",
+                                  [(node_id, catalog, value) for catalog, value in refs])
+            for conn in step.get('connections') or []:
+                if isinstance(conn, dict) and conn.get('to_node_step_id') is not None:
+                    port = conn.get('from_port')
+                    edges.append((file_id, step_id, json.dumps(conn['to_node_step_id'], ensure_ascii=False),
+                                  port if type(port) is int else None))
+        self.conn.executemany("INSERT INTO edges (file_id, from_step, to_step, port) VALUES (?, ?, ?, ?)", edges)
+
+    def _sync(self, tasks, known, stale, progress=None):
+        """
+        tasks [(절대 경로, source)]를 색인과 맞추고, stale(색인된 경로) 중 tasks에 없는 파일은 삭제
+        known: 색인된 경로 -> (id, size, mtime_ns, sha256)
+        """
+        started = time.monotonic()
+        counts = dict.fromkeys(('added', 'updated', 'touched', 'unchanged', 'removed', 'failed'), 0)
+        pending_commit = 0
+        try:
+            for done, (key, source) in enumerate(tasks, 1):
+                outcome = self._sync_file(key, source, known.get(key))
+                counts[outcome] += 1
+                if outcome in ('added', 'updated'):
+                    pending_commit += 1
+                    if pending_commit >= COMMIT_EVERY:
+                        self.conn.commit()
+                        pending_commit = 0
+                if progress:
+                    progress(done, len(tasks), source)
+
+            found = {key for key, _source in tasks}
+            for path in stale:
+                if path not in found:
+                    self._delete_file(known[path][0])
+                    counts['removed'] += 1
+        finally:
+            self.conn.commit()
+        return dict(counts, files=len(tasks), seconds=time.monotonic() - started)
+
+    def _sync_file(self, key, source, row):
+        """파일 하나를 색인과 맞추고 결과 이름(counts 키) 반환, row: 색인된 행 (없으면 None)"""
+        try:
+            stat = file_stat(key)
+            if row and [row[1], row[2]] == stat:
+                return 'unchanged'
+            sha = file_sha256(key)
+            if row and row[3] == sha:
+                # 다시 저장만 한 파일: 내용이 같으므로 시각만 갱신
+                self.conn.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?",
+                                  (stat[0], stat[1], row[0]))
+                return 'touched'
+            data = open_flow(key).data
+        except Exception as e:
+            print(f"  ⚠️ 색인하지 못함: {source} ({type(e).__name__}: {e})")
+            return 'failed'
+        if row:
+            self._delete_file(row[0])
+        self._insert_file(key, stat, sha, data)
+        return 'updated' if row else 'added'
+
+    def _known_files(self, directory=None):
+        """색인된 경로 -> (id, size, mtime_ns, sha256), directory를 주면 그 폴더 아래(하위 폴더 포함)만"""
+        sql = "SELECT path, id, size, mtime_ns, sha256 FROM files"
+        params = ()
+        if directory is not None:
+            prefix = directory.rstrip(os.sep) + os.sep
+            sql += " WHERE substr(path, 1, ?) = ?"
+            params = (len(prefix), prefix)
+        return {row[0]: row[1:] for row in self.conn.execute(sql, params)}
+
+    def update(self, roots, progress=None, prune=True):
+        """
+        roots 아래 .flow를 색인 (바뀐 파일만), progress(done, total, label)는 파일 하나를 끝낼 때마다 호출
+        반환값: {files, added, updated, touched, unchanged, removed, failed, seconds}
+        """
+        roots = [str(Path(root).resolve()) for root in roots]
+        known = self._known_files()
+        stale = [path for path in known
+                 if any(path == root or path.startswith(root + os.sep) for root in roots)] if prune else []
+        result = self._sync(discover_flows(roots), known, stale, progress)
+        # 다른 폴더를 따로 색인해도 이전 폴더 목록은 유지 (다시 색인할 때 함께 확인)
+        known_roots = self.roots
+        known_roots += [root for root in roots if root not in known_roots]
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('roots', ?)",
+                          (json.dumps(known_roots, ensure_ascii=False),))
+        self.conn.commit()
+        return result
+
+    def sync_directory(self, directory, recursive=False, progress=None):
+        """
+        폴더 하나만 색인과 맞춤 (폴더 감시에서 바뀐 폴더마다 호출)
+        recursive=False면 바로 아래 파일만, 폴더가 없어졌으면 그 아래 색인을 모두 삭제
+        반환값: update()와 같은 요약 dict
+        """
+        directory = str(Path(directory).resolve())
+        known = self._known_files(directory)
+        if not recursive:
+            known = {path: row for path, row in known.items() if os.path.dirname(path) == directory}
+        if not os.path.isdir(directory):
+            tasks = []
+        elif recursive:
+            tasks = discover_flows([directory])
+        else:
+            with os.scandir(directory) as entries:
+                tasks = sorted((entry.path, entry.name) for entry in entries
+                               if entry.is_file() and os.path.splitext(entry.name)[1].lower() in FLOW_SUFFIXES)
+        return self._sync(tasks, known, list(known), progress)
+
+    # ---- 검색 ----
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        """
+        노드 이름/문장에 검색어(공백으로 구분)가 모두 들어 있는 노드
+        반환값: [{path, workflow_name, step_id, type, name, snippet}] (관련도 순)
+        """
+        terms = [term for term in text.split() if term]
+        if not terms:
+            return []
+        long_terms = [term for term in terms if len(term) >= MIN_MATCH_CHARS]
+        short_terms = [term for term in terms if len(term) < MIN_MATCH_CHARS]
+        params = []
+        if long_terms:
+            sql = ("SELECT f.path, f.workflow_name, n.step_id, n.type, n.name, n.body "
+                   "FROM nodes_fts JOIN nodes n ON n.id = nodes_fts.rowid JOIN files f ON f.id = n.file_id "
+                   "WHERE nodes_fts MATCH ?")
+            params.append(' AND '.join('"{}"'.format(term.replace('"', '""')) for term in long_terms))
+        else:
+            sql = ("SELECT f.path, f.workflow_name, n.step_id, n.type, n.name, n.body "
+                   "FROM nodes n JOIN files f ON f.id = n.file_id WHERE 1")
+        for term in short_terms:
+            sql += " AND (n.name LIKE ? ESCAPE '\\' OR n.body LIKE ? ESCAPE '\\')"
+            params.extend([_like_pattern(term)] * 2)
+        sql += " ORDER BY bm25(nodes_fts)" if long_terms else " ORDER BY f.path, n.id"
+        sql += " LIMIT ?"
+        params.append(limit)
+        return [
+            {"path": path, "workflow_name": workflow_name, "step_id": json.loads(step_id), "type": step_type,
+             "name": name, "snippet": _snippet(body or name, terms)}
+            for path, workflow_name, step_id, step_type, name, body in self.conn.execute(sql, params)
+        ]
+
+    def references(self, value, catalog=None, limit=None):
+        """
+        사용 항목(테이블/화면/로그/상황 유형, 대소문자 무시)을 참조하는 flow
+        반환값: [{path, workflow_name, catalog, steps: [step id...]}] (경로 순)
+        """
+        sql = ("SELECT f.path, f.workflow_name, r.catalog, n.step_id FROM refs r "
+               "JOIN nodes n ON n.id = r.node_id JOIN files f ON f.id = n.file_id WHERE r.value = ?")
+        params = [value]
+        if catalog:
+            sql += " AND r.catalog = ?"
+            params.append(catalog)
+        sql += " ORDER BY f.path, n.id"
+        results = {}
+        for path, workflow_name, found_catalog, step_id in self.conn.execute(sql, params):
+            entry = results.get((path, found_catalog))
+            if entry is None:
+                if limit is not None and len(results) >= limit:
+                    continue
+                entry = results[(path, found_catalog)] = {
+                    "path": path, "workflow_name": workflow_name, "catalog": found_catalog, "steps": []}
+            entry["steps"].append(json.loads(step_id))
+        return list(results.values())
@@ -0,0 +1,226 @@
+import os
+from pathlib import Path
+
+from PySide2 import QtCore
+
+from flow_workers import run_background_task
+from flow_archive import FLOW_SUFFIXES
+from library_index import LibraryIndex, changed_directories, scan_directories
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 라이브러리 폴더 감시 (자동 색인)
+# ============================================
+# 공유 폴더에 전문가들이 .flow를 저장하는 동안 라이브러리 색인(library_index)을 최신으로 유지합니다.
+# - QFileSystemWatcher로 폴더(하위 폴더 포함)와 .flow 파일 변경 알림을 받음
+#   (폴더 알림: 생성/삭제/교체 저장, 파일 알림: 제자리 덮어쓰기, 감시를 못 거는 경로가 있으면 폴링으로 대신)
+# - 알림이 몰려 오면 WATCH_DEBOUNCE_MS 동안 조용해진 뒤 바뀐 폴더만 한 번에 다시 색인
+# - 색인은 작업 스레드에서 별도 sqlite 연결(WAL)로 하므로 그동안에도 GUI에서 검색 가능
+# - 알림이 누락되는 경우를 위해 WATCH_RESCAN_INTERVAL_MS마다 목록/stat만 다시 확인
+
+WATCH_DEBOUNCE_MS = 300
+# 폴더 감시를 걸 수 없을 때 폴링 간격
+WATCH_POLL_INTERVAL_MS = 500
+# 폴더 감시 중에도 가끔 전체 목록/stat을 다시 확인하는 간격
+WATCH_RESCAN_INTERVAL_MS = 30000
+
+_COUNT_KEYS = ('files', 'added', 'updated', 'touched', 'unchanged', 'removed', 'failed')
+
+
+def _walk_directories(root):
+    return [directory for directory, _subdirs, _files in os.walk(root)]
+
+
+def _flow_files(directory):
+    try:
+        with os.scandir(directory) as entries:
+            return [entry.path for entry in entries
+                    if entry.is_file() and os.path.splitext(entry.name)[1].lower() in FLOW_SUFFIXES]
+    except OSError:
+        return []
+
+
+class LibraryWatcher(QtCore.QObject):
+    """
+    라이브러리 폴더를 감시하여 바뀐 .flow만 색인에 반영 (GUI 스레드에서 만들고 사용)
+    - watch(roots): 감시 시작 (먼저 roots 전체를 한 번 따라잡아 색인), stop(): 중지
+    - updated(요약 dict): 색인이 실제로 바뀌었을 때만 발생 (added/updated/removed/failed/seconds)
+    """
+
+    updated = QtCore.Signal(object)
+
+    def __init__(self, db_path, debounce_ms=WATCH_DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.db_path = Path(db_path)
+        self.roots = []
+        self.polling = False
+        self._watcher = QtCore.QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._debounce = QtCore.QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(debounce_ms)
+        self._debounce.timeout.connect(self._on_debounced)
+        self._poll_timer = QtCore.QTimer(self)
+        self._poll_timer.timeout.connect(self._on_poll)
+        self._watched = set()
+        # 폴더 -> 하위 폴더까지 다시 색인할지
+        self._pending = {}
+        self._scan_requested = False
+        self._full_requested = False
+        self._scan_state = None
+        self._task = None
+        # stop()/watch() 전에 시작한 작업의 결과는 무시
+        self._generation = 0
+
+    @property
+    def is_watching(self):
+        return bool(self.roots)
+
+    def watch(self, roots):
+        self.stop()
+        self.roots = [str(Path(root).resolve()) for root in roots if Path(root).is_dir()]
+        if not self.roots:
+            return
+        directories = [directory for root in self.roots for directory in _walk_directories(root)]
+        self._poll_timer.start(WATCH_RESCAN_INTERVAL_MS)
+        self._watch_paths(directories)
+        mode = f"폴링 {WATCH_POLL_INTERVAL_MS}ms (감시할 수 없는 경로가 있음)" if self.polling else "폴더 알림"
+        print(f"👁️ 라이브러리 폴더 감시 시작: 폴더 {len(directories)}개, {mode}")
+        # 감시를 시작하기 전에 바뀐 파일부터 따라잡기
+        self._full_requested = True
+        self._start_job()
+
+    def stop(self):
+        if self.roots:
+            print("⏹️ 라이브러리 폴더 감시 중지")
+        self._generation += 1
+        watched = self._watcher.directories() + self._watcher.files()
+        if watched:
+            self._watcher.removePaths(watched)
+        self._debounce.stop()
+        self._poll_timer.stop()
+        self.roots = []
+        self.polling = False
+        self._watched = set()
+        self._pending = {}
+        self._scan_requested = self._full_requested = False
+        self._scan_state = None
+        self._task = None
+
+    # ---- 알림 ----
+
+    def _on_directory_changed(self, path):
+        if not os.path.isdir(path):
+            # 폴더가 지워짐: 그 아래 색인을 모두 삭제
+            self._watched = {d for d in self._watched if d != path and not d.startswith(path + os.sep)}
+            self._pending[path] = True
+        else:
+            self._pending.setdefault(path, False)
+        self._debounce.start()
+
+    def _on_file_changed(self, path):
+        self._pending.setdefault(os.path.dirname(path), False)
+        self._debounce.start()
+
+    def _on_debounced(self):
+        watched_files = set(self._watcher.files())
+        for directory in [d for d in self._pending if os.path.isdir(d)]:
+            try:
+                with os.scandir(directory) as entries:
+                    subdirs = [entry.path for entry in entries if entry.is_dir()]
+            except OSError:
+                continue
+            # 새로 생긴 하위 폴더는 감시를 걸고 그 아래 전체를 색인
+            for subdir in subdirs:
+                if subdir not in self._watched:
+                    self._watch_paths(_walk_directories(subdir))
+                    self._pending[subdir] = True
+            # 새 파일 / 교체 저장된 파일(감시가 풀림)은 파일 감시를 다시 검
+            new_files = [path for path in _flow_files(directory) if path not in watched_files]
+            if new_files:
+                self._watch_paths([], new_files)
+        self._start_job()
+
+    def _on_poll(self):
+        self._scan_requested = True
+        if not self._debounce.isActive():
+            self._start_job()
+
+    def _watch_paths(self, directories, files=None):
+        """폴더와 (files가 없으면) 그 바로 아래 .flow에 감시를 검, 하나라도 실패하면 폴링으로 전환"""
+        if files is None:
+            files = [path for directory in directories for path in _flow_files(directory)]
+        paths = list(directories) + list(files)
+        if not paths:
+            return
+        failed = set(self._watcher.addPaths(paths))
+        self._watched.update(set(directories) - failed)
+        if failed and not self.polling:
+            self.polling = True
+            self._poll_timer.start(WATCH_POLL_INTERVAL_MS)
+
+    # ---- 백그라운드 색인 ----
+
+    def _start_job(self):
+        """쌓인 일(따라잡기 / 목록 확인 / 바뀐 폴더 색인)을 작업 하나로 실행 (한 번에 하나씩)"""
+        if self._task is not None or not self.roots:
+            return
+        if not (self._pending or self._scan_requested or self._full_requested):
+            return
+        job = (list(self.roots), self._pending, self._scan_requested or self._full_requested,
+               self._full_requested, self._scan_state)
+        self._pending = {}
+        self._scan_requested = self._full_requested = False
+        generation = self._generation
+        self._task = run_background_task(
+            lambda task: self._run_job(*job),
+            lambda result: self._on_job_finished(generation, result),
+            lambda message: self._on_job_failed(generation, message),
+        )
+
+    def _run_job(self, roots, pending, scan, full, previous_state):
+        """작업 스레드: 색인 갱신 후 (합친 요약, 새 목록 상태) 반환"""
+        total = dict.fromkeys(_COUNT_KEYS, 0)
+        state = None
+        with LibraryIndex(self.db_path) as index:
+            results = []
+            if scan:
+                state = scan_directories(roots)
+                if previous_state is not None:
+                    for directory in changed_directories(previous_state, state):
+                        pending.setdefault(directory, False)
+            if full:
+                results.append(index.update(roots))
+            else:
+                results.extend(index.sync_directory(directory, recursive)
+                               for directory, recursive in sorted(pending.items()))
+        for result in results:
+            for key in _COUNT_KEYS:
+                total[key] += result[key]
+        total['directories'] = len(pending)
+        return total, state
+
+    def _on_job_finished(self, generation, outcome):
+        if generation != self._generation:
+            return
+        self._task = None
+        result, state = outcome
+        if state is not None:
+            self._scan_state = state
+            if not self.polling:
+                self._watch_paths(sorted(set(state) - self._watched))
+        if result['added'] or result['updated'] or result['removed'] or result['failed']:
+            print(f"🔄 라이브러리 자동 색인: 추가 {result['added']}개, 갱신 {result['updated']}개, "
+                  f"삭제 {result['removed']}개, 실패 {result['failed']}개")
+            self.updated.emit(result)
+        if not self._debounce.isActive():
+            self._start_job()
+
+    def _on_job_failed(self, generation, message):
+        if generation != self._generation:
+            return
+        self._task = None
+        print(f"⚠️ 라이브러리 자동 색인 실패: {message}")
+        if not self._debounce.isActive():
+            self._start_job()
@@ -0,0 +1,4 @@
+@echo off
+REM LogicCanvas 명령줄 도구 (GUI 없이 .flow / JSON 일괄 처리)
+REM 사용 예: logiccanvas info flows\
+python "%~dp0logiccanvas.py" %*
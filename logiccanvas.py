@@ -0,0 +1,521 @@
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+
+from dataset_export import DEFAULT_SHARD_RECORDS, RECORD_MODES, DatasetExporter
+from flow_archive import CODECS, CompressionPolicy
+from flow_dedup import DEFAULT_THRESHOLD, FlowDeduplicator
+from flow_manifest import read_manifest, read_thumbnail
+from library_index import CATALOG_KEYS, SEARCH_LIMIT, LibraryIndex, changed_directories, scan_directories
+from flow_model import FLOW_SUFFIXES, compact_flow, load_flow, open_flow, save_flow
+from reasoning_paths import DEFAULT_MAX_PATHS
+from pattern_mining import DEFAULT_MAX_NODES, DEFAULT_MIN_SUPPORT, PatternMiner
+from similarity_index import DEFAULT_FIELDS, DEFAULT_TOP_K, SimilarityIndex
+
+# dataset 명령의 기본 내보내기 캐시 폴더 (GUI의 추출 캐시와 같은 cache/ 아래)
+DEFAULT_DATASET_CACHE_DIR = Path(__file__).resolve().parent / 'cache' / 'dataset'
+# index / search 명령의 기본 라이브러리 색인 (SQLite)
+DEFAULT_LIBRARY_DB = Path(__file__).resolve().parent / 'cache' / 'library.sqlite'
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 명령줄 도구 (logiccanvas)
+# ============================================
+# GUI(PySide2/NodeGraphQt) 없이 .flow / JSON 파일을 일괄 처리합니다.
+#
+#   python logiccanvas.py info     <파일 또는 폴더>...
+#   python logiccanvas.py list     <파일 또는 폴더>... [--thumbnails <폴더>]
+#   python logiccanvas.py validate <파일 또는 폴더>...
+#   python logiccanvas.py convert  <입력> <출력> [--plain] [--compact]
+#   python logiccanvas.py compact  <파일 또는 폴더>... [--dry-run]
+#   python logiccanvas.py dataset  <파일 또는 폴더>... -o <출력 폴더> [--records flow|paths] [--workers N] [--rebuild]
+#   python logiccanvas.py similar  <파일 또는 폴더>... -q <문장> [-k 10] [--field condition] [--index <파일>]
+#   python logiccanvas.py patterns <파일 또는 폴더>... [--max-nodes 4] [--min-support 2] [-o patterns.jsonl]
+#   python logiccanvas.py dedup    <파일 또는 폴더>... [--threshold 0.8] [--json]
+#   python logiccanvas.py index    <파일 또는 폴더>... [--db cache/library.sqlite] [--watch [--interval 1]]
+#   python logiccanvas.py search   <검색어> [--ref [--catalog tables]] [-n 50] [--json] [--db <파일>]
+
+
+def iter_flow_files(paths, include_json=True):
+    """파일/폴더 목록을 펼쳐서 워크플로우 파일 경로를 순회"""
+    suffixes = FLOW_SUFFIXES + (('.json',) if include_json else ())
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            for child in sorted(path.rglob('*')):
+                if child.is_file() and child.suffix.lower() in suffixes:
+                    yield child
+        else:
+            yield path
+
+
+def cmd_info(args):
+    failed = 0
+    for path in iter_flow_files(args.paths, include_json=not args.flow_only):
+        try:
+            summary = load_flow(path).summary()
+        except Exception as e:
+            failed += 1
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            continue
+        summary['file'] = str(path)
+        if args.json:
+            print(json.dumps(summary, ensure_ascii=False))
+        else:
+            types = ', '.join(f"{k}={v}" for k, v in summary['types'].items())
+            print(f"📂 {path}")
+            print(f"   단계 {summary['steps']}개, 연결 {summary['connections']}개, "
+                  f"첨부 {summary['attachments']}개 ({summary['attachment_bytes']:,} bytes)")
+            if types:
+                print(f"   타입: {types}")
+    return 1 if failed else 0
+
+
+def manifest_from_summary(summary):
+    """manifest.json이 없는 이전 .flow 파일: 전체를 읽은 요약을 manifest 형식으로 변환"""
+    return {
+        'workflow_name': summary['workflow_name'],
+        'step_count': summary['steps'],
+        'connection_count': summary['connections'],
+        'node_counts': summary['types'],
+        'used_items': summary['used_items'],
+        'attachment_count': summary['attachments'],
+        'attachment_bytes': summary['attachment_bytes'],
+    }
+
+
+def cmd_list(args):
+    """.flow 파일 목록 (manifest.json만 읽음, 없는 이전 파일은 --full일 때만 전체를 읽음)"""
+    failed = 0
+    thumbnail_dir = Path(args.thumbnails) if args.thumbnails else None
+    if thumbnail_dir:
+        thumbnail_dir.mkdir(parents=True, exist_ok=True)
+    for path in iter_flow_files(args.paths, include_json=False):
+        manifest = read_manifest(path)
+        if manifest is None:
+            if not args.full:
+                print(f"⚪ {path}: manifest 없음 (이전 버전 파일, --full로 전체 읽기)", file=sys.stderr)
+                continue
+            try:
+                manifest = manifest_from_summary(load_flow(path).summary())
+            except Exception as e:
+                failed += 1
+                print(f"❌ {path}: {e}", file=sys.stderr)
+                continue
+        if thumbnail_dir and manifest.get('thumbnail'):
+            thumbnail = read_thumbnail(path)
+            if thumbnail:
+                (thumbnail_dir / (path.stem + '.png')).write_bytes(thumbnail)
+        if args.json:
+            print(json.dumps(dict(manifest, file=str(path)), ensure_ascii=False))
+            continue
+        situation_types = ', '.join((manifest.get('used_items') or {}).get('situation_types') or [])
+        print(f"📂 {path}  [{manifest.get('workflow_name', '')}]  "
+              f"단계 {manifest.get('step_count', 0)}개, 연결 {manifest.get('connection_count', 0)}개, "
+              f"첨부 {manifest.get('attachment_count', 0)}개 ({manifest.get('attachment_bytes', 0):,} bytes)"
+              + (f"  상황 유형: {situation_types}" if situation_types else ''))
+    return 1 if failed else 0
+
+
+def cmd_validate(args):
+    checked = 0
+    invalid = 0
+    for path in iter_flow_files(args.paths, include_json=not args.flow_only):
+        checked += 1
+        try:
+            errors = open_flow(path).validate()
+        except Exception as e:
+            errors = [f"파일을 읽을 수 없음: {e}"]
+        if errors:
+            invalid += 1
+            print(f"❌ {path}")
+            for error in errors:
+                print(f"   - {error}")
+        elif not args.quiet:
+            print(f"✅ {path}")
+    print(f"📊 {checked}개 파일 검사, 오류 {invalid}개", file=sys.stderr)
+    return 1 if invalid else 0
+
+
+def cmd_convert(args):
+    doc = load_flow(args.source)
+    if args.validate:
+        errors = doc.validate()
+        if errors:
+            for error in errors:
+                print(f"❌ {error}", file=sys.stderr)
+            return 1
+    policy = CompressionPolicy(json_codec=args.json_codec, json_level=args.level, attachment_level=args.level)
+    save_flow(doc, args.target, plain=args.plain, indent=None if args.compact else 2, policy=policy,
+              keep_unreferenced=args.keep_unreferenced)
+    print(f"✅ {args.source} -> {args.target} ({len(doc.steps)}개 단계)")
+    return 0
+
+
+def cmd_compact(args):
+    """참조하지 않는 첨부 파일을 제거하고 회수한 용량 출력 (다시 저장해도 작아지지 않는 파일은 그대로 둠)"""
+    failed = 0
+    total_reclaimed = 0
+    total_change = 0
+    for path in iter_flow_files(args.paths, include_json=False):
+        try:
+            if args.dry_run:
+                removed = load_flow(path).unreferenced_attachments()
+                result = None
+            else:
+                result = compact_flow(path)
+                removed = result['removed']
+                total_reclaimed += result['reclaimed']
+                total_change += result['size_change']
+        except Exception as e:
+            failed += 1
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            continue
+        removed_bytes = sum(removed.values())
+        line = f"🧹 {path}: 사용하지 않는 첨부 {len(removed)}개 ({removed_bytes:,} bytes)"
+        if result is not None and result['replaced']:
+            line += (f", 회수 {result['reclaimed']:,} bytes (압축된 크기), "
+                     f"파일 크기 {result['before']:,} -> {result['after']:,} bytes ({result['size_change']:+,})")
+        elif result is not None and removed:
+            line += ", 다시 저장해도 파일이 작아지지 않아 그대로 둠"
+        print(line)
+        if args.verbose:
+            for arcname, size in sorted(removed.items()):
+                print(f"   - {arcname} ({size:,} bytes)")
+    if not args.dry_run:
+        print(f"📊 총 {total_reclaimed:,} bytes 회수, 파일 크기 변화 {total_change:+,} bytes", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_dataset(args):
+    """
+    학습 데이터셋(JSONL 샤드) 일괄 내보내기 - 같은 출력 폴더로 다시 실행하면 이어서 진행
+    (완료된 폴더면 다시 만들되 내보내기 캐시로 바뀐 flow만 새로 변환)
+    """
+    def progress(done, total, label):
+        if done % 100 == 0 or done == total:
+            print(f"  ... {done}/{total} ({label})", file=sys.stderr)
+
+    exporter = DatasetExporter(args.output, shard_records=args.shard_records, workers=args.workers,
+                               progress=None if args.quiet else progress,
+                               record_mode=args.records, max_paths=args.max_paths,
+                               cache_dir=None if args.no_cache else args.cache, dedup_threshold=args.dedup)
+    try:
+        result = exporter.run(args.paths, rebuild=args.rebuild)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print(f"⏸️ 중단됨 - 같은 명령으로 다시 실행하면 이어서 내보냅니다 ({args.output})", file=sys.stderr)
+        return 130
+    rate = result['exported'] / result['seconds'] if result['seconds'] else 0
+    print(f"✅ {result['exported']}개 파일 -> {result['records']}개 레코드 "
+          f"({result['seconds']:.1f}초, {rate:.1f} 파일/초, 작업 프로세스 {exporter.workers}개)")
+    print(f"📊 캐시 사용 {result['cached']}개, 중복 제외 {result['duplicates']}개, "
+          f"건너뜀(이미 내보냄) {result['skipped']}개, 실패 {result['failed']}개, "
+          f"샤드 {result['shards']}개 / 전체 레코드 {result['total_records']}개", file=sys.stderr)
+    return 1 if result['failed'] else 0
+
+
+def cmd_similar(args):
+    """판단 조건 / 결론 문장과 비슷한 기존 단계 검색 (TF-IDF, --index로 색인 저장/재사용)"""
+    index = None
+    index_path = Path(args.index) if args.index else None
+    if index_path and index_path.is_file():
+        try:
+            index = SimilarityIndex.load(index_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ 색인을 읽을 수 없어 다시 만듭니다: {e}", file=sys.stderr)
+        else:
+            if not index.is_current(args.paths):
+                print("🔄 파일이 바뀌어 색인을 다시 만듭니다", file=sys.stderr)
+                index = None
+    if index is None:
+        index = SimilarityIndex.build(args.paths)
+        print(f"📇 색인: 단계 문장 {len(index)}개 ({len(index.files)}개 파일)", file=sys.stderr)
+        if index_path:
+            index.save(index_path)
+
+    results = index.search(args.query, k=args.k, fields=args.field or None)
+    for score, doc in results:
+        if args.json:
+            print(json.dumps(dict(doc, score=round(score, 4)), ensure_ascii=False))
+        else:
+            print(f"{score:.3f}  {doc['source']} #{doc['step_id']} [{doc['field']}] {doc['text']}")
+    if not results:
+        print("🔍 비슷한 단계가 없습니다", file=sys.stderr)
+    return 0
+
+
+def cmd_patterns(args):
+    """여러 flow에 되풀이해서 나오는 부분 그래프(조사 조각) 찾기"""
+    def progress(done, total, label):
+        if done % 100 == 0 or done == total:
+            print(f"  ... {done}/{total} ({label})", file=sys.stderr)
+
+    miner = PatternMiner(max_nodes=args.max_nodes, min_support=args.min_support, workers=args.workers,
+                         closed_only=not args.all, progress=None if args.quiet else progress)
+    try:
+        result = miner.run(args.paths)
+    except KeyboardInterrupt:
+        print("⏸️ 중단됨", file=sys.stderr)
+        return 130
+    patterns = result['patterns']
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for pattern in patterns:
+                f.write(json.dumps(pattern, ensure_ascii=False) + '\n')
+    for rank, pattern in enumerate(patterns[:args.top], 1):
+        flows = ', '.join(pattern['flows'][:3]) + (' ...' if pattern['support'] > 3 else '')
+        print(f"{rank:>3}. [{pattern['support']}개 flow] {pattern['text']}")
+        print(f"       {flows}")
+    for source in result['truncated']:
+        print(f"⚠️ {source}: 부분 그래프가 너무 많아 일부만 확인했습니다", file=sys.stderr)
+    print(f"📊 {result['files']}개 파일, 실패 {result['failed']}개, 패턴 {len(patterns)}개 "
+          f"(지지도 {miner.min_support} 이상, {result['seconds']:.1f}초)"
+          + (f" -> {args.output}" if args.output else ''), file=sys.stderr)
+    return 1 if result['failed'] else 0
+
+
+def cmd_dedup(args):
+    """거의 같은 flow(조금만 고친 복사본) 묶음 보고서"""
+    def progress(done, total, label):
+        if done % 500 == 0 or done == total:
+            print(f"  ... {done}/{total} ({label})", file=sys.stderr)
+
+    try:
+        dedup = FlowDeduplicator(args.threshold, workers=args.workers, progress=None if args.quiet else progress)
+        result = dedup.run(args.paths)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print("⏸️ 중단됨", file=sys.stderr)
+        return 130
+    for cluster in result['clusters']:
+        if args.json:
+            print(json.dumps(cluster, ensure_ascii=False))
+            continue
+        print(f"📂 {cluster['representative']}")
+        for member in cluster['members']:
+            kind = '완전 중복' if member['exact'] else f"유사도 {member['similarity']:.2f}"
+            print(f"   └ {member['source']} ({kind})")
+    print(f"📊 {result['files']}개 파일, 묶음 {len(result['clusters'])}개, 중복 {result['duplicates']}개, "
+          f"실패 {result['failed']}개 ({result['seconds']:.1f}초)", file=sys.stderr)
+    return 1 if result['failed'] else 0
+
+
+def cmd_index(args):
+    """라이브러리 색인 (SQLite) 갱신 - 바뀐 파일만 다시 색인"""
+    def progress(done, total, label):
+        if done and done % 500 == 0 or done == total:
+            print(f"  ... {done}/{total} ({label})", file=sys.stderr)
+
+    # 감시할 폴더 상태는 색인 전에 확인 (색인하는 동안 바뀐 파일도 놓치지 않도록)
+    watch_state = scan_directories(args.paths) if args.watch else None
+    try:
+        with LibraryIndex(args.db) as index:
+            result = index.update(args.paths, progress=None if args.quiet else progress, prune=not args.keep_missing)
+            files, nodes = index.stats()
+    except (sqlite3.Error, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print("⏸️ 중단됨 (그때까지 색인한 파일은 저장됨)", file=sys.stderr)
+        return 130
+    print(f"📇 {result['files']}개 파일: 추가 {result['added']}개, 갱신 {result['updated']}개, "
+          f"그대로 {result['unchanged'] + result['touched']}개, 삭제 {result['removed']}개, "
+          f"실패 {result['failed']}개 ({result['seconds']:.2f}초)", file=sys.stderr)
+    print(f"📊 색인 전체: 파일 {files}개, 노드 {nodes}개 -> {args.db}", file=sys.stderr)
+    if args.watch:
+        return watch_library(args.db, args.paths, watch_state, args.interval)
+    return 1 if result['failed'] else 0
+
+
+def watch_library(db_path, roots, state, interval):
+    """index --watch: 폴더 목록/stat을 주기적으로 확인하여 바뀐 폴더만 다시 색인 (Ctrl+C로 종료)"""
+    print(f"👁️ 폴더 감시 중 ({interval:g}초 간격, Ctrl+C로 종료)", file=sys.stderr)
+    try:
+        with LibraryIndex(db_path) as index:
+            while True:
+                time.sleep(interval)
+                current = scan_directories(roots)
+                changed = changed_directories(state, current)
+                state = current
+                for directory in sorted(changed):
+                    result = index.sync_directory(directory)
+                    if result['added'] or result['updated'] or result['removed'] or result['failed']:
+                        print(f"🔄 {directory}: 추가 {result['added']}개, 갱신 {result['updated']}개, "
+                              f"삭제 {result['removed']}개, 실패 {result['failed']}개", file=sys.stderr)
+    except KeyboardInterrupt:
+        print("⏹️ 감시 종료", file=sys.stderr)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def cmd_search(args):
+    """라이브러리 색인에서 노드 이름/문장 검색, --ref면 사용 항목(테이블 등)을 참조하는 flow"""
+    if not Path(args.db).is_file():
+        print(f"❌ 색인이 없습니다: {args.db} (먼저 index 명령을 실행하세요)", file=sys.stderr)
+        return 2
+    try:
+        with LibraryIndex(args.db) as index:
+            if args.ref:
+                results = index.references(args.query, catalog=args.catalog, limit=args.limit)
+            else:
+                results = index.search(args.query, limit=args.limit)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    for result in results:
+        if args.json:
+            print(json.dumps(result, ensure_ascii=False))
+        elif args.ref:
+            steps = ', '.join(f"#{step_id}" for step_id in result['steps'])
+            print(f"{result['path']} [{result['catalog']}] {steps}")
+        else:
+            print(f"{result['path']} #{result['step_id']} [{result['type']}] {result['name']}: {result['snippet']}")
+    if not results:
+        print("🔍 찾은 항목이 없습니다", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='logiccanvas',
+        description='LogicCanvas 워크플로우(.flow/.json) 명령줄 도구 (GUI 불필요)'
+    )
+    sub = parser.add_subparsers(dest='command')
+    sub.required = True
+
+    p_info = sub.add_parser('info', help='워크플로우 요약 출력')
+    p_info.add_argument('paths', nargs='+', help='.flow/.json 파일 또는 폴더')
+    p_info.add_argument('--json', action='store_true', help='한 줄에 하나씩 JSON으로 출력')
+    p_info.add_argument('--flow-only', action='store_true', help='폴더에서 .flow/.zip만 찾기')
+    p_info.set_defaults(func=cmd_info)
+
+    p_list = sub.add_parser('list', help='.flow 목록 (manifest.json만 읽어 빠르게)')
+    p_list.add_argument('paths', nargs='+', help='.flow 파일 또는 폴더')
+    p_list.add_argument('--json', action='store_true', help='한 줄에 하나씩 manifest JSON으로 출력')
+    p_list.add_argument('--full', action='store_true', help='manifest가 없는 이전 파일은 전체를 읽어 요약')
+    p_list.add_argument('--thumbnails', metavar='DIR', help='썸네일(PNG)을 이 폴더에 저장')
+    p_list.set_defaults(func=cmd_list)
+
+    p_validate = sub.add_parser('validate', help='구조 오류 검사')
+    p_validate.add_argument('paths', nargs='+', help='.flow/.json 파일 또는 폴더')
+    p_validate.add_argument('-q', '--quiet', action='store_true', help='오류가 있는 파일만 출력')
+    p_validate.add_argument('--flow-only', action='store_true', help='폴더에서 .flow/.zip만 찾기')
+    p_validate.set_defaults(func=cmd_validate)
+
+    p_convert = sub.add_parser('convert', help='.flow <-> JSON 변환 / 재저장')
+    p_convert.add_argument('source', help='입력 파일 (.flow/.zip/.json)')
+    p_convert.add_argument('target', help='출력 파일 (.flow면 첨부 파일 포함)')
+    p_convert.add_argument('--plain', action='store_true', help='위치 정보(position, node_id) 제외')
+    p_convert.add_argument('--compact', action='store_true', help='들여쓰기 없이 저장')
+    p_convert.add_argument('--validate', action='store_true', help='오류가 있으면 저장하지 않음')
+    p_convert.add_argument('--json-codec', choices=sorted(CODECS), default='deflate',
+                           help='workflow.json 압축 방식 (기본: deflate)')
+    p_convert.add_argument('--level', type=int, default=6, choices=range(0, 10), metavar='0-9',
+                           help='deflate 압축 레벨 (기본: 6)')
+    p_convert.add_argument('--keep-unreferenced', action='store_true',
+                           help='어떤 단계도 참조하지 않는 첨부 파일도 그대로 포함')
+    p_convert.set_defaults(func=cmd_convert)
+
+    p_compact = sub.add_parser('compact', help='참조하지 않는 첨부 파일 제거 (.flow 제자리 정리)')
+    p_compact.add_argument('paths', nargs='+', help='.flow 파일 또는 폴더')
+    p_compact.add_argument('-n', '--dry-run', action='store_true', help='제거할 항목만 출력하고 파일은 그대로 둠')
+    p_compact.add_argument('-v', '--verbose', action='store_true', help='제거한 항목 목록 출력')
+    p_compact.set_defaults(func=cmd_compact)
+
+    p_dataset = sub.add_parser('dataset', help='.flow 폴더 -> 학습 데이터셋 JSONL 샤드 (중단 후 이어서 실행 가능)')
+    p_dataset.add_argument('paths', nargs='+', help='.flow 파일 또는 폴더')
+    p_dataset.add_argument('-o', '--output', required=True, help='출력 폴더 (part-NNNNN.jsonl + checkpoint.json)')
+    p_dataset.add_argument('-j', '--workers', type=int, default=None, help='작업 프로세스 수 (기본: CPU 수)')
+    p_dataset.add_argument('--shard-records', type=int, default=DEFAULT_SHARD_RECORDS,
+                           help=f'샤드 하나의 최대 레코드 수 (기본: {DEFAULT_SHARD_RECORDS})')
+    p_dataset.add_argument('--records', choices=RECORD_MODES, default='flow',
+                           help='레코드 단위: flow(파일 하나) / paths(트리거 -> 결론 추론 경로 하나) (기본: flow)')
+    p_dataset.add_argument('--max-paths', type=int, default=DEFAULT_MAX_PATHS,
+                           help=f'--records paths: flow당 최대 경로 수, 넘으면 고르게 샘플링 (기본: {DEFAULT_MAX_PATHS})')
+    p_dataset.add_argument('--cache', default=str(DEFAULT_DATASET_CACHE_DIR), metavar='DIR',
+                           help='내보내기 캐시 폴더 - 바뀌지 않은 flow는 다시 변환하지 않음 (기본: cache/dataset)')
+    p_dataset.add_argument('--no-cache', action='store_true', help='내보내기 캐시를 쓰지 않고 모두 변환')
+    p_dataset.add_argument('--dedup', type=float, nargs='?', const=DEFAULT_THRESHOLD, default=None,
+                           metavar='THRESHOLD',
+                           help=f'거의 같은 flow 묶음에서 대표 하나만 내보냄 (유사도 기준, 기본: {DEFAULT_THRESHOLD})')
+    p_dataset.add_argument('--rebuild', action='store_true',
+                           help='중단된 이전 실행을 이어 가지 않고 처음부터 다시 만듦')
+    p_dataset.add_argument('-q', '--quiet', action='store_true', help='진행 상황 출력 안 함')
+    p_dataset.set_defaults(func=cmd_dataset)
+
+    fields = sorted({field for names in DEFAULT_FIELDS.values() for field in names})
+    p_similar = sub.add_parser('similar', help='비슷한 판단 조건 / 결론을 가진 기존 단계 검색 (TF-IDF)')
+    p_similar.add_argument('paths', nargs='+', help='.flow 파일 또는 폴더')
+    p_similar.add_argument('-q', '--query', required=True, help='찾을 문장')
+    p_similar.add_argument('-k', type=int, default=DEFAULT_TOP_K, help=f'결과 수 (기본: {DEFAULT_TOP_K})')
+    p_similar.add_argument('--field', action='append', choices=fields,
+                           help='이 필드의 문장만 검색 (여러 번 지정 가능, 기본: 전체)')
+    p_similar.add_argument('--index', metavar='FILE', help='색인 파일 (.npz) - 파일이 바뀌지 않았으면 재사용')
+    p_similar.add_argument('--json', action='store_true', help='한 줄에 하나씩 JSON으로 출력')
+    p_similar.set_defaults(func=cmd_similar)
+
+    p_patterns = sub.add_parser('patterns', help='여러 flow에 반복되는 조사 조각(부분 그래프) 찾기')
+    p_patterns.add_argument('paths', nargs='+', help='.flow 파일 또는 폴더')
+    p_patterns.add_argument('--max-nodes', type=int, default=DEFAULT_MAX_NODES,
+                            help=f'패턴 최대 노드 수 (기본: {DEFAULT_MAX_NODES})')
+    p_patterns.add_argument('--min-support', type=int, default=DEFAULT_MIN_SUPPORT,
+                            help=f'최소 지지도 - 패턴이 나온 flow 수 (기본: {DEFAULT_MIN_SUPPORT})')
+    p_patterns.add_argument('--all', action='store_true',
+                            help='더 큰 패턴과 같은 flow들에만 나오는 작은 패턴도 모두 출력')
+    p_patterns.add_argument('--top', type=int, default=30, help='출력할 패턴 수 (기본: 30)')
+    p_patterns.add_argument('-o', '--output', help='전체 패턴을 JSONL로 저장 (나온 flow 목록 포함)')
+    p_patterns.add_argument('-j', '--workers', type=int, default=None, help='작업 프로세스 수 (기본: CPU 수)')
+    p_patterns.add_argument('-q', '--quiet', action='store_true', help='진행 상황 출력 안 함')
+    p_patterns.set_defaults(func=cmd_patterns)
+
+    p_dedup = sub.add_parser('dedup', help='거의 같은 flow(조금만 고친 복사본) 찾기 (WL 해시 + MinHash/LSH)')
+    p_dedup.add_argument('paths', nargs='+', help='.flow 파일 또는 폴더')
+    p_dedup.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                         help=f'같은 묶음으로 볼 최소 유사도 0~1 (기본: {DEFAULT_THRESHOLD})')
+    p_dedup.add_argument('--json', action='store_true', help='묶음마다 한 줄씩 JSON으로 출력')
+    p_dedup.add_argument('-j', '--workers', type=int, default=None, help='작업 프로세스 수 (기본: CPU 수)')
+    p_dedup.add_argument('-q', '--quiet', action='store_true', help='진행 상황 출력 안 함')
+    p_dedup.set_defaults(func=cmd_dedup)
+
+    p_index = sub.add_parser('index', help='라이브러리 색인(SQLite) 만들기 / 바뀐 파일만 갱신')
+    p_index.add_argument('paths', nargs='+', help='.flow 파일 또는 폴더')
+    p_index.add_argument('--db', default=str(DEFAULT_LIBRARY_DB), metavar='FILE',
+                         help='색인 파일 (기본: cache/library.sqlite)')
+    p_index.add_argument('--keep-missing', action='store_true', help='폴더에서 사라진 파일도 색인에 남겨 둠')
+    p_index.add_argument('--watch', action='store_true', help='색인 후 폴더를 감시하며 바뀐 파일을 계속 반영 (Ctrl+C로 종료)')
+    p_index.add_argument('--interval', type=float, default=1.0, help='--watch: 폴더 확인 간격(초) (기본: 1)')
+    p_index.add_argument('-q', '--quiet', action='store_true', help='진행 상황 출력 안 함')
+    p_index.set_defaults(func=cmd_index)
+
+    p_search = sub.add_parser('search', help='라이브러리 색인에서 노드 이름/문장 전체 검색')
+    p_search.add_argument('query', help='검색어 (공백으로 구분한 단어가 모두 들어 있는 노드)')
+    p_search.add_argument('--db', default=str(DEFAULT_LIBRARY_DB), metavar='FILE',
+                          help='색인 파일 (기본: cache/library.sqlite)')
+    p_search.add_argument('--ref', action='store_true',
+                          help='검색어를 사용 항목 이름(예: TB_EQP_ALARM)으로 보고 참조하는 flow 찾기')
+    p_search.add_argument('--catalog', choices=sorted({c for keys in CATALOG_KEYS.values() for c, _key in keys}),
+                          help='--ref: 이 분류의 사용 항목만')
+    p_search.add_argument('-n', '--limit', type=int, default=SEARCH_LIMIT, help=f'결과 수 (기본: {SEARCH_LIMIT})')
+    p_search.add_argument('--json', action='store_true', help='한 줄에 하나씩 JSON으로 출력')
+    p_search.set_defaults(func=cmd_search)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,8 +6,9 @@ import os
 import shutil
 import zipfile
 import tempfile
+import threading
 import atexit
-import uuid
+import hashlib
 from pathlib import Path
 from PySide2 import QtWidgets, QtCore, QtGui
 from NodeGraphQt import NodeGraph
@@ -33,6 +34,32 @@ from nodes import (
     LoopNode,
     ConclusionNode
 )
+from attachment_store import AttachmentStore, attachment_key, referenced_keys
+from dirty_tracker import DirtyTracker
+from edit_journal import (
+    COMPACTION_INTERVAL, EditJournal, find_orphan_journals, remove_journal, replay_journal, state_from_snapshot,
+)
+from extraction_cache import ExtractionCache, cache_limit_from_env
+from flow_archive import (
+    WORKFLOW_JSON_NAME,
+    DEFAULT_COMPRESSION_POLICY,
+    compressed_sizes,
+    copy_raw_entry,
+    iter_with_progress,
+    workflow_json_digest,
+    write_workflow_entry,
+    write_workflow_json,
+)
+from flow_workers import run_flow_task
+from flow_manifest import ManifestBuilder, manifest_attachment_hashes, write_manifest_entries
+from flow_model import DEFAULT_DESCRIPTION, DEFAULT_WORKFLOW_NAME, FlowDocument, WorkflowValidationError, open_flow
+from graph_batch import BulkConstruction
+from graph_snapshot import build_snapshot
+from library_index import LibraryIndex
+from library_watcher import LibraryWatcher
+from node_schema import COPY_PROPERTIES, NODE_IDENTIFIER, codec_for_node_type, codec_for_step
+from reasoning_paths import DEFAULT_MAX_PATHS, ReasoningGraph
+from similarity_index import DEFAULT_FIELDS, DEFAULT_TOP_K, SimilarityIndex
 
 
 def ensure_attached_file_property(node):
@@ -66,10 +93,14 @@ def set_attached_file(node, value):
     try:
         path_obj = Path(value)
         if path_obj.is_absolute() and path_obj.exists():
-            unique_name = f"{path_obj.stem}_{uuid.uuid4().hex[:8]}{path_obj.suffix}"
-            dest_path = attachments_dir / unique_name
-            shutil.copy2(path_obj, dest_path)
-            value = (ATTACHMENTS_VIRTUAL_ROOT / dest_path.name).as_posix()
+            # 내용 주소로 복사 (같은 파일이 이미 첨부되어 있으면 그 파일을 함께 참조)
+            value = (ATTACHMENTS_VIRTUAL_ROOT / attachment_store.add_file(path_obj)).as_posix()
+        elif value and not path_obj.is_absolute():
+            # 이전 버전 파일에서 같은 내용이 다른 이름으로 여러 번 저장된 경우 하나만 참조
+            key = attachment_key(path_obj.as_posix())
+            canonical = attachment_store.canonical_key(key)
+            if canonical != key:
+                value = (ATTACHMENTS_VIRTUAL_ROOT / canonical).as_posix()
     except Exception as e:
         print(f"⚠️ 첨부 파일 복사 실패: {e}")
 
@@ -97,14 +128,45 @@ def get_attached_file(node):
     return getattr(node, '_attached_file_path', '')
 
 
+# 편집 저널 / 추출 캐시를 두는 폴더 (EXE와 같은 폴더 / 개발 시 소스 폴더)
+APP_DATA_DIR = Path.cwd() if getattr(sys, 'frozen', False) else Path(__file__).parent
+
+# 추출 캐시: .flow에서 꺼낸 첨부 파일을 sha256으로 보관 (다시 열 때 재사용, 인스턴스 간 공유)
+# 크기 상한은 환경 변수 SDC_LOGICCANVAS_CACHE_MB로 바꿀 수 있음 (기본 2GB, 0이면 캐시 사용 안 함)
+EXTRACTION_CACHE_DIR = APP_DATA_DIR / 'cache'
+EXTRACTION_CACHE_MAX_BYTES = cache_limit_from_env()
+extraction_cache = (
+    ExtractionCache(EXTRACTION_CACHE_DIR, EXTRACTION_CACHE_MAX_BYTES) if EXTRACTION_CACHE_MAX_BYTES else None
+)
+
 ATTACHMENTS_VIRTUAL_ROOT = Path('attachments')
 attachments_dir = Path(tempfile.mkdtemp(prefix='sdc_logiccanvas_attachments_'))
+attachment_store = AttachmentStore(attachments_dir, cache=extraction_cache)
+dirty_tracker = DirtyTracker()
+
+# 불러올 때 노드/연결마다 로그를 출력하는 최대 step 수
+LOAD_LOG_LIMIT = 200
 APP_ICON_PATH = (Path(__file__).parent / 'icon.png').resolve()
+
+# 편집 저널 폴더
+JOURNAL_DIR = APP_DATA_DIR / 'recovery'
+
+# 유사 단계 검색 색인 (라이브러리 폴더의 판단 조건 / 결론 TF-IDF, 다시 실행해도 재사용)
+SIMILARITY_INDEX_PATH = APP_DATA_DIR / 'cache' / 'similarity.npz'
+# 입력을 멈추고 이 시간(ms)이 지나면 검색
+SIMILARITY_SEARCH_DELAY_MS = 150
+# 라이브러리 전체 검색 색인 (SQLite, 명령줄 index / search와 같은 형식)
+LIBRARY_INDEX_PATH = APP_DATA_DIR / 'cache' / 'library.sqlite'
+LIBRARY_SEARCH_DELAY_MS = 150
+# 마지막으로 불러온 워크플로우의 step id -> 노드 (검색 결과의 노드로 이동할 때 사용)
+loaded_nodes = {}
+edit_journal = EditJournal(JOURNAL_DIR)
 print(f"✅ 임시 첨부 폴더 준비 완료: {attachments_dir}")
 
 
 def clear_attachments_dir():
-    """임시 첨부 폴더 비우기."""
+    """임시 첨부 폴더 비우기 (지연 추출 대상 아카이브도 해제)."""
+    attachment_store.detach_archive()
     try:
         attachments_dir.mkdir(parents=True, exist_ok=True)
         for child in attachments_dir.iterdir():
@@ -116,19 +178,20 @@ def clear_attachments_dir():
         print(f"⚠️ 첨부 폴더 정리 실패: {e}")
 
 
-def resolve_attachment_path(path_str):
-    """노드 속성에 저장된 첨부 경로를 실제 파일 경로로 변환."""
+def resolve_attachment_path(path_str, materialize=True):
+    """
+    노드 속성에 저장된 첨부 경로를 실제 파일 경로로 변환.
+    materialize=True면 아직 추출하지 않은 첨부를 열린 .flow 파일에서 이 시점에 추출합니다.
+    """
     if not path_str:
         return None
     path = Path(path_str)
     if path.is_absolute():
         return path
-    parts = path.parts
-    if parts and parts[0] == ATTACHMENTS_VIRTUAL_ROOT.name:
-        relative = Path(*parts[1:]) if len(parts) > 1 else Path()
-    else:
-        relative = path
-    return (attachments_dir / relative).resolve()
+    key = attachment_key(path.as_posix())
+    if materialize and attachment_store.is_pending(key):
+        return attachment_store.materialize(key)
+    return attachment_store.local_path(key)
 
 
 class ResizeHandle(QtWidgets.QWidget):
@@ -660,560 +723,296 @@ def apply_dark_theme(app):
 atexit.register(lambda: shutil.rmtree(attachments_dir, ignore_errors=True))
 
 
-def build_workflow_data(graph):
-    """그래프를 JSON 직렬화 가능한 dict로 변환"""
-    workflow_data = {
-        "workflow_name": "물류_반송_분석_가이드",
-        "description": "전문가 노하우를 구조화한 AI 학습용 워크플로우",
-        "steps": []
+def workflow_header():
+    """workflow.json에서 "steps" 앞에 오는 최상위 키"""
+    return {
+        "workflow_name": DEFAULT_WORKFLOW_NAME,
+        "description": DEFAULT_DESCRIPTION,
     }
-    
-    # 모든 노드 수집
-    nodes = graph.all_nodes()
-    
-    # 노드 ID를 키로 하는 딕셔너리 생성
-    node_dict = {}
-    step_id_counter = 1  # step_id는 1부터 시작
-    for node in nodes:
-        # node.id는 속성이지 메서드가 아님 (에러: 'str' object is not callable)
-        node_id = node.id  # node.id()가 아니라 node.id (속성)
-        
-        # node.name도 속성일 수 있음
-        node_name = node.name if isinstance(node.name, str) else (node.name() if callable(node.name) else str(node.name))
-        
-        node_dict[node_id] = {
-            'node': node,
-            'id': step_id_counter,  # 고유한 step_id 부여
-            'type': getattr(node, 'type_', 'unknown'),
-            'name': node_name
-        }
-        step_id_counter += 1  # 다음 step_id 준비
-    
+
+
+def build_workflow_data(graph, snapshot=None):
+    """그래프를 JSON 직렬화 가능한 dict로 변환 (그래프 스냅샷 기반, O(N + E))"""
+    if snapshot is None:
+        snapshot = build_snapshot(graph, attachment_getter=get_attached_file)
+    workflow_data = workflow_header()
+    workflow_data["steps"] = list(iter_workflow_steps(snapshot))
+    return workflow_data
+
+
+def iter_workflow_steps(snapshot, include_layout=True):
+    """스냅샷에서 step dict를 하나씩 생성 (스트리밍 저장용, step_id는 인덱스 + 1)"""
     # 각 노드를 순회하며 JSON 구조 생성
-    for node_id, node_info in node_dict.items():
-        node = node_info['node']
-        
-        # 노드 위치 정보 가져오기
-        pos_x, pos_y = 0, 0
-        try:
-            # 방법 1: 그래프에서 직접 위치 가져오기
-            try:
-                graph_pos = graph.get_node_pos(node)
-                if graph_pos and len(graph_pos) >= 2:
-                    pos_x, pos_y = float(graph_pos[0]), float(graph_pos[1])
-                    print(f"  📍 위치 (graph): {node_info['name']} = [{pos_x}, {pos_y}]")
-            except:
-                pass
-            
-            # 방법 2: 노드의 pos 속성/메서드
-            if pos_x == 0 and pos_y == 0:
-                try:
-                    if hasattr(node, 'pos'):
-                        pos = node.pos
-                        if callable(pos):
-                            pos = pos()
-                        if isinstance(pos, (list, tuple)) and len(pos) >= 2:
-                            pos_x, pos_y = float(pos[0]), float(pos[1])
-                            print(f"  📍 위치 (node.pos): {node_info['name']} = [{pos_x}, {pos_y}]")
-                except:
-                    pass
-            
-            # 방법 3: x_pos, y_pos 속성/메서드
-            if pos_x == 0 and pos_y == 0:
-                try:
-                    if hasattr(node, 'x_pos'):
-                        if callable(node.x_pos):
-                            pos_x = float(node.x_pos())
-                            pos_y = float(node.y_pos())
-                        else:
-                            pos_x = float(node.x_pos)
-                            pos_y = float(node.y_pos)
-                        print(f"  📍 위치 (x_pos/y_pos): {node_info['name']} = [{pos_x}, {pos_y}]")
-                except:
-                    pass
-                    
-        except Exception as e:
-            print(f"⚠️ 위치 정보 가져오기 오류 ({node_info['name']}): {e}")
+    for idx, node_id in enumerate(snapshot.ids):
+        node_name = snapshot.names[idx]
+        node_type = snapshot.types[idx]
+        props = snapshot.properties[idx]
         
-        if pos_x == 0 and pos_y == 0:
-            print(f"  ⚠️ 위치 정보를 찾을 수 없음: {node_info['name']}")
+        # 노드 위치 정보
+        pos = snapshot.positions[idx]
+        if pos is None:
+            if include_layout:
+                print(f"  ⚠️ 위치 정보를 찾을 수 없음: {node_name}")
+            pos = [0, 0]
         
         step = {
-            "id": node_info['id'],
-            "name": node_info['name'],
-            "type": node_info['type'],
-            "position": [pos_x, pos_y],  # 위치 정보 저장
+            "id": idx + 1,
+            "name": node_name,
+            "type": node_type,
+            "position": [pos[0], pos[1]],  # 위치 정보 저장
             "node_id": node_id,  # 원본 노드 ID 저장 (연결 복원용)
             "connections": []  # 연결 정보 저장
         }
+        if not include_layout:
+            del step['position'], step['node_id']
         
         # 파일 첨부 정보 저장
-        attached_file = get_attached_file(node) or ''
+        attached_file = snapshot.attachments[idx]
         if attached_file:
             step['attached_file'] = attached_file
         
-        # 노드의 출력 포트에서 연결 정보 수집
-        try:
-            output_ports = node.output_ports()
-            for port_idx, port in enumerate(output_ports):
-                connected_ports = port.connected_ports()
-                for connected_port in connected_ports:
-                    connected_node = connected_port.node()
-                    if connected_node:
-                        connected_node_id = connected_node.id
-                        # 연결된 노드의 ID를 찾기
-                        for cid, cinfo in node_dict.items():
-                            if cinfo['node'] == connected_node:
-                                step['connections'].append({
-                                    "from_port": port_idx,
-                                    "from_port_name": port.name(),
-                                    "to_node_id": cid,
-                                    "to_node_step_id": cinfo['id']
-                                })
-                                break
-        except Exception as e:
-            print(f"⚠️ 연결 정보 수집 오류 ({node_info['name']}): {e}")
+        # 노드의 출력 포트에서 연결 정보 수집 (인접 리스트 사용)
+        for port_idx, targets in enumerate(snapshot.outputs[idx]):
+            for to_idx, _to_port in targets:
+                step['connections'].append({
+                    "from_port": port_idx,
+                    "from_port_name": snapshot.output_names[idx][port_idx],
+                    "to_node_id": snapshot.ids[to_idx],
+                    "to_node_step_id": to_idx + 1
+                })
         
-        # 노드 타입별로 속성 추출
-        if 'TriggerSourceNode' in node_info['type']:
-            step['type'] = 'trigger_source'
-            step['trigger_source'] = node.get_property('trigger_source') or ''
-            step['note'] = node.get_property('note') or ''
-            
-        elif 'TriggerNode' in node_info['type']:
-            step['type'] = 'trigger'
-            step['situation'] = node.get_property('situation') or ''
-            step['situation_type'] = node.get_property('situation_type') or ''
-            step['instruction'] = f"상황: {step['situation']} - 이 상황이 발생했을 때 분석을 시작하세요."
-            
-        elif 'DataQueryNode' in node_info['type']:
-            step['type'] = 'observation'
-            step['table'] = node.get_property('target_table') or ''
-            step['column'] = node.get_property('target_col') or ''
-            step['instruction'] = node.get_property('instruction') or f"{step['table']} 테이블에서 {step['column']} 컬럼을 확인하세요."
-            
-        elif 'TableNode' in node_info['type']:
-            step['type'] = 'table'
-            step['target_table'] = node.get_property('target_table') or ''
-            step['target_columns'] = node.get_property('target_columns') or ''
-            
-        elif 'ScreenNode' in node_info['type']:
-            step['type'] = 'screen'
-            step['screen_name'] = node.get_property('screen_name') or ''
-            step['screen_url'] = node.get_property('screen_url') or ''
-            step['screen_elements'] = node.get_property('screen_elements') or ''
-            
-        elif 'SQLNode' in node_info['type']:
-            step['type'] = 'sql'
-            step['sql_query'] = node.get_property('sql_query') or ''
-            step['sql_description'] = node.get_property('sql_description') or ''
-            
-        elif 'LogNode' in node_info['type']:
-            step['type'] = 'log'
-            step['log_source'] = node.get_property('log_source') or ''
-            step['log_path'] = node.get_property('log_path') or ''
-            step['log_pattern'] = node.get_property('log_pattern') or ''
-            
-        elif 'DecisionNode' in node_info['type']:
-            step['type'] = 'reasoning'
-            step['condition'] = node.get_property('condition') or ''
-            step['reasoning'] = node.get_property('reasoning') or ''
-            step['instruction'] = f"조건: {step['condition']} - {step['reasoning']}"
-                
-        elif 'LoopNode' in node_info['type']:
-            step['type'] = 'loop'
-            step['target'] = node.get_property('target') or ''
-            step['exit_condition'] = node.get_property('exit_condition') or ''
-            
-        elif 'ConclusionNode' in node_info['type']:
-            step['type'] = 'conclusion'
-            step['conclusion'] = node.get_property('conclusion') or ''
-            step['conclusion_type'] = node.get_property('conclusion_type') or ''
-            step['instruction'] = f"결론: {step['conclusion']}"
+        # 노드 타입별로 속성 추출 (node_schema.py 선언에서 컴파일된 코덱, 모르는 타입은 type 그대로)
+        codec = codec_for_node_type(node_type)
+        if codec is not None:
+            codec.encode(step, props)
         
-        workflow_data['steps'].append(step)
+        yield step
 
-    return workflow_data
+
+def validate_graph(graph, snapshot=None):
+    """현재 그래프의 구조 오류/경고 목록 반환 (스냅샷 기반)"""
+    if snapshot is None:
+        snapshot = build_snapshot(graph, attachment_getter=get_attached_file)
+    doc = FlowDocument.from_dict(build_workflow_data(graph, snapshot=snapshot))
+    problems = doc.validate()
+    for idx in snapshot.isolated_indices():
+        problems.append(f"step {idx + 1}: 연결되지 않은 노드 '{snapshot.names[idx]}'")
+    return problems
+
+
+def journal_state(graph):
+    """현재 그래프를 편집 저널 snapshot 상태로 변환"""
+    snapshot = build_snapshot(graph, attachment_getter=get_attached_file)
+    return state_from_snapshot(snapshot, work_dir=attachments_dir, archive=attachment_store.archive_path)
+
+
+def checkpoint_journal(graph):
+    """편집 저널을 현재 그래프 상태 한 줄로 압축"""
+    if edit_journal.is_running:
+        edit_journal.compact(journal_state(graph))
 
 
-def export_to_json(graph, filename='workflow_export.json'):
+def export_to_json(graph, filename='workflow_export.json', compact=False, policy=None):
     """
     그래프를 AI 학습용 JSON 형식으로 내보내기
+    step을 만드는 즉시 ZIP의 workflow.json 항목에 스트리밍으로 압축 기록합니다.
+    compact=True면 들여쓰기 없이 저장합니다.
+    policy: 항목별 압축 방식 (기본: 이미 압축된 첨부 파일은 저장만)
+    증분 저장: 마지막 저장 이후 바뀌지 않은 workflow.json / 첨부 파일은
+    이전 .flow 파일의 압축된 바이트를 그대로 복사합니다.
+    반환값: workflow 헤더 + step_count
     """
-    workflow_data = build_workflow_data(graph)
+    snapshot = build_snapshot(graph, attachment_getter=get_attached_file)
+    return save_snapshot(snapshot, filename, compact=compact, policy=policy, revision=dirty_tracker.revision)
+
+
+def save_snapshot(snapshot, filename, compact=False, policy=None, revision=None, progress=None):
+    """
+    (작업 스레드에서 실행 가능) 그래프 스냅샷을 .flow 파일로 저장
+    노드/위젯에 접근하지 않고 스냅샷만 사용합니다.
+    progress(done, total, label)가 예외를 던지면 저장을 중단하고 기존 파일은 그대로 둡니다.
+    """
+    indent = None if compact else 2
+    json_options = (indent, (policy or DEFAULT_COMPRESSION_POLICY).for_json())
 
     # ZIP 파일로 저장 (JSON + attachments 폴더) - .flow 확장자 사용
     flow_filename = filename
     if not flow_filename.endswith('.flow'):
         # 확장자를 .flow로 변경
         flow_filename = filename.rsplit('.', 1)[0] + '.flow'
-    
-    with zipfile.ZipFile(flow_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        # JSON 파일을 ZIP에 추가
-        json_content = json.dumps(workflow_data, ensure_ascii=False, indent=2)
-        zipf.writestr('workflow.json', json_content.encode('utf-8'))
-        
-        # attachments 폴더의 모든 파일을 ZIP에 추가
-        if attachments_dir.exists():
-            for file_path in attachments_dir.rglob('*'):
-                if file_path.is_file():
-                    rel_path = file_path.relative_to(attachments_dir)
-                    arcname = ATTACHMENTS_VIRTUAL_ROOT / rel_path
-                    zipf.write(file_path, str(arcname).replace('\\', '/'))
-                    print(f"  📎 첨부 파일 추가: {arcname}")
+
+    # manifest.json / thumbnail.png 요약은 step을 기록(또는 해시)하며 함께 모음
+    manifest = ManifestBuilder(workflow_header())
+
+    # 변경이 없다고 기록되어 있어도 해시로 한 번 더 확인 (압축 없이 계산하므로 빠름)
+    source_json = None
+    json_digest = None
+    if dirty_tracker.can_reuse_json(json_options) and attachment_store.archive_path is not None:
+        steps = iter_with_progress(
+            manifest.observe(iter_workflow_steps(snapshot)), len(snapshot), progress, '변경 여부 확인'
+        )
+        json_digest = workflow_json_digest(workflow_header(), steps, indent=indent)
+        if json_digest == dirty_tracker.saved_digest:
+            with zipfile.ZipFile(attachment_store.archive_path, 'r') as src_zip:
+                source_json = src_zip.getinfo(WORKFLOW_JSON_NAME)
+
+    # 열린 .flow 파일에 덮어쓸 수 있으므로 (추출하지 않은 첨부를 원본에서 읽어야 함)
+    # 임시 파일에 먼저 쓰고 완료되면 교체 (저장하는 스레드마다 다른 이름)
+    flow_path = Path(flow_filename)
+    tmp_filename = str(flow_path.with_name(f".{flow_path.name}.{os.getpid()}.{threading.get_ident()}.part"))
+    try:
+        with zipfile.ZipFile(tmp_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            if source_json is not None:
+                copy_raw_entry(attachment_store.archive_path, source_json, zipf)
+                step_count = len(snapshot)
+                print(f"  📄 변경 없음: {WORKFLOW_JSON_NAME} 재사용")
+            else:
+                # JSON 파일을 ZIP에 스트리밍으로 추가 (전체 문자열을 만들지 않음)
+                digest = hashlib.sha256()
+                steps = iter_with_progress(
+                    manifest.observe(iter_workflow_steps(snapshot)), len(snapshot), progress, WORKFLOW_JSON_NAME
+                )
+                step_count = write_workflow_entry(
+                    zipf, workflow_header(), steps, indent=indent, policy=policy, digest=digest
+                )
+                json_digest = digest.hexdigest()
+            
+            # 노드가 참조하는 첨부 파일만 ZIP에 추가 (교체/삭제된 노드가 남긴 파일은 제외)
+            # (바뀐 파일만 스레드 풀에서 병렬 압축 / PNG·JPG·PDF 등은 압축 없이 저장 /
+            #  바뀌지 않았거나 한 번도 열지 않은 첨부는 이전 .flow에서 그대로 복사)
+            unchanged = 0
+            referenced = referenced_keys(snapshot.attachments)
+            for arcname, method in attachment_store.write_to(zipf, policy, progress=progress, referenced=referenced):
+                if method in ('reused', 'copied'):
+                    unchanged += 1
+                else:
+                    print(f"  📎 첨부 파일 추가 ({'저장' if method == 'stored' else '압축'}): {arcname}")
+            if unchanged:
+                print(f"  📎 바뀌지 않은 첨부 파일 {unchanged}개 재사용")
+            orphans = attachment_store.orphans
+            # 제외한 첨부가 원본 .flow에서 차지하던 압축된 크기 (교체 전에 읽음, 저장하지 않은 첨부는 0)
+            orphan_reclaimed = 0
+            if orphans and attachment_store.archive_path is not None:
+                orphan_reclaimed = sum(compressed_sizes(attachment_store.archive_path, orphans).values())
+            if orphans:
+                print(f"  🧹 참조하는 노드가 없는 첨부 파일 {len(orphans)}개 제외 ({sum(orphans.values()):,} bytes)")
+            
+            # 파일 목록/CLI가 workflow.json을 풀지 않고 읽을 요약 + 썸네일
+            write_manifest_entries(zipf, manifest, json_digest, attachment_store.written_entries)
+        os.replace(tmp_filename, flow_filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+    attachment_store.commit_save(flow_filename)
+    dirty_tracker.mark_saved(json_digest, json_options, revision)
+    edit_journal.record('archive', path=str(Path(flow_filename).resolve()))
     
     print(f"✅ 워크플로우가 '{flow_filename}' 파일로 저장되었습니다!")
-    print(f"📊 총 {len(workflow_data['steps'])}개의 단계가 포함되었습니다.")
+    print(f"📊 총 {step_count}개의 단계가 포함되었습니다.")
     print(f"📦 워크플로우 파일에는 JSON과 첨부 파일들이 모두 포함되어 있습니다.")
     
-    return workflow_data
+    result = workflow_header()
+    result['step_count'] = step_count
+    result['orphan_count'] = len(orphans)
+    result['orphan_bytes'] = sum(orphans.values())
+    result['orphan_reclaimed'] = orphan_reclaimed
+    return result
 
 
-def export_to_plain_json(graph, filename='workflow_export.json'):
-    """노드 위치를 제외한 JSON을 단독으로 저장"""
-    data = build_workflow_data(graph)
-    plain = {
-        "workflow_name": data.get("workflow_name"),
-        "description": data.get("description"),
-        "steps": []
-    }
-    for step in data.get("steps", []):
-        plain_step = {k: v for k, v in step.items() if k not in {'position', 'node_id'}}
-        plain["steps"].append(plain_step)
+def export_to_plain_json(graph, filename='workflow_export.json', compact=False):
+    """노드 위치를 제외한 JSON을 단독으로 저장 (스트리밍 기록, 반환값: 헤더 + step_count)"""
+    snapshot = build_snapshot(graph, attachment_getter=get_attached_file)
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(plain, f, ensure_ascii=False, indent=2)
+        with open(filename, 'wb') as f:
+            step_count = write_workflow_json(
+                f, workflow_header(), iter_workflow_steps(snapshot, include_layout=False),
+                indent=None if compact else 2
+            )
         print(f"✅ JSON 내보내기 완료: {filename}")
-        return plain
+        result = workflow_header()
+        result['step_count'] = step_count
+        return result
     except Exception as e:
         print(f"❌ JSON 파일 저장 실패: {e}")
         raise
 
 
-def load_from_json(graph, filename):
+def export_reasoning_paths(graph, filename, max_paths=DEFAULT_MAX_PATHS):
+    """
+    트리거 -> 결론 추론 경로를 JSONL로 저장 (한 줄 = 경로 하나, reasoning_paths.py)
+    경로가 max_paths보다 많으면 고르게 샘플링합니다.
+    반환값: {'path_count': 전체 경로 수, 'written': 기록한 경로 수}
+    """
+    workflow_data = build_workflow_data(graph)
+    paths = ReasoningGraph(workflow_data['steps'])
+    head = {
+        "source": Path(filename).name,
+        "workflow_name": workflow_data['workflow_name'],
+        "description": workflow_data['description'],
+        "path_count": paths.path_count,
+    }
+    written = 0
+    with open(filename, 'w', encoding='utf-8') as f:
+        for index, path in paths.sample_paths(max_paths):
+            f.write(json.dumps(dict(head, path_index=index, trace=paths.trace(path)), ensure_ascii=False) + '\n')
+            written += 1
+    print(f"✅ 추론 경로 내보내기 완료: {filename} ({written}/{paths.path_count}개 경로)")
+    return {'path_count': paths.path_count, 'written': written}
+
+
+def load_from_json(graph, filename, opened=None, bulk=True):
     """
     ZIP 파일 또는 JSON 파일에서 워크플로우를 불러오기
-    ZIP 파일인 경우: workflow.json과 attachments 폴더를 추출
-    JSON 파일인 경우: 기존 방식대로 로드 (하위 호환성)
+    opened: open_flow() 결과 (백그라운드에서 미리 읽은 경우), 없으면 여기서 읽음
+    파일은 한 번만 읽고 파싱하며, 사용된 항목(used_items)과 첨부 목록도 그때 함께 얻습니다.
+    첨부 파일은 추출하지 않고 항목만 등록합니다 (필요할 때 하나씩 추출).
+    bulk=True면 노드 생성 동안 화면 갱신/시그널/Undo 기록을 멈추고 끝에서 한 번만 다시 그립니다.
+    구조 오류(validate_workflow_data)가 있으면 노드를 만들지 않고 오류를 모두 출력한 뒤 None 반환.
     """
+    # 불러오는 동안의 노드 생성/연결은 저널에 기록하지 않고, 끝난 뒤 snapshot 한 줄로 남김
+    edit_journal.suspended = True
     try:
+        if opened is None:
+            opened = open_flow(filename)
+        # 노드를 만들기 전에 구조 전체를 검사 (오류가 있으면 그래프를 건드리지 않음)
+        opened.check()
+        workflow_data = opened.data
         clear_attachments_dir()
-        # ZIP 파일인지 확인 (.flow 또는 .zip)
-        if filename.endswith('.flow') or filename.endswith('.zip'):
-            # ZIP 파일에서 불러오기
-            with zipfile.ZipFile(filename, 'r') as zipf:
-                # workflow.json 추출
-                if 'workflow.json' in zipf.namelist():
-                    json_content = zipf.read('workflow.json').decode('utf-8')
-                    workflow_data = json.loads(json_content)
-                else:
-                    # 하위 호환성: workflow.json이 없으면 첫 번째 JSON 파일 찾기
-                    json_files = [f for f in zipf.namelist() if f.endswith('.json')]
-                    if json_files:
-                        json_content = zipf.read(json_files[0]).decode('utf-8')
-                        workflow_data = json.loads(json_content)
-                    else:
-                        raise ValueError("ZIP 파일에 JSON 파일이 없습니다.")
-                
-                # attachments 폴더 추출
-                attachments_in_zip = [f for f in zipf.namelist() if f.startswith('attachments/')]
-                if attachments_in_zip:
-                    for file_info in attachments_in_zip:
-                        if file_info.endswith('/'):
-                            continue
-                        rel_path = Path(file_info)
-                        if rel_path.parts and rel_path.parts[0] == ATTACHMENTS_VIRTUAL_ROOT.name:
-                            rel_path = Path(*rel_path.parts[1:]) if len(rel_path.parts) > 1 else Path()
-                        dest_path = (attachments_dir / rel_path).resolve()
-                        dest_path.parent.mkdir(parents=True, exist_ok=True)
-                        with zipf.open(file_info) as source, open(dest_path, 'wb') as target:
-                            target.write(source.read())
-                        print(f"  📎 첨부 파일 복원: {file_info} -> {dest_path}")
-        else:
-            # 기존 JSON 파일 방식 (하위 호환성)
-            with open(filename, 'r', encoding='utf-8') as f:
-                workflow_data = json.load(f)
+        if opened.attachments:
+            registered = attachment_store.attach_archive(
+                filename, list(opened.attachments),
+                hashes=manifest_attachment_hashes(opened.manifest, opened.attachments),
+            )
+            print(f"  📎 첨부 파일 {registered}개 등록 (열 때 추출)")
         
         print(f"📂 워크플로우 불러오기: {filename}")
         print(f"📊 총 {len(workflow_data.get('steps', []))}개의 단계를 불러옵니다.")
+        # 노드마다 출력하는 로그는 작은 워크플로우에서만 (콘솔 출력도 불러오기 시간에 포함됨)
+        verbose = len(workflow_data.get('steps', [])) <= LOAD_LOG_LIMIT
         
-        # 기존 노드 모두 삭제
-        for node in graph.all_nodes():
-            graph.delete_node(node)
-        
-        # 노드 타입 매핑
-        node_type_map = {
-            'trigger_source': 'com.samsung.logistics.TriggerSourceNode',
-            'trigger': 'com.samsung.logistics.TriggerNode',
-            'observation': 'com.samsung.logistics.DataQueryNode',
-            'table': 'com.samsung.logistics.TableNode',
-            'screen': 'com.samsung.logistics.ScreenNode',
-            'log': 'com.samsung.logistics.LogNode',
-            'reasoning': 'com.samsung.logistics.DecisionNode',
-            'loop': 'com.samsung.logistics.LoopNode',
-            'conclusion': 'com.samsung.logistics.ConclusionNode',
-        }
-        
-        # 노드 생성 및 속성 설정
-        created_nodes = {}  # step_id -> node 매핑
-        node_id_map = {}  # 원본 node_id -> node 매핑 (연결 복원용)
-        
-        for idx, step in enumerate(workflow_data.get('steps', [])):
-            step_type = step.get('type', '')
-            node_type = node_type_map.get(step_type)
-            
-            # 만약 매핑에 없으면 원본 type 문자열에서 직접 추출 시도 (하위 호환성)
-            if not node_type:
-                # 원본 type이 전체 노드 타입 문자열인 경우
-                original_type = step.get('type', '')
-                if 'com.samsung.logistics.' in original_type:
-                    node_type = original_type
-                else:
-                    print(f"⚠️ 알 수 없는 노드 타입: {step_type}")
-                    continue
-            
-            # 저장된 위치 정보 사용 (없으면 기본 위치)
-            if 'position' in step and isinstance(step['position'], list) and len(step['position']) >= 2:
-                pos = [float(step['position'][0]), float(step['position'][1])]
-            else:
-                # 위치 정보가 없으면 가로로 배치
-                pos = [100 + idx * 400, 300]  # x는 오른쪽으로, y는 고정 (간격 증가)
-            
-            # 노드 생성
-            node = graph.create_node(node_type, name=step.get('name', f'노드 {idx+1}'), pos=pos)
-            
-            # 노드 생성 후 attached_file 속성 보장
-            ensure_attached_file_property(node)
-            
-            # 노드 생성 후 위치 재설정 (확실하게)
-            if node and 'position' in step:
-                try:
-                    graph.set_node_pos(node, pos[0], pos[1])
-                except:
-                    try:
-                        if hasattr(node, 'set_pos'):
-                            node.set_pos(pos[0], pos[1])
-                    except:
-                        pass
-            
-            if node:
-                # 노드 타입별 속성 설정
-                if step_type == 'trigger_source' or 'TriggerSourceNode' in node_type:
-                    if 'trigger_source' in step:
-                        node.set_property('trigger_source', step['trigger_source'])
-                    if 'note' in step:
-                        node.set_property('note', step['note'])
-                        
-                elif step_type == 'trigger':
-                    if 'situation' in step:
-                        node.set_property('situation', step['situation'])
-                    if 'situation_type' in step:
-                        node.set_property('situation_type', step['situation_type'])
-                        
-                elif step_type == 'observation':
-                    if 'table' in step:
-                        node.set_property('target_table', step['table'])
-                    if 'column' in step:
-                        node.set_property('target_col', step['column'])
-                    if 'instruction' in step:
-                        node.set_property('instruction', step['instruction'])
-                        
-                elif step_type == 'table' or 'TableNode' in node_type:
-                    if 'target_table' in step:
-                        node.set_property('target_table', step['target_table'])
-                    if 'target_columns' in step:
-                        node.set_property('target_columns', step['target_columns'])
-                        
-                elif step_type == 'screen' or 'ScreenNode' in node_type:
-                    if 'screen_name' in step:
-                        node.set_property('screen_name', step['screen_name'])
-                    if 'screen_url' in step:
-                        node.set_property('screen_url', step['screen_url'])
-                    if 'screen_elements' in step:
-                        node.set_property('screen_elements', step['screen_elements'])
-                        
-                elif step_type == 'sql' or 'SQLNode' in node_type:
-                    if 'sql_query' in step:
-                        node.set_property('sql_query', step['sql_query'])
-                    if 'sql_description' in step:
-                        node.set_property('sql_description', step['sql_description'])
-                        
-                elif step_type == 'log' or 'LogNode' in node_type:
-                    if 'log_source' in step:
-                        node.set_property('log_source', step['log_source'])
-                    if 'log_path' in step:
-                        node.set_property('log_path', step['log_path'])
-                    if 'log_pattern' in step:
-                        node.set_property('log_pattern', step['log_pattern'])
-                        
-                elif step_type == 'reasoning':
-                    if 'condition' in step:
-                        node.set_property('condition', step['condition'])
-                    if 'reasoning' in step:
-                        node.set_property('reasoning', step['reasoning'])
-                        
-                elif step_type == 'loop':
-                    if 'target' in step:
-                        node.set_property('target', step['target'])
-                    if 'exit_condition' in step:
-                        node.set_property('exit_condition', step['exit_condition'])
-                    # 하위 호환성: instruction이 있으면 exit_condition으로 변환
-                    elif 'instruction' in step:
-                        node.set_property('exit_condition', step['instruction'])
-                        
-                elif step_type == 'conclusion':
-                    if 'conclusion' in step:
-                        node.set_property('conclusion', step['conclusion'])
-                    if 'conclusion_type' in step:
-                        node.set_property('conclusion_type', step['conclusion_type'])
-                
-                # 파일 첨부 정보 불러오기 (모든 노드 타입에 공통)
-                if 'attached_file' in step:
-                    set_attached_file(node, step['attached_file'])
-                
-                step_id = step.get('id')
-                created_nodes[step_id] = node
-                # 원본 node_id도 저장 (연결 복원용)
-                if 'node_id' in step:
-                    node_id_map[step['node_id']] = node
-                print(f"  ✅ 노드 생성: {step.get('name', 'Unknown')} (step_id={step_id}, node_id={step.get('node_id', 'N/A')}) at {pos}")
-            else:
-                print(f"  ❌ 노드 생성 실패: {step.get('name', 'Unknown')}")
-        
-        # 노드 간 연결 복원
-        print("\n🔗 노드 연결 복원 중...")
-        connection_count = 0
-        for step in workflow_data.get('steps', []):
-            step_id = step.get('id')
-            from_node = created_nodes.get(step_id)
-            
-            if not from_node:
-                print(f"  ⚠️ 노드를 찾을 수 없음 (step_id={step_id}): {step.get('name', 'Unknown')}")
-                continue
-            
-            connections = step.get('connections', [])
-            if not connections:
-                print(f"  ℹ️ 연결 정보 없음: {step.get('name', 'Unknown')}")
-                continue
-                
-            for conn in connections:
-                try:
-                    # 연결할 대상 노드 찾기
-                    to_step_id = conn.get('to_node_step_id')
-                    to_node = created_nodes.get(to_step_id)
-                    
-                    if not to_node:
-                        # node_id로도 시도
-                        to_node_id = conn.get('to_node_id')
-                        to_node = node_id_map.get(to_node_id)
-                        if to_node:
-                            print(f"  ℹ️ node_id로 노드 찾음: {to_node_id}")
-                    
-                    if not to_node:
-                        print(f"  ⚠️ 대상 노드를 찾을 수 없음: step_id={to_step_id}, node_id={conn.get('to_node_id', 'N/A')}")
-                        continue
-                    
-                    from_port_idx = conn.get('from_port', 0)
-                    from_port_name = conn.get('from_port_name', '')
-                    
-                    # 출력 포트 찾기
-                    output_ports = from_node.output_ports()
-                    from_port = None
-                    if from_port_idx < len(output_ports):
-                        from_port = output_ports[from_port_idx]
-                    else:
-                        # 포트 이름으로 찾기
-                        for port in output_ports:
-                            if port.name() == from_port_name:
-                                from_port = port
-                                break
-                    
-                    if not from_port:
-                        print(f"  ⚠️ 출력 포트를 찾을 수 없음: {from_port_name} (idx={from_port_idx})")
-                        continue
-                    
-                    # 입력 포트 찾기 (첫 번째 입력 포트 사용)
-                    input_ports = to_node.input_ports()
-                    if not input_ports:
-                        print(f"  ⚠️ 입력 포트가 없음: {to_node.name}")
-                        continue
-                    
-                    to_port = input_ports[0]
-                    
-                    # 연결 시도
-                    try:
-                        from_port.connect_to(to_port)
-                        connection_count += 1
-                        to_node_name = to_node.name if hasattr(to_node, 'name') else str(to_node)
-                        print(f"  ✅ 연결 성공: {step.get('name')} -> {to_node_name}")
-                    except Exception as e1:
-                        try:
-                            # 대체 연결 방법
-                            from_node.set_output(from_port_idx, to_node.input(0))
-                            connection_count += 1
-                            to_node_name = to_node.name if hasattr(to_node, 'name') else str(to_node)
-                            print(f"  ✅ 연결 성공 (대체): {step.get('name')} -> {to_node_name}")
-                        except Exception as e2:
-                            print(f"  ❌ 연결 실패: {step.get('name')} -> {e1}, {e2}")
-                except Exception as e:
-                    print(f"  ⚠️ 연결 처리 오류: {e}")
-                    import traceback
-                    traceback.print_exc()
+        with BulkConstruction(graph, enabled=bulk) as builder:
+            created_nodes, connection_count = _build_nodes_from_steps(graph, builder, workflow_data, verbose)
+        loaded_nodes.clear()
+        loaded_nodes.update(created_nodes)
         
         print(f"✅ 워크플로우 불러오기 완료! ({len(created_nodes)}개 노드, {connection_count}개 연결)")
+        dirty_tracker.mark_loaded()
         
-        # 워크플로우에서 사용된 항목들 추출
-        used_items = {
-            'tables': set(),
-            'screens': set(),
-            'logs': set(),
-            'situation_types': set()
-        }
-        
-        for step in workflow_data.get('steps', []):
-            step_type = step.get('type', '')
-            
-            # 테이블 추출
-            if step_type == 'table' and 'target_table' in step:
-                table_name = step.get('target_table', '').strip()
-                if table_name:
-                    used_items['tables'].add(table_name)
-            elif step_type == 'observation' and 'table' in step:
-                table_name = step.get('table', '').strip()
-                if table_name:
-                    used_items['tables'].add(table_name)
-            
-            # 화면 추출
-            if step_type == 'screen' and 'screen_name' in step:
-                screen_name = step.get('screen_name', '').strip()
-                if screen_name:
-                    used_items['screens'].add(screen_name)
-            
-            # 로그 추출
-            if step_type == 'log' and 'log_source' in step:
-                log_name = step.get('log_source', '').strip()
-                if log_name:
-                    used_items['logs'].add(log_name)
-            
-            # 상황 유형 추출
-            if step_type == 'trigger' and 'situation_type' in step:
-                situation_type = step.get('situation_type', '').strip()
-                if situation_type:
-                    used_items['situation_types'].add(situation_type)
-        
-        # 사용된 항목들을 딕셔너리에 추가
-        workflow_data['used_items'] = {
-            'tables': list(used_items['tables']),
-            'screens': list(used_items['screens']),
-            'logs': list(used_items['logs']),
-            'situation_types': list(used_items['situation_types'])
-        }
+        # 사용된 항목들을 딕셔너리에 추가 (파일을 읽을 때 이미 수집됨)
+        workflow_data['used_items'] = {key: sorted(values) for key, values in opened.used_items.items()}
         
         return workflow_data
         
     except FileNotFoundError:
         print(f"❌ 파일을 찾을 수 없습니다: {filename}")
         return None
+    except WorkflowValidationError as e:
+        print(f"❌ 워크플로우 구조 오류 {len(e.errors)}개 - 불러오지 않았습니다: {filename}")
+        for message in e.errors[:LOAD_LOG_LIMIT]:
+            print(f"  - {message}")
+        if len(e.errors) > LOAD_LOG_LIMIT:
+            print(f"  ... 외 {len(e.errors) - LOAD_LOG_LIMIT}개")
+        return None
     except json.JSONDecodeError as e:
         print(f"❌ JSON 파싱 오류: {e}")
         return None
@@ -1222,6 +1021,210 @@ def load_from_json(graph, filename):
         import traceback
         traceback.print_exc()
         return None
+    finally:
+        edit_journal.suspended = False
+        checkpoint_journal(graph)
+
+
+def _build_nodes_from_steps(graph, builder, workflow_data, verbose=True):
+    """step 목록으로 노드 생성 + 연결 복원 (반환: step_id -> 노드, 연결 개수)"""
+    # 기존 노드 모두 삭제
+    builder.clear()
+    
+    # 노드 생성 및 속성 설정
+    created_nodes = {}  # step_id -> node 매핑
+    node_id_map = {}  # 원본 node_id -> node 매핑 (연결 복원용)
+    
+    for idx, step in enumerate(workflow_data.get('steps', [])):
+        step_type = step.get('type', '')
+        # 짧은 step type 또는 전체 노드 타입 문자열 (하위 호환성)
+        codec = codec_for_step(step_type)
+        if codec is not None:
+            node_type = codec.node_type
+        elif f"{NODE_IDENTIFIER}." in step_type:
+            node_type = step_type
+        else:
+            print(f"⚠️ 알 수 없는 노드 타입: {step_type}")
+            continue
+        
+        # 저장된 위치 정보 사용 (없으면 기본 위치)
+        if 'position' in step and isinstance(step['position'], list) and len(step['position']) >= 2:
+            pos = [float(step['position'][0]), float(step['position'][1])]
+        else:
+            # 위치 정보가 없으면 가로로 배치
+            pos = [100 + idx * 400, 300]  # x는 오른쪽으로, y는 고정 (간격 증가)
+        
+        # 노드 생성
+        node = builder.create_node(node_type, step.get('name', f'노드 {idx+1}'), pos)
+        
+        # 노드 생성 후 attached_file 속성 보장
+        ensure_attached_file_property(node)
+        
+        # 노드 생성 후 위치 재설정 (확실하게)
+        if node and 'position' in step:
+            try:
+                builder.set_position(node, pos[0], pos[1])
+            except:
+                pass
+        
+        if node:
+            # 노드 타입별 속성 설정 (스키마 코덱: step에 있는 필드와 옛 별칭만)
+            if codec is not None:
+                for prop_name, value in codec.decode(step):
+                    builder.set_property(node, prop_name, value)
+            
+            # 파일 첨부 정보 불러오기 (모든 노드 타입에 공통)
+            if 'attached_file' in step:
+                set_attached_file(node, step['attached_file'])
+            
+            step_id = step.get('id')
+            created_nodes[step_id] = node
+            # 원본 node_id도 저장 (연결 복원용)
+            if 'node_id' in step:
+                node_id_map[step['node_id']] = node
+            if verbose:
+                print(f"  ✅ 노드 생성: {step.get('name', 'Unknown')} (step_id={step_id}, node_id={step.get('node_id', 'N/A')}) at {pos}")
+        else:
+            print(f"  ❌ 노드 생성 실패: {step.get('name', 'Unknown')}")
+    
+    # 노드 간 연결 복원
+    print("\n🔗 노드 연결 복원 중...")
+    connection_count = 0
+    for step in workflow_data.get('steps', []):
+        step_id = step.get('id')
+        from_node = created_nodes.get(step_id)
+        
+        if not from_node:
+            print(f"  ⚠️ 노드를 찾을 수 없음 (step_id={step_id}): {step.get('name', 'Unknown')}")
+            continue
+        
+        connections = step.get('connections', [])
+        if not connections:
+            if verbose:
+                print(f"  ℹ️ 연결 정보 없음: {step.get('name', 'Unknown')}")
+            continue
+            
+        for conn in connections:
+            try:
+                # 연결할 대상 노드 찾기
+                to_step_id = conn.get('to_node_step_id')
+                to_node = created_nodes.get(to_step_id)
+                
+                if not to_node:
+                    # node_id로도 시도
+                    to_node_id = conn.get('to_node_id')
+                    to_node = node_id_map.get(to_node_id)
+                    if to_node:
+                        print(f"  ℹ️ node_id로 노드 찾음: {to_node_id}")
+                
+                if not to_node:
+                    print(f"  ⚠️ 대상 노드를 찾을 수 없음: step_id={to_step_id}, node_id={conn.get('to_node_id', 'N/A')}")
+                    continue
+                
+                from_port_idx = conn.get('from_port', 0)
+                from_port_name = conn.get('from_port_name', '')
+                
+                # 출력 포트 찾기
+                output_ports = from_node.output_ports()
+                from_port = None
+                if from_port_idx < len(output_ports):
+                    from_port = output_ports[from_port_idx]
+                else:
+                    # 포트 이름으로 찾기
+                    for port in output_ports:
+                        if port.name() == from_port_name:
+                            from_port = port
+                            break
+                
+                if not from_port:
+                    print(f"  ⚠️ 출력 포트를 찾을 수 없음: {from_port_name} (idx={from_port_idx})")
+                    continue
+                
+                # 입력 포트 찾기 (첫 번째 입력 포트 사용)
+                input_ports = to_node.input_ports()
+                if not input_ports:
+                    print(f"  ⚠️ 입력 포트가 없음: {to_node.name}")
+                    continue
+                
+                to_port = input_ports[0]
+                
+                # 연결 시도
+                try:
+                    builder.connect(from_port, to_port)
+                    connection_count += 1
+                    if verbose:
+                        to_node_name = to_node.name if hasattr(to_node, 'name') else str(to_node)
+                        print(f"  ✅ 연결 성공: {step.get('name')} -> {to_node_name}")
+                except Exception as e1:
+                    try:
+                        # 대체 연결 방법
+                        from_node.set_output(from_port_idx, to_node.input(0))
+                        connection_count += 1
+                        to_node_name = to_node.name if hasattr(to_node, 'name') else str(to_node)
+                        print(f"  ✅ 연결 성공 (대체): {step.get('name')} -> {to_node_name}")
+                    except Exception as e2:
+                        print(f"  ❌ 연결 실패: {step.get('name')} -> {e1}, {e2}")
+            except Exception as e:
+                print(f"  ⚠️ 연결 처리 오류: {e}")
+                import traceback
+                traceback.print_exc()
+    
+    return created_nodes, connection_count
+
+
+def restore_journal_state(graph, state):
+    """
+    비정상 종료 복구: replay_journal() 결과를 그래프에 반영
+    이전 세션의 임시 첨부 폴더가 남아 있으면 복사하고, 열려 있던 .flow의 첨부는 다시 지연 등록합니다.
+    반환값: 생성된 노드 수
+    """
+    edit_journal.suspended = True
+    try:
+        for node in graph.all_nodes():
+            graph.delete_node(node)
+        clear_attachments_dir()
+
+        old_dir = state.get('work_dir')
+        if old_dir and Path(old_dir).is_dir() and Path(old_dir).resolve() != attachments_dir.resolve():
+            shutil.copytree(old_dir, attachments_dir, dirs_exist_ok=True)
+        archive = state.get('archive')
+        if archive and Path(archive).is_file():
+            with zipfile.ZipFile(archive, 'r') as zipf:
+                names = [f for f in zipf.namelist() if f.startswith('attachments/')]
+            attachment_store.attach_archive(archive, names)
+
+        created = {}
+        for old_id, info in (state.get('nodes') or {}).items():
+            try:
+                node = graph.create_node(info.get('type'), name=info.get('name') or '', pos=info.get('pos') or [0, 0])
+            except Exception as e:
+                print(f"  ⚠️ 노드 복구 실패: {info.get('name')} ({e})")
+                continue
+            ensure_attached_file_property(node)
+            for prop_name, value in (info.get('props') or {}).items():
+                try:
+                    node.set_property(prop_name, value)
+                except Exception:
+                    pass
+            created[old_id] = node
+
+        connection_count = 0
+        for src, src_port, dst, dst_port in state.get('edges') or []:
+            from_node = created.get(src)
+            to_node = created.get(dst)
+            if not from_node or not to_node:
+                continue
+            try:
+                out_port = from_node.get_output(src_port) or from_node.output_ports()[0]
+                in_port = to_node.get_input(dst_port) or to_node.input_ports()[0]
+                out_port.connect_to(in_port)
+                connection_count += 1
+            except Exception as e:
+                print(f"  ⚠️ 연결 복구 실패: {e}")
+        print(f"✅ 편집 저널 복구 완료 ({len(created)}개 노드, {connection_count}개 연결)")
+        return len(created)
+    finally:
+        edit_journal.suspended = False
 
 
 if __name__ == '__main__':
@@ -1287,6 +1290,9 @@ if __name__ == '__main__':
     graph.register_node(LoopNode)
     graph.register_node(ConclusionNode)
 
+    # 증분 저장을 위한 변경 추적 (노드/속성/연결/이동)
+    dirty_tracker.connect_graph(graph)
+
     # 3. 통합 메인 윈도우 생성
     from PySide2.QtWidgets import QMainWindow, QDockWidget, QWidget, QVBoxLayout, QPushButton
     
@@ -2483,21 +2489,12 @@ if __name__ == '__main__':
         
         if file_path:
             try:
-                # 파일을 attachments 폴더로 복사
+                # 파일을 attachments 폴더로 복사 ('<sha256>/<파일 이름>', 같은 내용은 한 번만 저장)
                 source_path = Path(file_path)
                 file_name = source_path.name
-                # 파일명에 노드 ID 추가하여 고유하게 만들기
-                node_id = node.id if hasattr(node, 'id') else str(id(node))
-                file_stem = source_path.stem
-                file_suffix = source_path.suffix
-                unique_name = f"{file_stem}_{node_id[:8]}{file_suffix}"
-                dest_path = attachments_dir / unique_name
-                
-                # 파일 복사
-                shutil.copy2(source_path, dest_path)
+                relative_path = (ATTACHMENTS_VIRTUAL_ROOT / attachment_store.add_file(source_path)).as_posix()
                 
                 # 노드 속성에 상대 경로 저장 (attached_file 사용)
-                relative_path = (ATTACHMENTS_VIRTUAL_ROOT / unique_name).as_posix()
                 set_attached_file(node, relative_path)
                 
                 # 패널 업데이트 (즉시 및 약간의 지연 후)
@@ -2536,7 +2533,7 @@ if __name__ == '__main__':
         try:
             attached_file = get_attached_file(node) or ''
             if attached_file:
-                real_path = resolve_attachment_path(attached_file)
+                real_path = resolve_attachment_path(attached_file, materialize=False)
                 if not real_path:
                     return
                 reply = QtWidgets.QMessageBox.question(
@@ -2548,9 +2545,20 @@ if __name__ == '__main__':
                 )
                 
                 if reply == QtWidgets.QMessageBox.Yes:
-                    # 파일 삭제
-                    if real_path.exists():
-                        real_path.unlink()
+                    # 파일 삭제 (아직 추출하지 않은 첨부는 다음 저장에서 제외)
+                    # 같은 내용을 다른 노드도 참조하고 있으면 이 노드의 연결만 해제
+                    shared = any(
+                        other is not node and get_attached_file(other) == attached_file
+                        for other in graph.all_nodes()
+                    )
+                    if shared:
+                        print(f"ℹ️ 다른 노드도 사용 중인 첨부 파일이라 연결만 해제: {attached_file}")
+                    elif Path(attached_file).is_absolute():
+                        if real_path.exists():
+                            real_path.unlink()
+                    else:
+                        attachment_store.discard(attachment_key(Path(attached_file).as_posix()))
+                    if not shared:
                         print(f"✅ 파일 삭제: {real_path}")
                     
                     # 노드 속성에서 제거
@@ -2607,6 +2615,295 @@ if __name__ == '__main__':
     data_dock.setMinimumWidth(320)
     data_dock.setMinimumHeight(500)
     print("✅ 항목 관리 패널 추가 완료 (좌측 하단)")
+
+    # 유사 단계 검색 패널 (우측): 판단 조건 / 결론을 입력하는 동안 라이브러리의 비슷한 단계 표시
+    similar_panel = QWidget()
+    similar_layout = QVBoxLayout(similar_panel)
+    similar_layout.setContentsMargins(6, 6, 6, 6)
+    similar_folder_label = QtWidgets.QLabel("색인 없음 - 라이브러리 폴더를 선택하세요")
+    similar_folder_label.setWordWrap(True)
+    similar_folder_label.setStyleSheet("color: #aaa;")
+    similar_index_btn = QPushButton("📁 라이브러리 폴더 색인")
+    similar_query_edit = QtWidgets.QLineEdit()
+    similar_query_edit.setPlaceholderText("판단 조건 / 결론 검색 (노드에 입력하면 자동 검색)")
+    similar_result_list = QtWidgets.QListWidget()
+    similar_result_list.setWordWrap(True)
+    similar_result_list.setToolTip("더블클릭: 문장 복사")
+    similar_layout.addWidget(similar_folder_label)
+    similar_layout.addWidget(similar_index_btn)
+    similar_layout.addWidget(similar_query_edit)
+    similar_layout.addWidget(similar_result_list)
+
+    similar_state = {'index': None, 'query': '', 'fields': None}
+    similar_search_timer = QtCore.QTimer()
+    similar_search_timer.setSingleShot(True)
+    similar_search_timer.setInterval(SIMILARITY_SEARCH_DELAY_MS)
+    connected_similar_inputs = set()
+
+    def update_similar_folder_label():
+        index = similar_state['index']
+        if index is None:
+            similar_folder_label.setText("색인 없음 - 라이브러리 폴더를 선택하세요")
+            return
+        roots = ', '.join(Path(root).name or root for root in index.roots)
+        similar_folder_label.setText(f"📇 {roots}: 단계 문장 {len(index):,}개 ({len(index.files):,}개 파일)")
+        similar_folder_label.setToolTip('\n'.join(index.roots))
+
+    def run_similar_search():
+        similar_result_list.clear()
+        index = similar_state['index']
+        query = similar_state['query'].strip()
+        if index is None or not query:
+            return
+        for score, doc in index.search(query, k=DEFAULT_TOP_K, fields=similar_state['fields']):
+            item = QtWidgets.QListWidgetItem(f"{score:.2f}  {doc['text']}\n    └ {doc['source']} · {doc['name']}")
+            item.setData(QtCore.Qt.UserRole, doc['text'])
+            item.setToolTip(f"{doc.get('path', doc['source'])}\n단계 #{doc['step_id']} [{doc['field']}]")
+            similar_result_list.addItem(item)
+
+    def schedule_similar_search(text, fields=None):
+        similar_state['query'] = text
+        similar_state['fields'] = fields
+        similar_search_timer.start()
+
+    similar_search_timer.timeout.connect(run_similar_search)
+    similar_query_edit.textEdited.connect(lambda text: schedule_similar_search(text))
+
+    def on_similar_result_double_clicked(item):
+        QtWidgets.QApplication.clipboard().setText(item.data(QtCore.Qt.UserRole))
+        print("📋 유사 단계 문장을 클립보드에 복사했습니다")
+
+    similar_result_list.itemDoubleClicked.connect(on_similar_result_double_clicked)
+
+    def connect_similar_inputs(node):
+        """판단/결론 노드의 문장 입력칸에 입력할 때마다(같은 필드끼리) 유사 단계 검색"""
+        codec = codec_for_node_type(node.type_)
+        if codec is None or codec.step_type not in DEFAULT_FIELDS:
+            return
+        for field in DEFAULT_FIELDS[codec.step_type]:
+            try:
+                line_edit = node.get_widget(field).get_custom_widget()
+            except Exception:
+                continue
+            if id(line_edit) in connected_similar_inputs or not isinstance(line_edit, QtWidgets.QLineEdit):
+                continue
+            connected_similar_inputs.add(id(line_edit))
+            line_edit.textEdited.connect(lambda text, f=field: schedule_similar_search(text, (f,)))
+            line_edit.destroyed.connect(lambda _obj=None, key=id(line_edit): connected_similar_inputs.discard(key))
+
+    def connect_selected_similar_inputs():
+        try:
+            for node in graph.selected_nodes():
+                connect_similar_inputs(node)
+        except Exception as e:
+            print(f"⚠️ 유사 단계 검색 연결 실패: {e}")
+
+    def on_similar_index_clicked():
+        start_dir = similar_state['index'].roots[0] if similar_state['index'] and similar_state['index'].roots else ''
+        folder = QtWidgets.QFileDialog.getExistingDirectory(main_window, "라이브러리 폴더 선택 (.flow)", start_dir)
+        if not folder:
+            return
+
+        def on_indexed(index):
+            similar_state['index'] = index
+            update_similar_folder_label()
+            try:
+                SIMILARITY_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+                index.save(SIMILARITY_INDEX_PATH)
+            except OSError as e:
+                print(f"⚠️ 유사 단계 색인 저장 실패: {e}")
+            print(f"✅ 유사 단계 색인 완료: 단계 문장 {len(index)}개")
+            run_similar_search()
+
+        run_flow_task(
+            main_window,
+            "유사 단계 색인",
+            lambda task: SimilarityIndex.build([folder], progress=task.report),
+            on_indexed,
+            on_failed=lambda message: QtWidgets.QMessageBox.critical(
+                main_window, "색인 오류 ❌", f"라이브러리 색인 중 오류가 발생했습니다:\n\n{message}"
+            )
+        )
+
+    similar_index_btn.clicked.connect(on_similar_index_clicked)
+
+    if SIMILARITY_INDEX_PATH.is_file():
+        try:
+            similar_state['index'] = SimilarityIndex.load(SIMILARITY_INDEX_PATH)
+            print(f"✅ 유사 단계 색인 불러오기 완료: 단계 문장 {len(similar_state['index'])}개")
+        except Exception as e:
+            print(f"⚠️ 유사 단계 색인 불러오기 실패: {e}")
+    update_similar_folder_label()
+
+    similar_dock = QDockWidget("🔎 유사 단계", main_window)
+    similar_dock.setWidget(similar_panel)
+    similar_dock.setAllowedAreas(QtCore.Qt.LeftDockWidgetArea | QtCore.Qt.RightDockWidgetArea)
+    main_window.addDockWidget(QtCore.Qt.RightDockWidgetArea, similar_dock)
+    similar_dock.setMinimumWidth(300)
+    print("✅ 유사 단계 검색 패널 추가 완료 (우측)")
+
+    # 라이브러리 검색 패널 (우측): 모든 flow의 노드 이름/문장을 SQLite 색인으로 검색, 더블클릭하면 그 노드로 열기
+    library_panel = QWidget()
+    library_layout = QVBoxLayout(library_panel)
+    library_layout.setContentsMargins(6, 6, 6, 6)
+    library_status_label = QtWidgets.QLabel("색인 없음 - 라이브러리 폴더를 선택하세요")
+    library_status_label.setWordWrap(True)
+    library_status_label.setStyleSheet("color: #aaa;")
+    library_button_row = QtWidgets.QHBoxLayout()
+    library_folder_btn = QPushButton("📁 폴더 색인")
+    library_reindex_btn = QPushButton("🔄 다시 색인")
+    library_reindex_btn.setToolTip("색인한 폴더에서 바뀐 파일만 다시 색인")
+    library_button_row.addWidget(library_folder_btn)
+    library_button_row.addWidget(library_reindex_btn)
+    library_watch_check = QtWidgets.QCheckBox("👁️ 폴더 감시 (저장된 .flow 자동 색인)")
+    library_watch_check.setChecked(True)
+    library_query_edit = QtWidgets.QLineEdit()
+    library_query_edit.setPlaceholderText("노드 이름 / 문장 검색 (예: 배터리 잔량, TB_EQP_ALARM)")
+    library_result_list = QtWidgets.QListWidget()
+    library_result_list.setWordWrap(True)
+    library_result_list.setToolTip("더블클릭: 워크플로우를 열고 그 노드로 이동")
+    library_layout.addWidget(library_status_label)
+    library_layout.addLayout(library_button_row)
+    library_layout.addWidget(library_watch_check)
+    library_layout.addWidget(library_query_edit)
+    library_layout.addWidget(library_result_list)
+
+    library_state = {'index': None}
+    library_watcher = LibraryWatcher(LIBRARY_INDEX_PATH, parent=main_window)
+    library_search_timer = QtCore.QTimer()
+    library_search_timer.setSingleShot(True)
+    library_search_timer.setInterval(LIBRARY_SEARCH_DELAY_MS)
+
+    def update_library_status_label():
+        index = library_state['index']
+        roots = index.roots if index is not None else []
+        library_reindex_btn.setEnabled(bool(roots))
+        if not roots:
+            library_status_label.setText("색인 없음 - 라이브러리 폴더를 선택하세요")
+            return
+        files, nodes = index.stats()
+        names = ', '.join(Path(root).name or root for root in roots)
+        watching = " · 👁️ 감시 중" if library_watcher.is_watching else ""
+        library_status_label.setText(f"🗂️ {names}: 노드 {nodes:,}개 ({files:,}개 파일){watching}")
+        library_status_label.setToolTip('\n'.join(roots))
+
+    def run_library_search():
+        library_result_list.clear()
+        index = library_state['index']
+        query = library_query_edit.text().strip()
+        if index is None or not query:
+            return
+        try:
+            results = index.search(query)
+        except Exception as e:
+            print(f"⚠️ 라이브러리 검색 실패: {e}")
+            return
+        for result in results:
+            item = QtWidgets.QListWidgetItem(
+                f"{result['name']} [{result['type']}]  {result['snippet']}\n    └ {Path(result['path']).name}"
+            )
+            item.setData(QtCore.Qt.UserRole, (result['path'], result['step_id']))
+            item.setToolTip(f"{result['path']}\n단계 #{result['step_id']}")
+            library_result_list.addItem(item)
+        if not results:
+            library_result_list.addItem("찾은 노드가 없습니다")
+
+    library_search_timer.timeout.connect(run_library_search)
+    library_query_edit.textEdited.connect(lambda _text: library_search_timer.start())
+
+    def on_library_result_double_clicked(item):
+        target = item.data(QtCore.Qt.UserRole)
+        if not target:
+            return
+        filename, step_id = target
+        if not Path(filename).is_file():
+            QtWidgets.QMessageBox.warning(
+                main_window, "파일 없음", f"파일을 찾을 수 없습니다. 다시 색인하세요.\n\n{filename}"
+            )
+            return
+        print(f"\n📂 라이브러리 검색 결과 열기: {filename} (단계 #{step_id})")
+        run_flow_task(
+            main_window,
+            "워크플로우 열기",
+            lambda task: open_flow(filename, progress=task.report, validate=True),
+            lambda opened: finish_open_json(filename, opened, focus_step_id=step_id),
+            on_failed=lambda message: QtWidgets.QMessageBox.critical(
+                main_window, "불러오기 오류 ❌", f"불러오기 중 오류가 발생했습니다:\n\n{message}"
+            )
+        )
+
+    library_result_list.itemDoubleClicked.connect(on_library_result_double_clicked)
+
+    def start_library_index(roots):
+        def build(task):
+            # sqlite 연결은 스레드마다 따로 (WAL이라 GUI 쪽 검색 연결은 그대로 읽을 수 있음)
+            with LibraryIndex(LIBRARY_INDEX_PATH) as index:
+                return index.update(roots, progress=task.report)
+
+        def on_indexed(result):
+            update_library_watcher()
+            update_library_status_label()
+            print(f"✅ 라이브러리 색인 완료: 추가 {result['added']}개, 갱신 {result['updated']}개, "
+                  f"삭제 {result['removed']}개, 실패 {result['failed']}개 ({result['seconds']:.1f}초)")
+            run_library_search()
+
+        run_flow_task(
+            main_window,
+            "라이브러리 색인",
+            build,
+            on_indexed,
+            on_failed=lambda message: QtWidgets.QMessageBox.critical(
+                main_window, "색인 오류 ❌", f"라이브러리 색인 중 오류가 발생했습니다:\n\n{message}"
+            )
+        )
+
+    def on_library_folder_clicked():
+        index = library_state['index']
+        start_dir = index.roots[0] if index is not None and index.roots else ''
+        folder = QtWidgets.QFileDialog.getExistingDirectory(main_window, "라이브러리 폴더 선택 (.flow)", start_dir)
+        if folder:
+            start_library_index([folder])
+
+    library_folder_btn.clicked.connect(on_library_folder_clicked)
+
+    def update_library_watcher():
+        """감시 체크 상태와 색인한 폴더 목록에 맞춰 폴더 감시 시작/중지"""
+        index = library_state['index']
+        roots = index.roots if index is not None else []
+        if library_watch_check.isChecked() and roots:
+            if library_watcher.roots != [str(Path(root).resolve()) for root in roots]:
+                library_watcher.watch(roots)
+        elif library_watcher.is_watching:
+            library_watcher.stop()
+        update_library_status_label()
+
+    def on_library_watch_updated(_result):
+        # 다른 사람이 저장한 flow가 반영되면 상태와 현재 검색 결과를 새로 고침
+        update_library_status_label()
+        if library_query_edit.text().strip():
+            run_library_search()
+
+    library_watcher.updated.connect(on_library_watch_updated)
+    library_watch_check.toggled.connect(lambda _checked: update_library_watcher())
+    library_reindex_btn.clicked.connect(
+        lambda: start_library_index(library_state['index'].roots) if library_state['index'] is not None else None
+    )
+
+    try:
+        library_state['index'] = LibraryIndex(LIBRARY_INDEX_PATH)
+        atexit.register(library_state['index'].close)
+    except Exception as e:
+        print(f"⚠️ 라이브러리 색인 열기 실패: {e}")
+    update_library_watcher()
+
+    library_dock = QDockWidget("🗂️ 라이브러리 검색", main_window)
+    library_dock.setWidget(library_panel)
+    library_dock.setAllowedAreas(QtCore.Qt.LeftDockWidgetArea | QtCore.Qt.RightDockWidgetArea)
+    main_window.addDockWidget(QtCore.Qt.RightDockWidgetArea, library_dock)
+    main_window.tabifyDockWidget(similar_dock, library_dock)
+    similar_dock.raise_()
+    library_dock.setMinimumWidth(300)
+    print("✅ 라이브러리 검색 패널 추가 완료 (우측, 유사 단계 탭 옆)")
     try:
         default_dock_state['state'] = QtCore.QByteArray(main_window.saveState())
         print("✅ 기본 패널 레이아웃 저장 완료")
@@ -2715,7 +3012,7 @@ if __name__ == '__main__':
             QtWidgets.QMessageBox.information(
                 main_window,
                 "내보내기 완료 ✅",
-                f"JSON이 성공적으로 저장되었습니다!\n\n파일: {filename}\n노드 수: {len(result.get('steps', []))}개\n(노드 위치 정보는 제외되었습니다.)"
+                f"JSON이 성공적으로 저장되었습니다!\n\n파일: {filename}\n노드 수: {result.get('step_count', 0)}개\n(노드 위치 정보는 제외되었습니다.)"
             )
         except Exception as err:
             QtWidgets.QMessageBox.critical(
@@ -2724,6 +3021,36 @@ if __name__ == '__main__':
                 f"JSON 저장 중 오류가 발생했습니다:\n{err}"
             )
     
+    def on_export_reasoning_paths():
+        """트리거 -> 결론 추론 경로를 JSONL로 저장"""
+        filename, _ = QtWidgets.QFileDialog.getSaveFileName(
+            main_window,
+            "추론 경로 내보내기",
+            "reasoning_paths.jsonl",
+            "JSONL 파일 (*.jsonl);;모든 파일 (*.*)"
+        )
+        if not filename:
+            return
+        if not filename.lower().endswith('.jsonl'):
+            filename += '.jsonl'
+        try:
+            result = export_reasoning_paths(graph, filename)
+        except Exception as err:
+            QtWidgets.QMessageBox.critical(main_window, "내보내기 실패", f"추론 경로 저장 중 오류가 발생했습니다:\n{err}")
+            return
+        if not result['path_count']:
+            QtWidgets.QMessageBox.warning(
+                main_window, "추론 경로 없음", "트리거에서 결론까지 이어진 경로가 없습니다.\n노드 연결을 확인하세요."
+            )
+            return
+        sampled = result['written'] < result['path_count']
+        QtWidgets.QMessageBox.information(
+            main_window,
+            "내보내기 완료 ✅",
+            f"추론 경로를 저장했습니다.\n\n파일: {filename}\n"
+            f"경로: {result['written']:,}개" + (f" (전체 {result['path_count']:,}개 중 고르게 샘플링)" if sampled else '')
+        )
+    
     # 노드 선택/해제 시 파일 첨부 패널 업데이트
     try:
         if hasattr(graph, 'nodes_selected'):
@@ -2746,6 +3073,7 @@ if __name__ == '__main__':
         if view and view.scene():
             scene = view.scene()
             scene.selectionChanged.connect(lambda: QtCore.QTimer.singleShot(50, update_file_attachment_panel))
+            scene.selectionChanged.connect(connect_selected_similar_inputs)
             print("✅ Scene selectionChanged 이벤트 연결 완료")
     except Exception as e:
         print(f"⚠️ Scene selectionChanged 이벤트 연결 실패: {e}")
@@ -2785,8 +3113,8 @@ if __name__ == '__main__':
     def fit_to_view():
         """모든 노드가 보이도록 적절한 배율로 줌하고 노드들의 중심으로 이동"""
         try:
-            nodes = graph.all_nodes()
-            if not nodes:
+            snapshot = build_snapshot(graph)
+            if not len(snapshot):
                 print("⚠️ 표시할 노드가 없습니다.")
                 return
 
@@ -2795,101 +3123,12 @@ if __name__ == '__main__':
                 print("⚠️ 뷰를 찾을 수 없습니다.")
                 return
             
-            # 모든 노드의 위치 수집
-            min_x, min_y = float('inf'), float('inf')
-            max_x, max_y = float('-inf'), float('-inf')
-            
-            for node in nodes:
-                try:
-                    # 노드 위치 가져오기 (여러 방법 시도)
-                    x, y = None, None
-                    node_name = node.name() if callable(node.name) else (node.name if hasattr(node, 'name') else str(node))
-                    
-                    # 방법 1: graph.get_node_pos() 시도
-                    try:
-                        if hasattr(graph, 'get_node_pos'):
-                            pos = graph.get_node_pos(node)
-                            if pos and len(pos) >= 2:
-                                x, y = float(pos[0]), float(pos[1])
-                                print(f"  📍 노드 '{node_name}' 위치 (graph.get_node_pos): [{x}, {y}]")
-                    except Exception as e1:
-                        print(f"  ⚠️ graph.get_node_pos 실패 ({node_name}): {e1}")
-                    
-                    # 방법 2: node.pos 속성/메서드
-                    if x is None or y is None:
-                        try:
-                            if hasattr(node, 'pos'):
-                                n_pos = node.pos
-                                if callable(n_pos):
-                                    n_pos = n_pos()
-                                if isinstance(n_pos, (list, tuple)) and len(n_pos) >= 2:
-                                    x, y = float(n_pos[0]), float(n_pos[1])
-                                    print(f"  📍 노드 '{node_name}' 위치 (node.pos): [{x}, {y}]")
-                        except Exception as e2:
-                            print(f"  ⚠️ node.pos 실패 ({node_name}): {e2}")
-                    
-                    # 방법 3: x_pos, y_pos 속성/메서드
-                    if x is None or y is None:
-                        try:
-                            if hasattr(node, 'x_pos'):
-                                if callable(node.x_pos):
-                                    x = float(node.x_pos())
-                                    y = float(node.y_pos())
-                                else:
-                                    x = float(node.x_pos)
-                                    y = float(node.y_pos)
-                                print(f"  📍 노드 '{node_name}' 위치 (x_pos/y_pos): [{x}, {y}]")
-                        except Exception as e3:
-                            print(f"  ⚠️ x_pos/y_pos 실패 ({node_name}): {e3}")
-                    
-                    # 방법 4: node.viewer() 또는 node.graph()를 통한 접근
-                    if x is None or y is None:
-                        try:
-                            # NodeGraphQt의 경우 노드가 viewer를 통해 접근 가능할 수 있음
-                            if hasattr(node, 'viewer'):
-                                viewer = node.viewer()
-                                if viewer and hasattr(viewer, 'get_node_pos'):
-                                    pos = viewer.get_node_pos(node)
-                                    if pos and len(pos) >= 2:
-                                        x, y = float(pos[0]), float(pos[1])
-                                        print(f"  📍 노드 '{node_name}' 위치 (node.viewer): [{x}, {y}]")
-                        except Exception as e4:
-                            print(f"  ⚠️ node.viewer 실패 ({node_name}): {e4}")
-                    
-                    # 방법 5: 노드의 그래픽 아이템 직접 접근
-                    if x is None or y is None:
-                        try:
-                            if hasattr(node, 'graphics_item'):
-                                item = node.graphics_item()
-                                if item:
-                                    pos = item.pos()
-                                    if pos:
-                                        x, y = float(pos.x()), float(pos.y())
-                                        print(f"  📍 노드 '{node_name}' 위치 (graphics_item.pos): [{x}, {y}]")
-                        except Exception as e5:
-                            print(f"  ⚠️ graphics_item 실패 ({node_name}): {e5}")
-                    
-                    if x is None or y is None:
-                        print(f"  ❌ 노드 '{node_name}' 위치를 찾을 수 없습니다. (사용 가능한 속성: {[attr for attr in dir(node) if not attr.startswith('_')][:10]})")
-                        continue
-                    
-                    # 노드 크기 추정 (대략적인 크기)
-                    node_width = 200  # 대략적인 노드 너비
-                    node_height = 150  # 대략적인 노드 높이
-                    
-                    min_x = min(min_x, x - node_width / 2)
-                    min_y = min(min_y, y - node_height / 2)
-                    max_x = max(max_x, x + node_width / 2)
-                    max_y = max(max_y, y + node_height / 2)
-                except Exception as e:
-                    print(f"  ⚠️ 노드 위치 가져오기 실패: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    continue
-            
-            if min_x == float('inf'):
+            # 모든 노드를 감싸는 영역 (노드 크기는 대략 200 x 150으로 추정)
+            bounds = snapshot.bounds(node_width=200, node_height=150)
+            if bounds is None:
                 print("⚠️ 노드 위치를 찾을 수 없습니다.")
                 return
+            min_x, min_y, max_x, max_y = bounds
             
             # 경계에 여백 추가
             padding = 100
@@ -2989,7 +3228,7 @@ if __name__ == '__main__':
                 import traceback
                 traceback.print_exc()
             
-            print(f"✅ Fit to View 완료: {len(nodes)}개 노드, 줌 레벨 {target_scale:.2f}, 중심 ({center_x:.1f}, {center_y:.1f})")
+            print(f"✅ Fit to View 완료: {len(snapshot)}개 노드, 줌 레벨 {target_scale:.2f}, 중심 ({center_x:.1f}, {center_y:.1f})")
         except Exception as e:
             print(f"❌ Fit to View 실패: {e}")
             import traceback
@@ -2998,98 +3237,39 @@ if __name__ == '__main__':
     def on_copy_nodes():
         """선택된 노드들을 복사 (연결 정보 포함)"""
         try:
-            selected_nodes = [n for n in graph.all_nodes() if n.selected()]
-            if not selected_nodes:
+            # 스냅샷 한 번으로 선택/위치/속성/연결을 모두 조회
+            # (노드 타입별 속성 목록은 node_schema.py 선언에서)
+            snapshot = build_snapshot(graph, extra_properties=COPY_PROPERTIES)
+            selected_indices = snapshot.selected_indices()
+            if not selected_indices:
                 print("⚠️ 복사할 노드가 선택되지 않았습니다.")
                 return
             
-            # 선택된 노드 ID 집합 (빠른 검색용)
-            selected_node_ids = {node.id for node in selected_nodes}
+            # 선택된 노드 인덱스 집합 (빠른 검색용)
+            selected_set = set(selected_indices)
             
             # 노드 데이터 수집
             copied_nodes_data.clear()
-            node_id_map = {}  # 원본 노드 ID -> 인덱스 매핑
             
-            for idx, node in enumerate(selected_nodes):
-                node_id = node.id
-                node_id_map[node_id] = idx
-                
+            for idx in selected_indices:
                 node_data = {
-                    'id': node_id,  # 원본 노드 ID 저장
-                    'type': node.type_,
-                    'name': node.name if isinstance(node.name, str) else (node.name() if callable(node.name) else str(node.name)),
-                    'properties': {},
-                    'pos': None,
+                    'id': snapshot.ids[idx],  # 원본 노드 ID 저장
+                    'type': snapshot.types[idx],
+                    'name': snapshot.names[idx],
+                    'properties': dict(snapshot.properties[idx]),
+                    'pos': snapshot.positions[idx],
                     'connections': []  # 연결 정보 저장
                 }
                 
-                # 위치 정보 가져오기
-                try:
-                    pos = graph.get_node_pos(node)
-                    if pos and len(pos) >= 2:
-                        node_data['pos'] = [float(pos[0]), float(pos[1])]
-                except:
-                    try:
-                        if hasattr(node, 'pos'):
-                            pos = node.pos
-                            if callable(pos):
-                                pos = pos()
-                            if isinstance(pos, (list, tuple)) and len(pos) >= 2:
-                                node_data['pos'] = [float(pos[0]), float(pos[1])]
-                    except:
-                        pass
-                
                 # 연결 정보 수집 (선택된 노드들 간의 연결만)
-                try:
-                    output_ports = node.output_ports()
-                    for port_idx, port in enumerate(output_ports):
-                        connected_ports = port.connected_ports()
-                        for connected_port in connected_ports:
-                            connected_node = connected_port.node()
-                            if connected_node and connected_node.id in selected_node_ids:
-                                # 선택된 노드들 간의 연결만 저장
-                                input_ports = connected_node.input_ports()
-                                to_port_idx = None
-                                for i, inp_port in enumerate(input_ports):
-                                    if inp_port == connected_port:
-                                        to_port_idx = i
-                                        break
-                                
-                                if to_port_idx is not None:
-                                    node_data['connections'].append({
-                                        'from_port': port_idx,
-                                        'to_node_id': connected_node.id,
-                                        'to_port': to_port_idx
-                                    })
-                except Exception as e:
-                    print(f"  ⚠️ 연결 정보 수집 실패 ({node_data['name']}): {e}")
-                
-                # 모든 속성 저장
-                try:
-                    if hasattr(node, '_properties'):
-                        for prop_name, prop_value in node._properties.items():
-                            if hasattr(prop_value, 'value'):
-                                node_data['properties'][prop_name] = prop_value.value
-                            elif hasattr(prop_value, 'get_value'):
-                                node_data['properties'][prop_name] = prop_value.get_value()
-                            else:
-                                node_data['properties'][prop_name] = prop_value
-                except:
-                    pass
-                
-                # get_property로도 시도
-                common_props = ['situation', 'situation_type', 'trigger_source', 'note', 
-                               'target_table', 'target_columns', 'screen_name', 'screen_url', 
-                               'screen_elements', 'log_source', 'log_path', 'log_pattern',
-                               'condition', 'reasoning', 'target', 'instruction', 
-                               'conclusion', 'conclusion_type', 'description']
-                for prop_name in common_props:
-                    try:
-                        prop_value = node.get_property(prop_name)
-                        if prop_value is not None:
-                            node_data['properties'][prop_name] = prop_value
-                    except:
-                        pass
+                for port_idx, targets in enumerate(snapshot.outputs[idx]):
+                    for to_idx, to_port_idx in targets:
+                        if to_idx in selected_set:
+                            node_data['connections'].append({
+                                'from_port': port_idx,
+                                'to_node_id': snapshot.ids[to_idx],
+                                'to_port': to_port_idx
+                            })
                 
                 copied_nodes_data.append(node_data)
             
@@ -3202,83 +3382,89 @@ if __name__ == '__main__':
             # 원본 노드 ID -> 새 노드 매핑
             node_id_mapping = {}  # 원본 ID -> 새 노드
             
-            pasted_nodes = []
-            for idx, node_data in enumerate(copied_nodes_data):
-                try:
-                    # 노드 생성 위치 계산
-                    if node_data.get('pos') and first_node_pos:
-                        # 상대 위치 유지
-                        rel_x = node_data['pos'][0] - first_node_pos[0]
-                        rel_y = node_data['pos'][1] - first_node_pos[1]
-                        pos = [paste_x + rel_x, paste_y + rel_y]
-                    else:
-                        # 위치 정보가 없으면 순차적으로 배치
-                        pos = [paste_x + idx * 30, paste_y + idx * 30]
-                    
-                    node = graph.create_node(node_data['type'], name=node_data['name'], pos=pos)
-                    if node:
-                        # 속성 복원
-                        for prop_name, prop_value in node_data.get('properties', {}).items():
-                            try:
-                                node.set_property(prop_name, prop_value)
-                            except:
-                                pass
-                        
-                        # 원본 노드 ID와 새 노드 매핑 저장
-                        original_id = node_data.get('id')
-                        if original_id:
-                            node_id_mapping[original_id] = node
-                        
-                        pasted_nodes.append(node)
-                except Exception as e:
-                    print(f"⚠️ 노드 붙여넣기 실패 ({node_data.get('name', 'Unknown')}): {e}")
-            
-            # 연결 복원
-            connection_count = 0
-            for node_data in copied_nodes_data:
-                original_id = node_data.get('id')
-                from_node = node_id_mapping.get(original_id)
-                
-                if not from_node:
-                    continue
-                
-                # 연결 정보 복원
-                for conn in node_data.get('connections', []):
+            # 화면 갱신/시그널을 멈추고 생성, Undo는 한 번으로 묶음
+            with BulkConstruction(graph, undo_label='노드 붙여넣기') as builder:
+                pasted_nodes = []
+                for idx, node_data in enumerate(copied_nodes_data):
                     try:
-                        to_original_id = conn.get('to_node_id')
-                        to_node = node_id_mapping.get(to_original_id)
-                        
-                        if not to_node:
-                            continue
-                        
-                        from_port_idx = conn.get('from_port', 0)
-                        to_port_idx = conn.get('to_port', 0)
+                        # 노드 생성 위치 계산
+                        if node_data.get('pos') and first_node_pos:
+                            # 상대 위치 유지
+                            rel_x = node_data['pos'][0] - first_node_pos[0]
+                            rel_y = node_data['pos'][1] - first_node_pos[1]
+                            pos = [paste_x + rel_x, paste_y + rel_y]
+                        else:
+                            # 위치 정보가 없으면 순차적으로 배치
+                            pos = [paste_x + idx * 30, paste_y + idx * 30]
                         
-                        # 출력 포트와 입력 포트 찾기
+                        node = builder.create_node(node_data['type'], node_data['name'], pos)
+                        if node:
+                            # 속성 복원
+                            for prop_name, prop_value in node_data.get('properties', {}).items():
+                                try:
+                                    builder.set_property(node, prop_name, prop_value)
+                                except:
+                                    pass
+                            
+                            # 원본 노드 ID와 새 노드 매핑 저장
+                            original_id = node_data.get('id')
+                            if original_id:
+                                node_id_mapping[original_id] = node
+                            
+                            pasted_nodes.append(node)
+                    except Exception as e:
+                        print(f"⚠️ 노드 붙여넣기 실패 ({node_data.get('name', 'Unknown')}): {e}")
+                
+                # 연결 복원
+                connection_count = 0
+                for node_data in copied_nodes_data:
+                    original_id = node_data.get('id')
+                    from_node = node_id_mapping.get(original_id)
+                    
+                    if not from_node:
+                        continue
+                    
+                    # 연결 정보 복원
+                    for conn in node_data.get('connections', []):
                         try:
-                            output_ports = from_node.output_ports()
-                            input_ports = to_node.input_ports()
+                            to_original_id = conn.get('to_node_id')
+                            to_node = node_id_mapping.get(to_original_id)
                             
-                            if from_port_idx < len(output_ports) and to_port_idx < len(input_ports):
-                                from_port = output_ports[from_port_idx]
-                                to_port = input_ports[to_port_idx]
+                            if not to_node:
+                                continue
+                            
+                            from_port_idx = conn.get('from_port', 0)
+                            to_port_idx = conn.get('to_port', 0)
+                            
+                            # 출력 포트와 입력 포트 찾기
+                            try:
+                                output_ports = from_node.output_ports()
+                                input_ports = to_node.input_ports()
                                 
-                                # 연결 시도
-                                try:
-                                    from_port.connect_to(to_port)
-                                    connection_count += 1
-                                except:
-                                    # 대체 방법 시도
+                                if from_port_idx < len(output_ports) and to_port_idx < len(input_ports):
+                                    from_port = output_ports[from_port_idx]
+                                    to_port = input_ports[to_port_idx]
+                                    
+                                    # 연결 시도
                                     try:
-                                        if hasattr(from_node, 'set_output'):
-                                            from_node.set_output(from_port_idx, to_node.input(to_port_idx))
-                                            connection_count += 1
+                                        builder.connect(from_port, to_port)
+                                        connection_count += 1
                                     except:
-                                        pass
+                                        # 대체 방법 시도
+                                        try:
+                                            if hasattr(from_node, 'set_output'):
+                                                from_node.set_output(from_port_idx, to_node.input(to_port_idx))
+                                                connection_count += 1
+                                        except:
+                                            pass
+                            except Exception as e:
+                                print(f"  ⚠️ 연결 복원 실패: {e}")
                         except Exception as e:
-                            print(f"  ⚠️ 연결 복원 실패: {e}")
-                    except Exception as e:
-                        print(f"  ⚠️ 연결 처리 오류: {e}")
+                            print(f"  ⚠️ 연결 처리 오류: {e}")
+                
+            # 블록 안에서는 그래프 시그널이 막혀 있었으므로 변경 추적/저널을 직접 갱신
+            dirty_tracker.mark_structure()
+            checkpoint_journal(graph)
             
             if pasted_nodes:
                 # 붙여넣은 노드들을 선택 상태로
@@ -3758,6 +3944,7 @@ if __name__ == '__main__':
             for node in nodes:
                 graph.delete_node(node)
             clear_attachments_dir()
+            checkpoint_journal(graph)
             update_file_attachment_panel()
             print("✅ 새 워크플로우를 시작합니다.")
             QtWidgets.QMessageBox.information(
@@ -3767,8 +3954,154 @@ if __name__ == '__main__':
             )
     
     # 6. JSON Import/Export 기능 추가
+    def focus_loaded_step(step_id):
+        """불러온 워크플로우에서 step id의 노드를 선택하고 화면 가운데로"""
+        node = loaded_nodes.get(step_id)
+        if node is None:
+            print(f"⚠️ 단계 #{step_id} 노드를 찾을 수 없습니다")
+            return
+        try:
+            graph.clear_selection()
+            node.set_selected(True)
+            graph.center_on([node])
+            print(f"🎯 노드로 이동: {node.name()} (단계 #{step_id})")
+        except Exception as e:
+            print(f"⚠️ 노드로 이동 실패: {e}")
+
+    def finish_open_json(filename, opened, focus_step_id=None):
+        """
+        백그라운드에서 읽은 워크플로우를 그래프에 반영 (노드 생성은 GUI 스레드)
+        focus_step_id: 불러온 뒤 선택하고 화면 가운데로 옮길 단계 (라이브러리 검색 결과)
+        """
+        try:
+            # 파일을 읽을 때 함께 수집한 사용 항목 (다시 파싱하지 않음)
+            used_items = opened.used_items
+            
+            # 사용된 항목들을 목록에 먼저 추가 (노드 로드 전에!)
+            added_count = {'tables': 0, 'screens': 0, 'logs': 0, 'situation_types': 0}
+            
+            # 테이블 추가
+            if used_items.get('tables'):
+                current_tables = [table_list.item(i).text() for i in range(table_list.count())]
+                for table in used_items['tables']:
+                    if table and table not in current_tables:
+                        table_list.addItem(table)
+                        current_tables.append(table)
+                        added_count['tables'] += 1
+                if added_count['tables'] > 0:
+                    all_tables = [table_list.item(i).text() for i in range(table_list.count())]
+                    save_tables(all_tables)
+                    print(f"✅ {added_count['tables']}개 테이블이 목록에 추가되었습니다 (노드 로드 전).")
+            
+            # 화면 추가
+            if used_items.get('screens'):
+                current_screens = [screen_list.item(i).text() for i in range(screen_list.count())]
+                for screen in used_items['screens']:
+                    if screen and screen not in current_screens:
+                        screen_list.addItem(screen)
+                        current_screens.append(screen)
+                        added_count['screens'] += 1
+                if added_count['screens'] > 0:
+                    all_screens = [screen_list.item(i).text() for i in range(screen_list.count())]
+                    save_screens(all_screens)
+                    print(f"✅ {added_count['screens']}개 화면이 목록에 추가되었습니다 (노드 로드 전).")
+            
+            # 로그 추가
+            if used_items.get('logs'):
+                current_logs = [log_list.item(i).text() for i in range(log_list.count())]
+                for log in used_items['logs']:
+                    if log and log not in current_logs:
+                        log_list.addItem(log)
+                        current_logs.append(log)
+                        added_count['logs'] += 1
+                if added_count['logs'] > 0:
+                    all_logs = [log_list.item(i).text() for i in range(log_list.count())]
+                    save_logs(all_logs)
+                    print(f"✅ {added_count['logs']}개 로그가 목록에 추가되었습니다 (노드 로드 전).")
+            
+            # 상황 유형 추가
+            if used_items.get('situation_types'):
+                current_situation_types = [situation_list.item(i).text() for i in range(situation_list.count())]
+                for stype in used_items['situation_types']:
+                    if stype and stype not in current_situation_types:
+                        situation_list.addItem(stype)
+                        current_situation_types.append(stype)
+                        added_count['situation_types'] += 1
+                if added_count['situation_types'] > 0:
+                    all_situation_types = [situation_list.item(i).text() for i in range(situation_list.count())]
+                    save_situation_types(all_situation_types)
+                    print(f"✅ {added_count['situation_types']}개 상황 유형이 목록에 추가되었습니다 (노드 로드 전).")
+            
+            # 이제 노드 로드 (목록에 항목이 이미 추가된 상태)
+            result = load_from_json(graph, filename, opened=opened)
+            if result:
+                file_type = "워크플로우 파일" if filename.endswith('.flow') else ("ZIP 파일" if filename.endswith('.zip') else "JSON 파일")
+                update_file_attachment_panel()
+                
+                # 모든 노드의 드롭다운 업데이트 (약간의 지연 후 실행하여 노드가 완전히 로드된 후 업데이트)
+                def update_all_node_dropdowns():
+                    """모든 노드의 드롭다운을 업데이트"""
+                    try:
+                        # 항목이 추가되었거나, 노드가 로드되었으면 모든 드롭다운 업데이트
+                        if (added_count['tables'] > 0 or 
+                            added_count['screens'] > 0 or 
+                            added_count['logs'] > 0 or 
+                            added_count['situation_types'] > 0):
+                            update_node_tables()
+                            update_node_screens()
+                            update_node_logs()
+                            update_node_situation_types()
+                            print("✅ 모든 노드의 드롭다운이 업데이트되었습니다.")
+                    except Exception as e:
+                        print(f"⚠️ 노드 드롭다운 업데이트 중 오류: {e}")
+                        import traceback
+                        traceback.print_exc()
+                
+                # 500ms 후에 업데이트 (노드가 완전히 로드된 후)
+                QtCore.QTimer.singleShot(500, update_all_node_dropdowns)
+                if focus_step_id is not None:
+                    focus_loaded_step(focus_step_id)
+                
+                # 메시지 구성
+                added_summary = []
+                if added_count['tables'] > 0:
+                    added_summary.append(f"테이블 {added_count['tables']}개")
+                if added_count['screens'] > 0:
+                    added_summary.append(f"화면 {added_count['screens']}개")
+                if added_count['logs'] > 0:
+                    added_summary.append(f"로그 {added_count['logs']}개")
+                if added_count['situation_types'] > 0:
+                    added_summary.append(f"상황 유형 {added_count['situation_types']}개")
+                
+                message = f"워크플로우를 성공적으로 불러왔습니다!\n\n파일: {filename}\n형식: {file_type}\n노드 수: {len(result.get('steps', []))}개"
+                if added_summary:
+                    message += f"\n\n✅ 목록에 자동 추가됨: {', '.join(added_summary)}"
+                message += "\n\n(워크플로우 파일에서 첨부 파일들도 함께 복원되었습니다.)"
+                
+                QtWidgets.QMessageBox.information(
+                    main_window,
+                    "불러오기 완료 ✅",
+                    message
+                )
+                print(f"✅ 불러오기 완료: {len(result.get('steps', []))}개의 노드가 불러와졌습니다.")
+            else:
+                QtWidgets.QMessageBox.warning(
+                    main_window,
+                    "불러오기 실패",
+                    "워크플로우를 불러올 수 없습니다."
+                )
+        except Exception as e:
+            import traceback
+            error_msg = f"불러오기 중 오류가 발생했습니다:\n\n{str(e)}"
+            print(f"❌ 불러오기 오류: {error_msg}")
+            QtWidgets.QMessageBox.critical(
+                main_window,
+                "불러오기 오류 ❌",
+                error_msg
+            )
+    
     def on_open_json():
-        """워크플로우 파일 열기"""
+        """워크플로우 파일 열기 (ZIP 해제/JSON 파싱은 백그라운드에서)"""
         try:
             filename, _ = QtWidgets.QFileDialog.getOpenFileName(
                 main_window,
@@ -3778,242 +4111,18 @@ if __name__ == '__main__':
             )
             if filename:
                 print(f"\n📂 워크플로우 파일 열기 시작: {filename}")
-                try:
-                    # 먼저 워크플로우 데이터를 읽어서 사용된 항목들을 추출
-                    workflow_data = None
-                    try:
-                        clear_attachments_dir()
-                        # ZIP 파일인지 확인 (.flow 또는 .zip)
-                        if filename.endswith('.flow') or filename.endswith('.zip'):
-                            with zipfile.ZipFile(filename, 'r') as zipf:
-                                if 'workflow.json' in zipf.namelist():
-                                    json_content = zipf.read('workflow.json').decode('utf-8')
-                                    workflow_data = json.loads(json_content)
-                                else:
-                                    json_files = [f for f in zipf.namelist() if f.endswith('.json')]
-                                    if json_files:
-                                        json_content = zipf.read(json_files[0]).decode('utf-8')
-                                        workflow_data = json.loads(json_content)
-                        else:
-                            with open(filename, 'r', encoding='utf-8') as f:
-                                workflow_data = json.load(f)
-                    except Exception as e:
-                        print(f"⚠️ 워크플로우 데이터 읽기 실패: {e}")
-                        workflow_data = None
-                    
-                    # 워크플로우에서 사용된 항목들을 먼저 추출하고 목록에 추가 (노드 로드 전에!)
-                    used_items = {
-                        'tables': set(),
-                        'screens': set(),
-                        'logs': set(),
-                        'situation_types': set()
-                    }
-                    
-                    if workflow_data:
-                        for step in workflow_data.get('steps', []):
-                            step_type = step.get('type', '')
-                            
-                            # 테이블 추출
-                            if step_type == 'table' and 'target_table' in step:
-                                table_name = step.get('target_table', '').strip()
-                                if table_name:
-                                    used_items['tables'].add(table_name)
-                            elif step_type == 'observation' and 'table' in step:
-                                table_name = step.get('table', '').strip()
-                                if table_name:
-                                    used_items['tables'].add(table_name)
-                            
-                            # 화면 추출
-                            if step_type == 'screen' and 'screen_name' in step:
-                                screen_name = step.get('screen_name', '').strip()
-                                if screen_name:
-                                    used_items['screens'].add(screen_name)
-                            
-                            # 로그 추출
-                            if step_type == 'log' and 'log_source' in step:
-                                log_name = step.get('log_source', '').strip()
-                                if log_name:
-                                    used_items['logs'].add(log_name)
-                            
-                            # 상황 유형 추출
-                            if step_type == 'trigger' and 'situation_type' in step:
-                                situation_type = step.get('situation_type', '').strip()
-                                if situation_type:
-                                    used_items['situation_types'].add(situation_type)
-                    
-                    # 사용된 항목들을 목록에 먼저 추가 (노드 로드 전에!)
-                    added_count = {'tables': 0, 'screens': 0, 'logs': 0, 'situation_types': 0}
-                    
-                    # 테이블 추가
-                    if used_items.get('tables'):
-                        current_tables = [table_list.item(i).text() for i in range(table_list.count())]
-                        for table in used_items['tables']:
-                            if table and table not in current_tables:
-                                table_list.addItem(table)
-                                current_tables.append(table)
-                                added_count['tables'] += 1
-                        if added_count['tables'] > 0:
-                            all_tables = [table_list.item(i).text() for i in range(table_list.count())]
-                            save_tables(all_tables)
-                            print(f"✅ {added_count['tables']}개 테이블이 목록에 추가되었습니다 (노드 로드 전).")
-                    
-                    # 화면 추가
-                    if used_items.get('screens'):
-                        current_screens = [screen_list.item(i).text() for i in range(screen_list.count())]
-                        for screen in used_items['screens']:
-                            if screen and screen not in current_screens:
-                                screen_list.addItem(screen)
-                                current_screens.append(screen)
-                                added_count['screens'] += 1
-                        if added_count['screens'] > 0:
-                            all_screens = [screen_list.item(i).text() for i in range(screen_list.count())]
-                            save_screens(all_screens)
-                            print(f"✅ {added_count['screens']}개 화면이 목록에 추가되었습니다 (노드 로드 전).")
-                    
-                    # 로그 추가
-                    if used_items.get('logs'):
-                        current_logs = [log_list.item(i).text() for i in range(log_list.count())]
-                        for log in used_items['logs']:
-                            if log and log not in current_logs:
-                                log_list.addItem(log)
-                                current_logs.append(log)
-                                added_count['logs'] += 1
-                        if added_count['logs'] > 0:
-                            all_logs = [log_list.item(i).text() for i in range(log_list.count())]
-                            save_logs(all_logs)
-                            print(f"✅ {added_count['logs']}개 로그가 목록에 추가되었습니다 (노드 로드 전).")
-                    
-                    # 상황 유형 추가
-                    if used_items.get('situation_types'):
-                        current_situation_types = [situation_list.item(i).text() for i in range(situation_list.count())]
-                        for stype in used_items['situation_types']:
-                            if stype and stype not in current_situation_types:
-                                situation_list.addItem(stype)
-                                current_situation_types.append(stype)
-                                added_count['situation_types'] += 1
-                        if added_count['situation_types'] > 0:
-                            all_situation_types = [situation_list.item(i).text() for i in range(situation_list.count())]
-                            save_situation_types(all_situation_types)
-                            print(f"✅ {added_count['situation_types']}개 상황 유형이 목록에 추가되었습니다 (노드 로드 전).")
-                    
-                    # 이제 노드 로드 (목록에 항목이 이미 추가된 상태)
-                    result = load_from_json(graph, filename)
-                    if result:
-                        file_type = "워크플로우 파일" if filename.endswith('.flow') else ("ZIP 파일" if filename.endswith('.zip') else "JSON 파일")
-                        update_file_attachment_panel()
-                        added_count = {'tables': 0, 'screens': 0, 'logs': 0, 'situation_types': 0}
-                        
-                        # 테이블 추가
-                        if used_items.get('tables'):
-                            current_tables = [table_list.item(i).text() for i in range(table_list.count())]
-                            for table in used_items['tables']:
-                                if table and table not in current_tables:
-                                    table_list.addItem(table)
-                                    current_tables.append(table)
-                                    added_count['tables'] += 1
-                            if added_count['tables'] > 0:
-                                all_tables = [table_list.item(i).text() for i in range(table_list.count())]
-                                save_tables(all_tables)
-                                print(f"✅ {added_count['tables']}개 테이블이 목록에 추가되었습니다.")
-                        
-                        # 화면 추가
-                        if used_items.get('screens'):
-                            current_screens = [screen_list.item(i).text() for i in range(screen_list.count())]
-                            for screen in used_items['screens']:
-                                if screen and screen not in current_screens:
-                                    screen_list.addItem(screen)
-                                    current_screens.append(screen)
-                                    added_count['screens'] += 1
-                            if added_count['screens'] > 0:
-                                all_screens = [screen_list.item(i).text() for i in range(screen_list.count())]
-                                save_screens(all_screens)
-                                print(f"✅ {added_count['screens']}개 화면이 목록에 추가되었습니다.")
-                        
-                        # 로그 추가
-                        if used_items.get('logs'):
-                            current_logs = [log_list.item(i).text() for i in range(log_list.count())]
-                            for log in used_items['logs']:
-                                if log and log not in current_logs:
-                                    log_list.addItem(log)
-                                    current_logs.append(log)
-                                    added_count['logs'] += 1
-                            if added_count['logs'] > 0:
-                                all_logs = [log_list.item(i).text() for i in range(log_list.count())]
-                                save_logs(all_logs)
-                                print(f"✅ {added_count['logs']}개 로그가 목록에 추가되었습니다.")
-                        
-                        # 상황 유형 추가
-                        if used_items.get('situation_types'):
-                            current_situation_types = [situation_list.item(i).text() for i in range(situation_list.count())]
-                            for stype in used_items['situation_types']:
-                                if stype and stype not in current_situation_types:
-                                    situation_list.addItem(stype)
-                                    current_situation_types.append(stype)
-                                    added_count['situation_types'] += 1
-                            if added_count['situation_types'] > 0:
-                                all_situation_types = [situation_list.item(i).text() for i in range(situation_list.count())]
-                                save_situation_types(all_situation_types)
-                                print(f"✅ {added_count['situation_types']}개 상황 유형이 목록에 추가되었습니다.")
-                        
-                        # 모든 노드의 드롭다운 업데이트 (약간의 지연 후 실행하여 노드가 완전히 로드된 후 업데이트)
-                        def update_all_node_dropdowns():
-                            """모든 노드의 드롭다운을 업데이트"""
-                            try:
-                                # 항목이 추가되었거나, 노드가 로드되었으면 모든 드롭다운 업데이트
-                                if (added_count['tables'] > 0 or 
-                                    added_count['screens'] > 0 or 
-                                    added_count['logs'] > 0 or 
-                                    added_count['situation_types'] > 0):
-                                    update_node_tables()
-                                    update_node_screens()
-                                    update_node_logs()
-                                    update_node_situation_types()
-                                    print("✅ 모든 노드의 드롭다운이 업데이트되었습니다.")
-                            except Exception as e:
-                                print(f"⚠️ 노드 드롭다운 업데이트 중 오류: {e}")
-                                import traceback
-                                traceback.print_exc()
-                        
-                        # 500ms 후에 업데이트 (노드가 완전히 로드된 후)
-                        QtCore.QTimer.singleShot(500, update_all_node_dropdowns)
-                        
-                        # 메시지 구성
-                        added_summary = []
-                        if added_count['tables'] > 0:
-                            added_summary.append(f"테이블 {added_count['tables']}개")
-                        if added_count['screens'] > 0:
-                            added_summary.append(f"화면 {added_count['screens']}개")
-                        if added_count['logs'] > 0:
-                            added_summary.append(f"로그 {added_count['logs']}개")
-                        if added_count['situation_types'] > 0:
-                            added_summary.append(f"상황 유형 {added_count['situation_types']}개")
-                        
-                        message = f"워크플로우를 성공적으로 불러왔습니다!\n\n파일: {filename}\n형식: {file_type}\n노드 수: {len(result.get('steps', []))}개"
-                        if added_summary:
-                            message += f"\n\n✅ 목록에 자동 추가됨: {', '.join(added_summary)}"
-                        message += "\n\n(워크플로우 파일에서 첨부 파일들도 함께 복원되었습니다.)"
-                        
-                        QtWidgets.QMessageBox.information(
-                            main_window,
-                            "불러오기 완료 ✅",
-                            message
-                        )
-                        print(f"✅ 불러오기 완료: {len(result.get('steps', []))}개의 노드가 불러와졌습니다.")
-                    else:
-                        QtWidgets.QMessageBox.warning(
-                            main_window,
-                            "불러오기 실패",
-                            "워크플로우를 불러올 수 없습니다."
-                        )
-                except Exception as e:
-                    import traceback
-                    error_msg = f"불러오기 중 오류가 발생했습니다:\n\n{str(e)}"
-                    print(f"❌ 불러오기 오류: {error_msg}")
-                    QtWidgets.QMessageBox.critical(
+                run_flow_task(
+                    main_window,
+                    "워크플로우 열기",
+                    # 구조 오류는 그래프/목록을 건드리기 전에 작업 스레드에서 검사하여 보고
+                    lambda task: open_flow(filename, progress=task.report, validate=True),
+                    lambda opened: finish_open_json(filename, opened),
+                    on_failed=lambda message: QtWidgets.QMessageBox.critical(
                         main_window,
                         "불러오기 오류 ❌",
-                        error_msg
+                        f"불러오기 중 오류가 발생했습니다:\n\n{message}"
                     )
+                )
         except Exception as e:
             print(f"❌ 파일 다이얼로그 오류: {e}")
             QtWidgets.QMessageBox.critical(
@@ -4035,24 +4144,35 @@ if __name__ == '__main__':
                 if not filename.endswith('.flow') and not filename.endswith('.zip') and not filename.endswith('.json'):
                     filename += '.flow'
                 print(f"\n💾 워크플로우 저장 시작: {filename}")
-                try:
-                    result = export_to_json(graph, filename)
+                # 스냅샷만 GUI 스레드에서 만들고, 직렬화/압축은 백그라운드에서
+                snapshot = build_snapshot(graph, attachment_getter=get_attached_file)
+                revision = dirty_tracker.revision
+                
+                def on_saved(result):
                     file_type = "워크플로우 파일" if filename.endswith('.flow') else ("ZIP 파일" if filename.endswith('.zip') else "JSON 파일")
                     QtWidgets.QMessageBox.information(
                         viewer,
                         "저장 완료 ✅",
-                        f"워크플로우가 성공적으로 저장되었습니다!\n\n파일: {filename}\n형식: {file_type}\n노드 수: {len(result.get('steps', []))}개\n\n(워크플로우 파일에는 JSON과 첨부 파일들이 모두 포함됩니다.)"
+                        f"워크플로우가 성공적으로 저장되었습니다!\n\n파일: {filename}\n형식: {file_type}\n노드 수: {result.get('step_count', 0)}개\n\n(워크플로우 파일에는 JSON과 첨부 파일들이 모두 포함됩니다.)"
                     )
-                    print(f"✅ 저장 완료: {len(result.get('steps', []))}개의 노드가 저장되었습니다.")
-                except Exception as e:
-                    import traceback
-                    error_msg = f"저장 중 오류가 발생했습니다:\n\n{str(e)}\n\n상세:\n{traceback.format_exc()}"
+                    print(f"✅ 저장 완료: {result.get('step_count', 0)}개의 노드가 저장되었습니다.")
+                
+                def on_save_failed(message):
+                    error_msg = f"저장 중 오류가 발생했습니다:\n\n{message}"
                     print(f"❌ 저장 오류: {error_msg}")
                     QtWidgets.QMessageBox.critical(
                         viewer,
                         "저장 오류 ❌",
                         error_msg
                     )
+                
+                run_flow_task(
+                    viewer,
+                    "워크플로우 저장",
+                    lambda task: save_snapshot(snapshot, filename, revision=revision, progress=task.report),
+                    on_saved,
+                    on_failed=on_save_failed
+                )
         except Exception as e:
             print(f"❌ 파일 다이얼로그 오류: {e}")
             QtWidgets.QMessageBox.critical(
@@ -4061,6 +4181,58 @@ if __name__ == '__main__':
                 f"파일 저장 대화상자를 열 수 없습니다:\n{str(e)}"
             )
     
+    def on_validate_workflow():
+        """현재 워크플로우 구조 검사 결과 표시"""
+        problems = validate_graph(graph)
+        if not problems:
+            QtWidgets.QMessageBox.information(main_window, "워크플로우 검사 ✅", "구조 오류가 없습니다.")
+            return
+        for problem in problems:
+            print(f"  ⚠️ {problem}")
+        shown = problems[:20]
+        message = "\n".join(shown)
+        if len(problems) > len(shown):
+            message += f"\n... 외 {len(problems) - len(shown)}건"
+        QtWidgets.QMessageBox.warning(main_window, f"워크플로우 검사 ({len(problems)}건)", message)
+    
+    def on_compact_flow():
+        """열려 있는 .flow 파일을 다시 저장하며 참조하지 않는 첨부 파일을 제거하고 줄어든 크기 표시"""
+        archive = attachment_store.archive_path
+        if archive is None or archive.suffix.lower() != '.flow' or not archive.is_file():
+            QtWidgets.QMessageBox.information(
+                main_window, "파일 정리", "정리할 .flow 파일이 없습니다.\n먼저 .flow 파일을 열거나 저장하세요."
+            )
+            return
+        filename = str(archive)
+        before = archive.stat().st_size
+        print(f"\n🧹 파일 정리 시작: {filename}")
+        snapshot = build_snapshot(graph, attachment_getter=get_attached_file)
+        revision = dirty_tracker.revision
+        
+        def on_compacted(result):
+            # 명령줄 compact와 같은 기준: 회수 = 뺀 첨부의 압축된 크기, 파일 크기 변화는 따로 표시
+            after = Path(filename).stat().st_size
+            reclaimed = result.get('orphan_reclaimed', 0)
+            print(f"✅ 파일 정리 완료: {reclaimed:,} bytes 회수, {before:,} -> {after:,} bytes ({after - before:+,})")
+            QtWidgets.QMessageBox.information(
+                main_window,
+                "파일 정리 완료 🧹",
+                f"파일: {filename}\n"
+                f"제거한 첨부 파일: {result.get('orphan_count', 0)}개 ({result.get('orphan_bytes', 0):,} bytes)\n"
+                f"회수한 용량: {reclaimed:,} bytes (압축된 크기)\n"
+                f"파일 크기: {before:,} -> {after:,} bytes ({after - before:+,})"
+            )
+        
+        run_flow_task(
+            main_window,
+            "파일 정리",
+            lambda task: save_snapshot(snapshot, filename, revision=revision, progress=task.report),
+            on_compacted,
+            on_failed=lambda message: QtWidgets.QMessageBox.critical(
+                main_window, "파일 정리 오류 ❌", f"파일 정리 중 오류가 발생했습니다:\n\n{message}"
+            )
+        )
+    
     # 툴바에 JSON 내보내기 버튼 추가
     try:
         # viewer가 QMainWindow인지 확인하고 툴바 추가
@@ -4107,6 +4279,18 @@ if __name__ == '__main__':
             export_action.triggered.connect(on_export_json)
             export_action.setToolTip("워크플로우를 파일로 저장합니다 (Ctrl+E)")
             
+            file_menu.addSeparator()
+            
+            # 워크플로우 검사
+            validate_action = file_menu.addAction("🩺 워크플로우 검사")
+            validate_action.triggered.connect(on_validate_workflow)
+            validate_action.setToolTip("끊어진 연결, 알 수 없는 노드 타입, 고립된 노드를 검사합니다")
+            
+            # 파일 정리 (참조하지 않는 첨부 파일 제거)
+            compact_action = file_menu.addAction("🧹 파일 정리 (사용하지 않는 첨부 제거)")
+            compact_action.triggered.connect(on_compact_flow)
+            compact_action.setToolTip("열려 있는 .flow 파일에서 어떤 노드도 참조하지 않는 첨부 파일을 제거합니다")
+            
             print("✅ 메뉴바에 파일 메뉴 추가 완료")
             
             # 편집 메뉴 추가
@@ -4174,9 +4358,50 @@ if __name__ == '__main__':
             export_plain_action = export_menu.addAction("JSON 내보내기 (위치 제외)")
             export_plain_action.setToolTip("노드 위치를 제외한 JSON을 저장합니다")
             export_plain_action.triggered.connect(lambda: on_export_plain_json(export_to_plain_json))
+            export_paths_action = export_menu.addAction("추론 경로 내보내기 (JSONL)")
+            export_paths_action.setToolTip("트리거에서 결론까지의 경로를 판단(True/False) 분기와 함께 한 줄씩 저장합니다")
+            export_paths_action.triggered.connect(on_export_reasoning_paths)
     except Exception as e:
         print(f"⚠️ 메뉴바 추가 실패: {e}")
     
+    # 5-1. 편집 저널: 비정상 종료된 세션 복구 + 편집 내용 자동 기록
+    try:
+        orphans = find_orphan_journals(JOURNAL_DIR)
+        if orphans:
+            reply = QtWidgets.QMessageBox.question(
+                main_window,
+                "작업 복구",
+                "이전 실행이 정상적으로 종료되지 않았습니다.\n마지막 편집 상태를 복구하시겠습니까?",
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+                QtWidgets.QMessageBox.Yes
+            )
+            if reply == QtWidgets.QMessageBox.Yes:
+                state = replay_journal(orphans[0])
+                if state:
+                    restore_journal_state(graph, state)
+                    update_file_attachment_panel()
+            for path in orphans:
+                remove_journal(path)
+    except Exception as e:
+        print(f"⚠️ 편집 저널 복구 실패: {e}")
+
+    edit_journal.connect_graph(graph)
+    edit_journal.start(journal_state(graph))
+    app.aboutToQuit.connect(lambda: edit_journal.close(discard=True))
+
+    def on_journal_timer():
+        """변경이 있으면 저널 압축"""
+        try:
+            if edit_journal.ops_since_compaction:
+                checkpoint_journal(graph)
+        except Exception as e:
+            print(f"⚠️ 편집 저널 압축 실패: {e}")
+
+    journal_timer = QtCore.QTimer()
+    journal_timer.timeout.connect(on_journal_timer)
+    journal_timer.start(COMPACTION_INTERVAL * 1000)
+    print(f"✅ 편집 저널 기록 시작: {edit_journal.path}")
+
     # 6. 시작 메시지
     print("\n" + "="*60)
     print("🤖 AI 학습용 워크플로우 구조화 도구")
@@ -0,0 +1,245 @@
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 노드 타입 스키마
+# ============================================
+# 노드 클래스마다 포트, 속성, workflow.json 필드 이름, 기본값, 하위 호환 별칭을 한 곳에 선언합니다.
+# 선언은 모듈을 불러올 때 한 번 타입별 변환 함수(NodeCodec)로 컴파일되며,
+# 내보내기 / 불러오기 / 복사 / 사용 항목 수집은 모두 이 코덱을 사용합니다.
+# (노드 타입 문자열 비교는 타입마다 한 번만 하고 결과를 dict에 보관합니다.)
+# nodes.py의 노드 클래스는 SCHEMA로 자신의 스키마를 참조하고 포트도 여기서 만듭니다.
+# (Qt를 사용하지 않으므로 명령줄 도구 / flow_model에서도 사용할 수 있습니다.)
+
+NODE_IDENTIFIER = 'com.samsung.logistics'
+
+# 사용 항목(used_items) 분류 - 목록 편집기(테이블/화면/로그/상황 유형)와 같은 이름
+CATALOGS = ('tables', 'screens', 'logs', 'situation_types')
+
+
+class Prop:
+    """
+    노드 속성 하나
+    - name: 노드 속성 이름
+    - key: workflow.json 필드 이름 (기본: name)
+    - default: 속성 값이 비어 있을 때 JSON에 기록할 값
+    - aliases: 불러올 때 key가 없으면 차례로 확인할 옛 필드 이름
+    - catalog: 값이 속하는 사용 항목 분류 (CATALOGS 중 하나)
+    - stored=False: JSON에는 저장하지 않고 복사/붙여넣기에만 사용
+    """
+
+    __slots__ = ('name', 'key', 'default', 'aliases', 'catalog', 'stored')
+
+    def __init__(self, name, key=None, default='', aliases=(), catalog=None, stored=True):
+        self.name = name
+        self.key = key or name
+        self.default = default
+        self.aliases = tuple(aliases)
+        self.catalog = catalog
+        self.stored = stored
+
+
+class NodeSchema:
+    """
+    노드 타입 하나의 선언
+    - class_name: nodes.py 클래스 이름 (노드 타입 = NODE_IDENTIFIER + '.' + class_name)
+    - step_type: workflow.json의 짧은 type
+    - inputs / outputs: 포트 이름 (add_input / add_output 순서, 입력 포트는 모두 multi_input)
+    - props: 속성 선언 (JSON 필드 순서)
+    - instruction: 내보낼 때 'instruction' 필드 템플릿 (step 필드로 format, 저장된 값이 있으면 그 값)
+    - color: 노드 색상 (R, G, B) - 캔버스와 .flow 썸네일에서 사용
+    """
+
+    __slots__ = ('class_name', 'step_type', 'inputs', 'outputs', 'props', 'instruction', 'color')
+
+    def __init__(self, class_name, step_type, inputs=(), outputs=(), props=(), instruction=None,
+                 color=(80, 80, 80)):
+        self.class_name = class_name
+        self.step_type = step_type
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.props = tuple(props)
+        self.instruction = instruction
+        self.color = tuple(color)
+
+    @property
+    def node_type(self):
+        return f"{NODE_IDENTIFIER}.{self.class_name}"
+
+
+NODE_SCHEMAS = (
+    NodeSchema(
+        'TriggerSourceNode', 'trigger_source',
+        color=(50, 150, 50),
+        outputs=('상황',),
+        props=(Prop('trigger_source'), Prop('note')),
+    ),
+    NodeSchema(
+        'TriggerNode', 'trigger',
+        color=(20, 100, 50),
+        inputs=('트리거',), outputs=('시작',),
+        props=(Prop('situation'), Prop('situation_type', catalog='situation_types')),
+        instruction="상황: {situation} - 이 상황이 발생했을 때 분석을 시작하세요.",
+    ),
+    NodeSchema(
+        'DataQueryNode', 'observation',
+        color=(10, 50, 80),
+        inputs=('이전 단계', '데이터(List)'), outputs=('다음 단계',),
+        props=(
+            Prop('target_table', key='table', catalog='tables'),
+            Prop('target_col', key='column'),
+            Prop('instruction'),
+            Prop('description', stored=False),
+        ),
+        instruction="{table} 테이블에서 {column} 컬럼을 확인하세요.",
+    ),
+    NodeSchema(
+        'TableNode', 'table',
+        color=(10, 150, 100),
+        inputs=('입력 테이블',), outputs=('테이블 데이터',),
+        props=(Prop('target_table', catalog='tables'), Prop('target_columns')),
+    ),
+    NodeSchema(
+        'ScreenNode', 'screen',
+        color=(150, 50, 150),
+        inputs=('입력 데이터',), outputs=('화면 데이터',),
+        props=(Prop('screen_name', catalog='screens'), Prop('screen_url'), Prop('screen_elements')),
+    ),
+    NodeSchema(
+        'SQLNode', 'sql',
+        color=(200, 150, 50),
+        inputs=('입력 테이블',), outputs=('SQL 데이터',),
+        props=(Prop('sql_query'), Prop('sql_description')),
+    ),
+    NodeSchema(
+        'LogNode', 'log',
+        color=(200, 100, 50),
+        inputs=('입력 데이터',), outputs=('로그 데이터',),
+        props=(Prop('log_source', catalog='logs'), Prop('log_path'), Prop('log_pattern')),
+    ),
+    NodeSchema(
+        'DecisionNode', 'reasoning',
+        color=(80, 20, 20),
+        inputs=('데이터 입력',), outputs=('True (참)', 'False (거짓)'),
+        props=(Prop('condition'), Prop('reasoning')),
+        instruction="조건: {condition} - {reasoning}",
+    ),
+    NodeSchema(
+        'LoopNode', 'loop',
+        color=(100, 50, 150),
+        inputs=('반복 대상 리스트',), outputs=('반복 시작', '반복 종료 시'),
+        # 하위 호환성: 예전 파일은 종료 조건을 instruction에 저장
+        props=(Prop('target'), Prop('exit_condition', aliases=('instruction',))),
+    ),
+    NodeSchema(
+        'ConclusionNode', 'conclusion',
+        color=(200, 120, 50),
+        inputs=('입력',),
+        props=(Prop('conclusion'), Prop('conclusion_type')),
+        instruction="결론: {conclusion}",
+    ),
+)
+
+
+class NodeCodec:
+    """
+    NodeSchema를 컴파일한 변환 함수 묶음
+    - encode(step, props): 노드 속성 dict -> step 필드 (step을 직접 채우고 반환)
+    - decode(step): step -> [(속성 이름, 값)] (step에 있는 필드만, 별칭 포함)
+    - collect(step, used_items): step의 사용 항목을 used_items[분류] set에 추가
+    """
+
+    __slots__ = ('schema', 'step_type', 'node_type', 'encode', 'decode', 'collect')
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.step_type = schema.step_type
+        self.node_type = schema.node_type
+        self.encode = _compile_encoder(schema)
+        self.decode = _compile_decoder(schema)
+        self.collect = _compile_collector(schema)
+
+
+def _compile_encoder(schema):
+    step_type = schema.step_type
+    fields = tuple((p.key, p.name, p.default) for p in schema.props if p.stored)
+    template = schema.instruction
+
+    if template is None:
+        def encode(step, props):
+            step['type'] = step_type
+            for key, name, default in fields:
+                step[key] = props.get(name) or default
+            return step
+    else:
+        def encode(step, props):
+            step['type'] = step_type
+            for key, name, default in fields:
+                step[key] = props.get(name) or default
+            step['instruction'] = step.get('instruction') or template.format_map(step)
+            return step
+    return encode
+
+
+def _compile_decoder(schema):
+    lookups = tuple(((p.key,) + p.aliases, p.name) for p in schema.props if p.stored)
+
+    def decode(step):
+        values = []
+        for keys, name in lookups:
+            for key in keys:
+                if key in step:
+                    values.append((name, step[key]))
+                    break
+        return values
+    return decode
+
+
+def _compile_collector(schema):
+    catalogs = tuple((p.key, p.catalog) for p in schema.props if p.stored and p.catalog)
+
+    def collect(step, used_items):
+        for key, catalog in catalogs:
+            value = step.get(key)
+            # 문자열이 아닌 값(손상된 파일)은 건너뜀 - 구조 검사(validate_steps)에서 오류로 보고됨
+            if isinstance(value, str) and value.strip():
+                used_items[catalog].add(value.strip())
+    return collect
+
+
+CODECS_BY_STEP_TYPE = {schema.step_type: NodeCodec(schema) for schema in NODE_SCHEMAS}
+_CODECS_BY_NODE_TYPE = {codec.node_type: codec for codec in CODECS_BY_STEP_TYPE.values()}
+_CODECS_BY_CLASS = {codec.schema.class_name: codec for codec in CODECS_BY_STEP_TYPE.values()}
+_node_type_cache = dict(_CODECS_BY_NODE_TYPE)
+
+# 복사할 때 스냅샷에 함께 읽어 둘 속성 (모든 노드 타입의 선언된 속성)
+COPY_PROPERTIES = tuple(dict.fromkeys(p.name for schema in NODE_SCHEMAS for p in schema.props))
+
+
+def schema_for_class(class_name):
+    """nodes.py 클래스 이름 -> NodeSchema"""
+    return _CODECS_BY_CLASS[class_name].schema
+
+
+def codec_for_node_type(node_type):
+    """
+    NodeGraphQt 노드 타입 -> NodeCodec (모르는 타입이면 None)
+    식별자가 다른 타입('other.pkg.TableNode')은 클래스 이름으로 찾고 결과를 보관합니다.
+    """
+    try:
+        return _node_type_cache[node_type]
+    except KeyError:
+        codec = _CODECS_BY_CLASS.get(str(node_type).rsplit('.', 1)[-1])
+        _node_type_cache[node_type] = codec
+        return codec
+
+
+def codec_for_step(type_str):
+    """저장된 step type(짧은 이름 또는 전체 노드 타입) -> NodeCodec (모르거나 문자열이 아니면 None)"""
+    if type(type_str) is not str:
+        return None
+    codec = CODECS_BY_STEP_TYPE.get(type_str)
+    if codec is None:
+        codec = _CODECS_BY_NODE_TYPE.get(type_str)
+    return codec
+
+
+def new_used_items():
+    return {catalog: set() for catalog in CATALOGS}
@@ -1,11 +1,21 @@
 from NodeGraphQt import BaseNode, NodeBaseWidget
 from PySide2 import QtWidgets, QtCore
 
+from node_schema import schema_for_class
+
 
 # ============================================
 # AI 학습용 노하우 구조화 도구 - 노드 정의
 # ============================================
 
+def add_schema_ports(node, schema):
+    """스키마에 선언된 입력/출력 포트를 순서대로 추가 (입력 포트는 여러 연결 허용)"""
+    for port_name in schema.inputs:
+        node.add_input(port_name, multi_input=True)
+    for port_name in schema.outputs:
+        node.add_output(port_name)
+
+
 # [추가] 여러 줄 텍스트 입력 위젯 정의
 class MultiLineTextWidget(NodeBaseWidget):
     def __init__(self, parent=None, name=None, label='정보 수집 설명'):
@@ -109,15 +119,16 @@ class TriggerSourceNode(BaseNode):
     """
     __identifier__ = 'com.samsung.logistics'
     NODE_NAME = '시작'
+    SCHEMA = schema_for_class('TriggerSourceNode')
 
     def __init__(self):
         super(TriggerSourceNode, self).__init__()
         
         # 밝은 초록색 계열 - 트리거 소스
-        self.set_color(50, 150, 50)
+        self.set_color(*self.SCHEMA.color)
         
-        # 출력만 있음 (상황 노드의 입력에 연결)
-        self.add_output('상황')
+        # 출력만 있음 (상황 노드의 입력에 연결) - 포트는 SCHEMA에서
+        add_schema_ports(self, self.SCHEMA)
         
         # 트리거 소스 선택
         trigger_sources = ['메일', '메신저', '이상감지']
@@ -138,17 +149,16 @@ class TriggerNode(BaseNode):
     """
     __identifier__ = 'com.samsung.logistics'
     NODE_NAME = '상황'
+    SCHEMA = schema_for_class('TriggerNode')
 
     def __init__(self):
         super(TriggerNode, self).__init__()
         
         # 초록색 계열 - 시작점을 나타냄
-        self.set_color(20, 100, 50)
+        self.set_color(*self.SCHEMA.color)
         
-        # 입력: 상황 트리거 소스에서 연결
-        self.add_input('트리거', multi_input=True)
-        # 출력: 분석 시작
-        self.add_output('시작')
+        # 입력: 상황 트리거 소스에서 연결 / 출력: 분석 시작 (SCHEMA)
+        add_schema_ports(self, self.SCHEMA)
         
         # 상황 설명 입력
         self.add_text_input('situation', '상황 설명')
@@ -187,19 +197,17 @@ class DataQueryNode(BaseNode):
     """
     __identifier__ = 'com.samsung.logistics'
     NODE_NAME = '정보 수집 (Data Gathering)'
+    SCHEMA = schema_for_class('DataQueryNode')
 
     def __init__(self): 
         super(DataQueryNode, self).__init__()
         
         # 파란색 계열 - 데이터 관련
-        self.set_color(10, 50, 80)
+        self.set_color(*self.SCHEMA.color)
         
-        # 입력과 출력 포트
-        # multi_input=True로 설정하여 여러 노드의 출력을 하나의 입력에 연결 가능
-        self.add_input('이전 단계', multi_input=True)
+        # 입력과 출력 포트 (SCHEMA)
         # 데이터(List) 입력에 여러 데이터 소스 노드들(테이블, 화면, 로그)을 연결 가능
-        self.add_input('데이터(List)', multi_input=True)
-        self.add_output('다음 단계')
+        add_schema_ports(self, self.SCHEMA)
         
         # 정보 수집에 대한 설명만 입력 (여러 줄 입력 가능)
         # 일단 add_text_input을 사용하고, 나중에 main.py에서 위젯을 교체
@@ -216,18 +224,17 @@ class TableNode(BaseNode):
     """
     __identifier__ = 'com.samsung.logistics'
     NODE_NAME = 'DB 테이블'
+    SCHEMA = schema_for_class('TableNode')
 
     def __init__(self): 
         super(TableNode, self).__init__()
         
         # 청록색 계열 - 테이블 데이터
-        self.set_color(10, 150, 100)
+        self.set_color(*self.SCHEMA.color)
         
-        # 입력 포트 추가 (다른 테이블로부터 만들어질 수 있으므로)
-        self.add_input('입력 테이블', multi_input=True)
-        
-        # 출력 (정보 수집 노드의 데이터(List)에 연결)
-        self.add_output('테이블 데이터')
+        # 입력 포트 (다른 테이블로부터 만들어질 수 있으므로)
+        # 출력 (정보 수집 노드의 데이터(List)에 연결) - 포트는 SCHEMA에서
+        add_schema_ports(self, self.SCHEMA)
         
         # 테이블 선택 (JSON 파일에서 로드)
         import json
@@ -272,18 +279,17 @@ class ScreenNode(BaseNode):
     """
     __identifier__ = 'com.samsung.logistics'
     NODE_NAME = '화면 (Screen)'
+    SCHEMA = schema_for_class('ScreenNode')
 
     def __init__(self): 
         super(ScreenNode, self).__init__()
         
         # 보라색 계열 - 화면 데이터
-        self.set_color(150, 50, 150)
-        
-        # 입력 포트 추가 (다른 소스로부터 만들어질 수 있으므로)
-        self.add_input('입력 데이터', multi_input=True)
+        self.set_color(*self.SCHEMA.color)
         
-        # 출력 (정보 수집 노드의 데이터(List)에 연결)
-        self.add_output('화면 데이터')
+        # 입력 포트 (다른 소스로부터 만들어질 수 있으므로)
+        # 출력 (정보 수집 노드의 데이터(List)에 연결) - 포트는 SCHEMA에서
+        add_schema_ports(self, self.SCHEMA)
         
         # 화면 선택 (JSON 파일에서 로드)
         import json
@@ -322,18 +328,17 @@ class SQLNode(BaseNode):
     """
     __identifier__ = 'com.samsung.logistics'
     NODE_NAME = 'SQL'
+    SCHEMA = schema_for_class('SQLNode')
 
     def __init__(self): 
         super(SQLNode, self).__init__()
         
         # 노란색 계열 - SQL 데이터
-        self.set_color(200, 150, 50)
+        self.set_color(*self.SCHEMA.color)
         
-        # 입력 포트 추가 (다른 테이블로부터 만들어질 수 있으므로)
-        self.add_input('입력 테이블', multi_input=True)
-        
-        # 출력 (정보 수집 노드의 데이터(List)에 연결)
-        self.add_output('SQL 데이터')
+        # 입력 포트 (다른 테이블로부터 만들어질 수 있으므로)
+        # 출력 (정보 수집 노드의 데이터(List)에 연결) - 포트는 SCHEMA에서
+        add_schema_ports(self, self.SCHEMA)
         
         # SQL 쿼리 입력
         self.add_text_input('sql_query', 'SQL 쿼리')
@@ -353,18 +358,17 @@ class LogNode(BaseNode):
     """
     __identifier__ = 'com.samsung.logistics'
     NODE_NAME = '로그 (Log)'
+    SCHEMA = schema_for_class('LogNode')
 
     def __init__(self): 
         super(LogNode, self).__init__()
         
         # 주황색 계열 - 로그 데이터
-        self.set_color(200, 100, 50)
-        
-        # 입력 포트 추가 (다른 소스로부터 만들어질 수 있으므로)
-        self.add_input('입력 데이터', multi_input=True)
+        self.set_color(*self.SCHEMA.color)
         
-        # 출력 (정보 수집 노드의 데이터(List)에 연결)
-        self.add_output('로그 데이터')
+        # 입력 포트 (다른 소스로부터 만들어질 수 있으므로)
+        # 출력 (정보 수집 노드의 데이터(List)에 연결) - 포트는 SCHEMA에서
+        add_schema_ports(self, self.SCHEMA)
         
         # 로그 소스 선택 (JSON 파일에서 로드)
         import json
@@ -405,19 +409,16 @@ class DecisionNode(BaseNode):
     """
     __identifier__ = 'com.samsung.logistics'
     NODE_NAME = '판단 (Decision)'
+    SCHEMA = schema_for_class('DecisionNode')
 
     def __init__(self):
         super(DecisionNode, self).__init__()
         
         # 붉은 계열 - 판단/분기점
-        self.set_color(80, 20, 20)
+        self.set_color(*self.SCHEMA.color)
         
-        # multi_input=True로 설정하여 여러 노드의 출력을 하나의 입력에 연결 가능
-        self.add_input('데이터 입력', multi_input=True)
-        
-        # Yes / No 분기
-        self.add_output('True (참)')
-        self.add_output('False (거짓)')
+        # 데이터 입력 (여러 연결 허용) + Yes / No 분기 (SCHEMA)
+        add_schema_ports(self, self.SCHEMA)
         
         # 판단 조건 (논리식)
         self.add_text_input('condition', '판단 조건')
@@ -435,19 +436,17 @@ class LoopNode(BaseNode):
     """
     __identifier__ = 'com.samsung.logistics'
     NODE_NAME = '반복 (Loop)'
+    SCHEMA = schema_for_class('LoopNode')
 
     def __init__(self):
         super(LoopNode, self).__init__()
         
         # 보라색 계열 - 반복/그룹
-        self.set_color(100, 50, 150)
-        
-        # multi_input=True로 설정하여 여러 노드의 출력을 하나의 입력에 연결 가능
-        self.add_input('반복 대상 리스트', multi_input=True)
+        self.set_color(*self.SCHEMA.color)
         
-        # 반복 내부로 들어가는 포트와 반복 종료 시 나가는 포트
-        self.add_output('반복 시작')
-        self.add_output('반복 종료 시')
+        # 반복 대상 리스트 입력 (여러 연결 허용)
+        # 반복 내부로 들어가는 포트와 반복 종료 시 나가는 포트 (SCHEMA)
+        add_schema_ports(self, self.SCHEMA)
         
         # 반복 대상 설명
         self.add_text_input('target', '반복 대상')
@@ -465,15 +464,16 @@ class ConclusionNode(BaseNode):
     """
     __identifier__ = 'com.samsung.logistics'
     NODE_NAME = '결론 (Conclusion)'
+    SCHEMA = schema_for_class('ConclusionNode')
 
     def __init__(self):
         super(ConclusionNode, self).__init__()
         
         # 주황색 계열 - 결론/종료
-        self.set_color(200, 120, 50)
+        self.set_color(*self.SCHEMA.color)
         
-        # multi_input=True로 설정하여 여러 노드의 출력을 하나의 입력에 연결 가능
-        self.add_input('입력', multi_input=True)
+        # 입력만 있음 (여러 연결 허용) - 포트는 SCHEMA에서
+        add_schema_ports(self, self.SCHEMA)
         
         # 결론 내용
         self.add_text_input('conclusion', '결론 내용')
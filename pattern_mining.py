@@ -0,0 +1,342 @@
+import os
+import json
+import time
+import hashlib
+import functools
+import itertools
+import multiprocessing
+
+from dataset_export import _init_worker, discover_flows
+from flow_model import open_flow
+from node_schema import CODECS_BY_STEP_TYPE, NODE_SCHEMAS, codec_for_step
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 반복 패턴(빈발 부분 그래프) 찾기
+# ============================================
+# 라이브러리의 여러 flow에 되풀이해서 나오는 조사 조각을 찾습니다.
+# (예: TableNode(TB_OHT_STATUS) -> DataQueryNode(TB_OHT_STATUS) -> DecisionNode)
+# - 노드 라벨 = step 타입 + 대표 속성 (스키마에서 사용 항목 분류(catalog)가 있는 첫 속성: 테이블/화면/로그 등)
+# - flow마다 연결된 부분 그래프(노드 max_nodes개 이하)를 ESU 방식으로 한 번씩만 열거하고,
+#   같은 라벨끼리 순서를 바꿔 가며 가장 작은 표현(정규형)을 골라 해시합니다.
+#   -> 모양이 같은 부분 그래프는 어느 flow에서 어떤 순서로 나와도 같은 해시
+# - flow 단위 작업은 프로세스 풀에서 나눠 처리하고, 부모는 해시별로 나온 flow를 모읍니다.
+# - 결과: 지지도(나온 flow 수) 높은 순 -> 노드 수 많은 순으로 정렬한 패턴 목록
+# (Qt를 사용하지 않으므로 명령줄 도구에서도 사용할 수 있습니다.)
+
+DEFAULT_MAX_NODES = 4
+DEFAULT_MIN_SUPPORT = 2
+# flow 하나에서 열거할 최대 부분 그래프 수 (입력이 아주 많은 노드가 있으면 조합이 폭발하므로 제한)
+DEFAULT_MAX_SUBGRAPHS = 200000
+# 작업 프로세스 하나가 보관할 정규형 계산 결과 수
+CANONICAL_CACHE_SIZE = 100000
+
+# step 타입 -> 라벨에 붙일 대표 속성 키
+LABEL_KEYS = {
+    schema.step_type: next((p.key for p in schema.props if p.stored and p.catalog), None)
+    for schema in NODE_SCHEMAS
+}
+
+
+def step_label(step):
+    """step -> 'type' 또는 'type[대표 속성 값]'"""
+    codec = codec_for_step(step.get('type', ''))
+    step_type = codec.step_type if codec is not None else str(step.get('type', ''))
+    key = LABEL_KEYS.get(step_type)
+    value = step.get(key) if key else None
+    if isinstance(value, str) and value.strip():
+        return f"{step_type}[{value.strip()}]"
+    return step_type
+
+
+def flow_graph(workflow_data):
+    """워크플로우 dict -> (라벨 목록, 방향 연결 [(from, to, 출력 포트)], 무방향 인접 set 목록, step id 목록)"""
+    steps = [s for s in workflow_data.get('steps') or [] if isinstance(s, dict)]
+    index_of = {}
+    for step in steps:
+        try:
+            index_of.setdefault(step.get('id'), len(index_of))
+        except TypeError:
+            continue
+    step_ids = list(index_of)
+    labels = [None] * len(step_ids)
+    edges = set()
+    for step in steps:
+        try:
+            source = index_of.get(step.get('id'))
+        except TypeError:
+            continue
+        if source is None or labels[source] is not None:
+            continue
+        labels[source] = step_label(step)
+        for conn in step.get('connections') or []:
+            if not isinstance(conn, dict):
+                continue
+            try:
+                target = index_of.get(conn.get('to_node_step_id'))
+            except TypeError:
+                continue
+            port = conn.get('from_port')
+            if target is not None and target != source:
+                edges.add((source, target, port if type(port) is int else 0))
+    adjacency = [set() for _ in step_ids]
+    for source, target, _port in edges:
+        adjacency[source].add(target)
+        adjacency[target].add(source)
+    return labels, sorted(edges), adjacency, step_ids
+
+
+def iter_connected_subgraphs(adjacency, max_nodes):
+    """
+    연결된 노드 집합(2개 이상, max_nodes개 이하)을 중복 없이 열거 (ESU 알고리즘)
+    각 집합은 가장 작은 번호의 노드에서 한 번만 만들어집니다.
+    """
+    def extend(subgraph, frontier, neighborhood, root):
+        yield subgraph
+        if len(subgraph) == max_nodes:
+            return
+        frontier = list(frontier)
+        while frontier:
+            node = frontier.pop()
+            # 새로 추가한 노드의 이웃 중, 지금 부분 그래프에도 그 이웃에도 없는 노드만 확장 후보로 추가
+            exclusive = [n for n in adjacency[node] if n > root and n not in subgraph and n not in neighborhood]
+            yield from extend(subgraph + (node,), frontier + exclusive,
+                              neighborhood | adjacency[node], root)
+
+    for root in range(len(adjacency)):
+        yield from itertools.islice(extend((root,), [n for n in adjacency[root] if n > root],
+                                           adjacency[root] | {root}, root), 1, None)
+
+
+class PatternCanonizer:
+    """부분 그래프 -> (정규형 해시, 정규형 라벨 목록, 정규형 연결 목록) (같은 모양이면 같은 결과)"""
+
+    def __init__(self, cache_size=CANONICAL_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache = {}
+
+    def canonize(self, labels, edges):
+        """labels: 노드 라벨 튜플, edges: 로컬 번호 연결 튜플 (from, to, port)"""
+        key = (labels, edges)
+        result = self._cache.get(key)
+        if result is not None:
+            return result
+        n = len(labels)
+        out_degree = [0] * n
+        in_degree = [0] * n
+        for source, target, _port in edges:
+            out_degree[source] += 1
+            in_degree[target] += 1
+        invariants = [(labels[i], out_degree[i], in_degree[i]) for i in range(n)]
+        ordered = sorted(range(n), key=invariants.__getitem__)
+        # 불변량이 같은 노드끼리만 순서를 바꿔 보며 가장 작은 연결 목록을 고름
+        groups = [list(group) for _inv, group in itertools.groupby(ordered, key=invariants.__getitem__)]
+        best = None
+        for arrangement in itertools.product(*(itertools.permutations(group) for group in groups)):
+            position = {}
+            for node in itertools.chain.from_iterable(arrangement):
+                position[node] = len(position)
+            code = tuple(sorted((position[s], position[t], p) for s, t, p in edges))
+            if best is None or code < best:
+                best = code
+        canonical_labels = tuple(labels[i] for i in ordered)
+        digest = hashlib.sha1(json.dumps([canonical_labels, best], ensure_ascii=False).encode('utf-8'))
+        result = (digest.hexdigest()[:20], canonical_labels, best)
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[key] = result
+        return result
+
+
+_canonizer = None
+
+
+def mine_flow_data(workflow_data, max_nodes=DEFAULT_MAX_NODES, max_subgraphs=DEFAULT_MAX_SUBGRAPHS,
+                   canonizer=None):
+    """
+    워크플로우 dict 하나의 부분 그래프 패턴
+    반환값: ({해시: (라벨, 연결, 처음 나온 step id 목록)}, 열거를 중간에 멈췄는지)
+    """
+    canonizer = canonizer or PatternCanonizer()
+    labels, edges, adjacency, step_ids = flow_graph(workflow_data)
+    edges_by_node = {}
+    for edge in edges:
+        edges_by_node.setdefault(edge[0], []).append(edge)
+    patterns = {}
+    truncated = False
+    for count, subgraph in enumerate(iter_connected_subgraphs(adjacency, max_nodes)):
+        if count >= max_subgraphs:
+            truncated = True
+            break
+        nodes = tuple(sorted(subgraph))
+        local = {node: i for i, node in enumerate(nodes)}
+        local_edges = tuple((local[s], local[t], p) for node in nodes for s, t, p in edges_by_node.get(node, ())
+                            if t in local)
+        digest, canonical_labels, canonical_edges = canonizer.canonize(
+            tuple(labels[node] for node in nodes), local_edges)
+        if digest not in patterns:
+            patterns[digest] = (canonical_labels, canonical_edges, [step_ids[node] for node in nodes])
+    return patterns, truncated
+
+
+def mine_flow_file(task, max_nodes=DEFAULT_MAX_NODES, max_subgraphs=DEFAULT_MAX_SUBGRAPHS):
+    """(작업 프로세스) .flow 하나 -> (키, 패턴 dict, 중간에 멈췄는지, 오류 메시지 또는 None)"""
+    global _canonizer
+    if _canonizer is None:
+        _canonizer = PatternCanonizer()
+    key, _source = task
+    try:
+        patterns, truncated = mine_flow_data(open_flow(key).data, max_nodes, max_subgraphs, _canonizer)
+        return key, patterns, truncated, None
+    except Exception as e:
+        return key, {}, False, f"{type(e).__name__}: {e}"
+
+
+def sub_patterns(labels, edges, canonizer):
+    """패턴에서 노드 하나를 뺀 연결된 부분 패턴들의 해시 (노드가 2개 이하면 빈 set)"""
+    found = set()
+    if len(labels) <= 2:
+        return found
+    for removed in range(len(labels)):
+        kept = [i for i in range(len(labels)) if i != removed]
+        local = {node: i for i, node in enumerate(kept)}
+        local_edges = tuple((local[s], local[t], p) for s, t, p in edges if s in local and t in local)
+        adjacency = [set() for _ in kept]
+        for s, t, _p in local_edges:
+            adjacency[s].add(t)
+            adjacency[t].add(s)
+        seen = {0}
+        pending = [0]
+        while pending:
+            for neighbor in adjacency[pending.pop()]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    pending.append(neighbor)
+        if len(seen) == len(kept):
+            found.add(canonizer.canonize(tuple(labels[i] for i in kept), local_edges)[0])
+    return found
+
+
+def describe_pattern(labels, edges):
+    """패턴 -> 사람이 읽는 한 줄 ('table[TB] → observation[TB] → reasoning' / 분기는 포트 이름)"""
+    def port_name(node, port):
+        step_type = labels[node].split('[', 1)[0]
+        codec = CODECS_BY_STEP_TYPE.get(step_type)
+        outputs = codec.schema.outputs if codec is not None else ()
+        if len(outputs) > 1:
+            return outputs[port] if 0 <= port < len(outputs) else str(port)
+        return ''
+
+    # 한 줄로 이어지는 체인이면 화살표로
+    targets = [t for _s, t, _p in edges]
+    sources = [s for s, _t, _p in edges]
+    if len(edges) == len(labels) - 1 and len(set(targets)) == len(targets) and len(set(sources)) == len(sources):
+        following = {s: (t, p) for s, t, p in edges}
+        start = next(iter(set(range(len(labels))) - set(targets)), None)
+        if start is not None:
+            parts = [labels[start]]
+            node = start
+            while node in following:
+                target, port = following[node]
+                name = port_name(node, port)
+                parts.append(f"-({name})→ {labels[target]}" if name else f"→ {labels[target]}")
+                node = target
+            if len(parts) == len(labels):
+                return ' '.join(parts)
+    nodes = ', '.join(f"{i + 1}:{label}" for i, label in enumerate(labels))
+    links = ', '.join(f"{s + 1}→{t + 1}" + (f"({port_name(s, p)})" if port_name(s, p) else '')
+                      for s, t, p in edges)
+    return f"{nodes} | {links}"
+
+
+class PatternMiner:
+    """
+    .flow 파일들 -> 반복 패턴 목록
+    - max_nodes: 패턴 최대 노드 수, min_support: 최소 지지도(나온 flow 수)
+    - closed_only: 노드를 하나 더 붙인 패턴이 같은 flow들에 똑같이 나오면 작은 쪽은 빼고 큰 쪽만 남김
+    - workers: 작업 프로세스 수 (기본: CPU 수, 1이면 풀 없이 현재 프로세스에서 처리)
+    - progress(done, total, label): 파일 하나를 끝낼 때마다 호출
+    """
+
+    def __init__(self, max_nodes=DEFAULT_MAX_NODES, min_support=DEFAULT_MIN_SUPPORT, workers=None,
+                 max_subgraphs=DEFAULT_MAX_SUBGRAPHS, closed_only=True, progress=None):
+        self.max_nodes = max(2, max_nodes)
+        self.min_support = max(1, min_support)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_subgraphs = max_subgraphs
+        self.closed_only = closed_only
+        self.progress = progress
+
+    def _iter_results(self, tasks):
+        mine = functools.partial(mine_flow_file, max_nodes=self.max_nodes, max_subgraphs=self.max_subgraphs)
+        if self.workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                yield mine(task)
+            return
+        workers = min(self.workers, len(tasks))
+        chunksize = max(1, min(32, len(tasks) // (workers * 8)))
+        with multiprocessing.get_context().Pool(workers, initializer=_init_worker) as pool:
+            yield from pool.imap_unordered(mine, tasks, chunksize)
+
+    def run(self, roots):
+        """
+        roots 아래의 .flow에서 패턴 찾기
+        반환값: {files, failed, truncated, seconds, patterns: [{id, support, size, labels, edges, text,
+                 flows, example: {source, step_ids}}]} (지지도 높은 순)
+        """
+        started = time.monotonic()
+        tasks = discover_flows(roots)
+        sources = dict(tasks)
+        flows_of = {}
+        shapes = {}
+        failed = 0
+        truncated = []
+        for index, (key, patterns, was_truncated, error) in enumerate(self._iter_results(tasks), 1):
+            if error:
+                failed += 1
+                print(f"  ❌ {sources[key]}: {error}")
+            else:
+                if was_truncated:
+                    truncated.append(sources[key])
+                for digest, (labels, edges, step_ids) in patterns.items():
+                    flows_of.setdefault(digest, []).append(key)
+                    if digest not in shapes:
+                        shapes[digest] = (labels, edges, key, step_ids)
+            if self.progress:
+                self.progress(index, len(tasks), sources[key])
+
+        frequent = {digest: len(keys) for digest, keys in flows_of.items() if len(keys) >= self.min_support}
+        absorbed = set()
+        if self.closed_only:
+            # 큰 패턴이 나온 flow는 항상 작은 패턴도 포함하므로, 지지도가 같으면 나온 flow 목록도 같음
+            canonizer = PatternCanonizer()
+            for digest, support in frequent.items():
+                labels, edges = shapes[digest][:2]
+                for child in sub_patterns(labels, edges, canonizer):
+                    if frequent.get(child) == support:
+                        absorbed.add(child)
+
+        results = []
+        for digest, support in frequent.items():
+            if digest in absorbed:
+                continue
+            keys = flows_of[digest]
+            labels, edges, example_key, step_ids = shapes[digest]
+            results.append({
+                "id": digest,
+                "support": support,
+                "size": len(labels),
+                "labels": list(labels),
+                "edges": [list(edge) for edge in edges],
+                "text": describe_pattern(labels, edges),
+                "flows": sorted(sources[k] for k in keys),
+                "example": {"source": sources[example_key], "step_ids": step_ids},
+            })
+        results.sort(key=lambda p: (-p['support'], -p['size'], p['text']))
+        return {
+            "files": len(tasks),
+            "failed": failed,
+            "truncated": truncated,
+            "seconds": time.monotonic() - started,
+            "patterns": results,
+        }
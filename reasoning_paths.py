@@ -0,0 +1,258 @@
+import random
+
+from node_schema import CODECS_BY_STEP_TYPE, codec_for_step
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 추론 경로(reasoning path) 열거
+# ============================================
+# workflow.json의 step/connection을 그래프로 보고, 트리거(TriggerNode)에서 결론(ConclusionNode)까지의
+# 모든 경로를 순서 있는 추론 과정(trace)으로 꺼냅니다.
+# - 판단(DecisionNode)을 지날 때는 True/False 중 어느 쪽으로 갔는지 branch에 기록
+# - 반복(LoopNode) 등으로 생기는 되돌아가는 연결(back-edge)은 DFS로 찾아 끊고, 대상 step에 repeats 표시
+# - 끊은 뒤의 DAG에서 step마다 "여기서 결론까지 가는 경로 수"를 한 번씩만 계산(메모이제이션 DP)하므로,
+#   분기가 많아 경로가 수백만 개여도 경로 수는 바로 알 수 있고, 필요한 개수만 열거하거나
+#   번호로 바로 찾아(path_at) 고르게 샘플링할 수 있습니다.
+# (Qt를 사용하지 않으므로 명령줄 도구 / 데이터셋 내보내기에서도 사용할 수 있습니다.)
+
+START_TYPE = 'trigger'
+END_TYPE = 'conclusion'
+# 경로 step의 inputs로 함께 기록할 입력(근거) 노드 타입
+INPUT_TYPES = ('trigger_source', 'table', 'screen', 'log', 'sql')
+# 출력 포트 번호 -> branch 값 (나머지 타입은 출력 포트가 둘 이상일 때 포트 이름)
+BRANCH_VALUES = {'reasoning': (True, False)}
+# trace에 넣지 않는 step 키 (나머지 필드는 그대로 기록)
+TRACE_SKIP_KEYS = frozenset(('id', 'name', 'type', 'position', 'node_id', 'connections'))
+
+# 데이터셋 내보내기에서 flow 하나당 기본 최대 경로 수 (넘으면 고르게 샘플링)
+DEFAULT_MAX_PATHS = 1000
+
+
+def _short_type(type_str):
+    codec = codec_for_step(type_str)
+    return codec.step_type if codec is not None else type_str
+
+
+def _port_index(conn, output_names):
+    port = conn.get('from_port')
+    if type(port) is int:
+        return port
+    name = conn.get('from_port_name')
+    if name in output_names:
+        return output_names.index(name)
+    return 0
+
+
+class ReasoningGraph:
+    """
+    step 목록 -> 트리거에서 결론까지의 경로 그래프
+    - path_count: 전체 경로 수 (int, 매우 클 수 있음)
+    - iter_paths(limit): 경로를 순서대로 생성 / path_at(i): i번째 경로 / sample_paths(k, seed): k개 샘플
+    경로는 ((step id, 선택한 출력 포트 또는 None), ...) 튜플이고 trace(path)로 기록용 dict 목록이 됩니다.
+    """
+
+    def __init__(self, steps):
+        self.steps = {}
+        self.types = {}
+        order = []
+        for step in steps:
+            if not isinstance(step, dict):
+                continue
+            step_id = step.get('id')
+            try:
+                if step_id is None or step_id in self.steps:
+                    continue
+            except TypeError:
+                continue
+            self.steps[step_id] = step
+            self.types[step_id] = _short_type(step.get('type', ''))
+            order.append(step_id)
+
+        # 인접 리스트 (연결 순서 유지, 같은 포트의 중복 연결 제거)
+        self.successors = {}
+        self.predecessors = {step_id: [] for step_id in order}
+        for step_id in order:
+            step = self.steps[step_id]
+            codec = CODECS_BY_STEP_TYPE.get(self.types[step_id])
+            output_names = list(codec.schema.outputs) if codec is not None else []
+            edges = []
+            seen = set()
+            for conn in step.get('connections') or []:
+                if not isinstance(conn, dict):
+                    continue
+                target = conn.get('to_node_step_id')
+                try:
+                    if target not in self.steps:
+                        continue
+                except TypeError:
+                    continue
+                edge = (_port_index(conn, output_names), target)
+                if edge not in seen:
+                    seen.add(edge)
+                    edges.append(edge)
+                    self.predecessors[target].append(step_id)
+            self.successors[step_id] = edges
+
+        self.triggers = [step_id for step_id in order if self.types[step_id] == START_TYPE]
+        self.back_edges = set()
+        self.repeats = set()
+        self.counts = {}
+        self._build_dag()
+        self.path_count = sum(self.counts.get(t, 0) for t in self.triggers)
+
+    def _build_dag(self):
+        """트리거에서 DFS: 되돌아가는 연결을 찾아 끊고, 끝난 step부터 결론까지의 경로 수 계산 (반복문)"""
+        counts = self.counts
+        visiting = set()
+        dag = {}
+        for root in self.triggers:
+            if root in counts:
+                continue
+            visiting.add(root)
+            stack = [(root, iter(self._next_steps(root)))]
+            while stack:
+                step_id, edges = stack[-1]
+                for port, target in edges:
+                    if target in visiting:
+                        self.back_edges.add((step_id, port, target))
+                        self.repeats.add(target)
+                    elif target not in counts:
+                        visiting.add(target)
+                        stack.append((target, iter(self._next_steps(target))))
+                        break
+                else:
+                    stack.pop()
+                    visiting.discard(step_id)
+                    kept = [(port, target) for port, target in self._next_steps(step_id)
+                            if (step_id, port, target) not in self.back_edges]
+                    dag[step_id] = kept
+                    count = 1 if self.types[step_id] == END_TYPE else 0
+                    for _port, target in kept:
+                        count += counts[target]
+                    counts[step_id] = count
+        # 경로 수가 0인 다음 step은 열거할 때 건너뛰도록 미리 제거
+        self.dag = {step_id: [(port, target) for port, target in kept if counts[target]]
+                    for step_id, kept in dag.items()}
+
+    def _next_steps(self, step_id):
+        # 결론에 도달하면 경로가 끝남
+        if self.types[step_id] == END_TYPE:
+            return ()
+        return self.successors[step_id]
+
+    def iter_paths(self, limit=None):
+        """경로를 순서대로 생성 (limit개까지)"""
+        produced = 0
+        for root in self.triggers:
+            if not self.counts.get(root):
+                continue
+            path = [root]
+            ports = []
+            pending = [iter(self.dag[root])]
+            while pending:
+                for port, target in pending[-1]:
+                    path.append(target)
+                    ports.append(port)
+                    if self.types[target] == END_TYPE:
+                        yield self._pack(path, ports)
+                        produced += 1
+                        if limit is not None and produced >= limit:
+                            return
+                        path.pop()
+                        ports.pop()
+                        continue
+                    pending.append(iter(self.dag[target]))
+                    break
+                else:
+                    pending.pop()
+                    path.pop()
+                    if ports:
+                        ports.pop()
+
+    @staticmethod
+    def _pack(path, ports):
+        return tuple(zip(path, ports + [None]))
+
+    def path_at(self, index):
+        """index번째 경로 (iter_paths 순서, 0 <= index < path_count) - 경로 수를 빼 가며 바로 찾음"""
+        if not 0 <= index < self.path_count:
+            raise IndexError(index)
+        for root in self.triggers:
+            count = self.counts.get(root, 0)
+            if index >= count:
+                index -= count
+                continue
+            path = [root]
+            ports = []
+            step_id = root
+            while self.types[step_id] != END_TYPE:
+                for port, target in self.dag[step_id]:
+                    count = self.counts[target]
+                    if index < count:
+                        path.append(target)
+                        ports.append(port)
+                        step_id = target
+                        break
+                    index -= count
+            return self._pack(path, ports)
+        raise IndexError(index)
+
+    def sample_paths(self, k, seed=0):
+        """서로 다른 경로 k개를 고르게 샘플링 (경로 수가 k 이하면 전부), [(번호, 경로)] 번호 순"""
+        if k >= self.path_count:
+            return list(enumerate(self.iter_paths()))
+        rng = random.Random(seed)
+        indices = set()
+        while len(indices) < k:
+            indices.add(rng.randrange(self.path_count))
+        return [(index, self.path_at(index)) for index in sorted(indices)]
+
+    def trace(self, path):
+        """경로 -> 순서 있는 추론 과정 [{order, id, type, name, 필드..., branch, inputs, repeats}]"""
+        trace = []
+        for order, (step_id, port) in enumerate(path, 1):
+            step = self.steps[step_id]
+            step_type = self.types[step_id]
+            entry = {"order": order, "id": step_id, "type": step_type, "name": step.get('name', '')}
+            entry.update((k, v) for k, v in step.items() if k not in TRACE_SKIP_KEYS)
+            if port is not None:
+                branch = self._branch(step_type, port)
+                if branch is not None:
+                    entry["branch"] = branch
+            inputs = [self._input_entry(pred) for pred in self.predecessors[step_id]
+                      if self.types[pred] in INPUT_TYPES]
+            if inputs:
+                entry["inputs"] = inputs
+            if step_id in self.repeats:
+                entry["repeats"] = True
+            trace.append(entry)
+        return trace
+
+    def _branch(self, step_type, port):
+        values = BRANCH_VALUES.get(step_type)
+        if values is not None:
+            return values[port] if port < len(values) else port
+        codec = CODECS_BY_STEP_TYPE.get(step_type)
+        outputs = codec.schema.outputs if codec is not None else ()
+        if len(outputs) > 1:
+            return outputs[port] if port < len(outputs) else port
+        return None
+
+    def _input_entry(self, step_id):
+        step = self.steps[step_id]
+        entry = {"id": step_id, "type": self.types[step_id], "name": step.get('name', '')}
+        entry.update((k, v) for k, v in step.items() if k not in TRACE_SKIP_KEYS)
+        return entry
+
+
+def reasoning_traces(workflow_data, max_paths=DEFAULT_MAX_PATHS, seed=0):
+    """
+    워크플로우 dict -> (전체 경로 수, [(경로 번호, trace)])
+    경로가 max_paths보다 많으면 seed로 고르게 샘플링합니다 (max_paths=None이면 전부).
+    """
+    graph = ReasoningGraph(workflow_data.get('steps') or [])
+    if max_paths is None:
+        chosen = enumerate(graph.iter_paths())
+    else:
+        chosen = graph.sample_paths(max_paths, seed=seed)
+    return graph.path_count, [(index, graph.trace(path)) for index, path in chosen]
@@ -0,0 +1,231 @@
+import re
+import json
+import math
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from dataset_export import discover_flows
+from flow_model import open_flow
+from node_schema import codec_for_step
+
+
+# ============================================
+# AI 학습용 노하우 구조화 도구 - 유사 단계 검색 (TF-IDF)
+# ============================================
+# 폴더 안 모든 .flow의 판단 조건 / 판단 근거 / 결론 문장을 TF-IDF 벡터로 색인하고,
+# 입력 중인 문장과 비슷한(코사인 유사도) 기존 단계를 찾아 줍니다. 네트워크 없이 로컬에서만 동작합니다.
+# - 토큰: 한글은 띄어쓰기/조사 차이에 강하도록 음절 2-gram ("배터리가" -> 배터, 터리, 리가),
+#   영문/숫자는 단어 단위 (battery_level -> battery, level)
+# - 가중치: (1 + log tf) * idf, 문서마다 L2 정규화
+# - 색인은 단어별 역색인(CSC 형식 배열: term_ptr / doc_ids / weights)으로 보관하므로,
+#   검색은 질의에 나온 단어의 목록만 더하면 되어 단계가 10만 개여도 수 ms 안에 끝납니다.
+# (Qt를 사용하지 않으므로 명령줄 도구에서도 사용할 수 있습니다.)
+
+# 색인할 step 타입 -> 필드
+DEFAULT_FIELDS = {
+    'reasoning': ('condition', 'reasoning'),
+    'conclusion': ('conclusion',),
+}
+DEFAULT_TOP_K = 10
+INDEX_VERSION = 1
+
+_TOKEN_RE = re.compile(r'[가-힣]+|[a-z]+|[0-9]+(?:\.[0-9]+)?')
+
+
+def _is_hangul(word):
+    return '가' <= word[0] <= '힣'
+
+
+def tokenize(text):
+    """문장 -> 토큰 목록 (한글: 음절 2-gram, 영문/숫자: 단어)"""
+    tokens = []
+    for word in _TOKEN_RE.findall(str(text).lower()):
+        if _is_hangul(word) and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def _term_weights(tokens):
+    """토큰 목록 -> {토큰: 1 + log tf}"""
+    return {term: 1.0 + math.log(tf) for term, tf in Counter(tokens).items()}
+
+
+def iter_step_texts(workflow_data, fields=None):
+    """워크플로우 dict -> (step id, 타입, 이름, 필드, 문장) - 빈 문장은 제외"""
+    fields = DEFAULT_FIELDS if fields is None else fields
+    for step in workflow_data.get('steps') or []:
+        if not isinstance(step, dict):
+            continue
+        codec = codec_for_step(step.get('type', ''))
+        step_type = codec.step_type if codec is not None else step.get('type', '')
+        for field in fields.get(step_type, ()):
+            text = step.get(field)
+            if isinstance(text, str) and text.strip():
+                yield step.get('id'), step_type, step.get('name', ''), field, text.strip()
+
+
+class SimilarityIndex:
+    """
+    단계 문장 TF-IDF 색인
+    - docs: [{source, path, workflow_name, step_id, type, name, field, text}] (행 번호 = 문서 번호)
+    - search(text, k, fields): [(유사도, doc)] 유사도 높은 순
+    - build(roots) / from_docs(docs): 만들기, save(path) / load(path): .npz 파일로 저장/불러오기
+    """
+
+    def __init__(self, docs, files, vocabulary, idf, term_ptr, doc_ids, weights, roots=()):
+        self.docs = docs
+        self.files = files  # 파일 키 -> [크기, 수정 시각 ns] (is_current 확인용)
+        self.roots = list(roots)  # 색인한 파일/폴더 (절대 경로)
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.term_ptr = term_ptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self._field_masks = {}
+
+    @classmethod
+    def from_docs(cls, docs, files=None, roots=()):
+        """문서 목록으로 TF-IDF 역색인 계산"""
+        docs = list(docs)
+        rows = [_term_weights(tokenize(doc['text'])) for doc in docs]
+
+        vocabulary = {}
+        df = []
+        for weights in rows:
+            for term in weights:
+                column = vocabulary.setdefault(term, len(vocabulary))
+                if column == len(df):
+                    df.append(0)
+                df[column] += 1
+        n_docs = len(docs)
+        idf = (np.log((1.0 + n_docs) / (1.0 + np.asarray(df, dtype=np.float64))) + 1.0).astype(np.float32)
+
+        # 문서별 (단어, 가중치) -> 정규화 -> 단어 순으로 정렬해 역색인 구성
+        nnz = sum(len(weights) for weights in rows)
+        doc_ids = np.empty(nnz, dtype=np.int32)
+        columns = np.empty(nnz, dtype=np.int32)
+        values = np.empty(nnz, dtype=np.float32)
+        pos = 0
+        for doc_id, weights in enumerate(rows):
+            end = pos + len(weights)
+            doc_ids[pos:end] = doc_id
+            columns[pos:end] = [vocabulary[term] for term in weights]
+            values[pos:end] = list(weights.values())
+            pos = end
+        values *= idf[columns]
+        norms = np.zeros(n_docs, dtype=np.float32)
+        np.add.at(norms, doc_ids, values * values)
+        norms = np.sqrt(norms)
+        norms[norms == 0] = 1.0
+        values /= norms[doc_ids]
+
+        order = np.argsort(columns, kind='stable')
+        term_ptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(columns, minlength=len(vocabulary)), out=term_ptr[1:])
+        return cls(docs, dict(files or {}), vocabulary, idf, term_ptr, doc_ids[order], values[order], roots)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _field_mask(self, fields):
+        key = tuple(sorted(fields))
+        mask = self._field_masks.get(key)
+        if mask is None:
+            mask = np.fromiter((doc['field'] in key for doc in self.docs), dtype=bool, count=len(self.docs))
+            self._field_masks[key] = mask
+        return mask
+
+    def search(self, text, k=DEFAULT_TOP_K, fields=None, min_score=0.0):
+        """
+        text와 비슷한 단계 k개 [(유사도 0~1, doc)]
+        fields를 주면 해당 필드(예: ('condition',))의 문장만 찾습니다.
+        """
+        query = _term_weights(tokenize(text))
+        columns = [(self.vocabulary[term], weight) for term, weight in query.items() if term in self.vocabulary]
+        if not columns or not self.docs or k <= 0:
+            return []
+        weights = np.asarray([weight * self.idf[column] for column, weight in columns], dtype=np.float32)
+        weights /= np.sqrt(float(np.dot(weights, weights)))
+
+        ids = []
+        contributions = []
+        for (column, _weight), query_weight in zip(columns, weights):
+            start, end = self.term_ptr[column], self.term_ptr[column + 1]
+            ids.append(self.doc_ids[start:end])
+            contributions.append(self.weights[start:end] * query_weight)
+        scores = np.bincount(np.concatenate(ids), weights=np.concatenate(contributions), minlength=len(self.docs))
+        if fields:
+            scores[~self._field_mask(fields)] = 0.0
+
+        candidates = np.flatnonzero(scores > max(min_score, 1e-6))
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(float(min(scores[i], 1.0)), self.docs[i]) for i in candidates]
+
+    # ---- 만들기 / 저장 ----
+
+    @classmethod
+    def build(cls, roots, fields=None, progress=None):
+        """
+        roots 아래 .flow의 단계 문장으로 색인 만들기
+        progress(done, total, label): 파일 하나를 읽기 전에 호출
+        """
+        tasks = discover_flows(roots)
+        docs = []
+        files = {}
+        for index, (key, source) in enumerate(tasks):
+            if progress:
+                progress(index, len(tasks), source)
+            try:
+                stat = Path(key).stat()
+            except OSError as e:
+                print(f"  ⚠️ 색인에서 제외: {source} ({type(e).__name__}: {e})")
+                continue
+            # 읽지 못한 파일도 stat은 기록 (is_current가 그 파일 때문에 매번 다시 만들지 않도록)
+            files[key] = [stat.st_size, stat.st_mtime_ns]
+            try:
+                opened = open_flow(key)
+            except Exception as e:
+                print(f"  ⚠️ 색인에서 제외: {source} ({type(e).__name__}: {e})")
+                continue
+            workflow_name = opened.data.get('workflow_name', '')
+            for step_id, step_type, name, field, text in iter_step_texts(opened.data, fields):
+                docs.append({
+                    "source": source, "path": key, "workflow_name": workflow_name,
+                    "step_id": step_id, "type": step_type, "name": name, "field": field, "text": text,
+                })
+        return cls.from_docs(docs, files, [str(Path(root).resolve()) for root in roots])
+
+    def is_current(self, roots=None):
+        """색인을 만든 뒤로 roots(기본: 색인한 폴더)의 .flow가 추가/삭제/수정되지 않았으면 True"""
+        current = {}
+        for key, _source in discover_flows(self.roots if roots is None else roots):
+            try:
+                stat = Path(key).stat()
+            except OSError:
+                continue
+            current[key] = [stat.st_size, stat.st_mtime_ns]
+        return current == self.files
+
+    def save(self, path):
+        """.npz 파일로 저장 (문서/단어 사전은 JSON, 역색인은 배열 그대로)"""
+        meta = json.dumps({"version": INDEX_VERSION, "docs": self.docs, "files": self.files, "roots": self.roots,
+                           "vocabulary": list(self.vocabulary)}, ensure_ascii=False)
+        with open(path, 'wb') as f:
+            np.savez(f, meta=np.frombuffer(meta.encode('utf-8'), dtype=np.uint8), idf=self.idf,
+                     term_ptr=self.term_ptr, doc_ids=self.doc_ids, weights=self.weights)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as archive:
+            meta = json.loads(archive['meta'].tobytes().decode('utf-8'))
+            if meta.get('version') != INDEX_VERSION:
+                raise ValueError(f"지원하지 않는 색인 버전입니다: {meta.get('version')}")
+            vocabulary = {term: column for column, term in enumerate(meta['vocabulary'])}
+            return cls(meta['docs'], meta['files'], vocabulary, archive['idf'], archive['term_ptr'],
+                       archive['doc_ids'], archive['weights'], meta.get('roots', ()))